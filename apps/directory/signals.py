@@ -2,23 +2,98 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from .models import Contact
-from utilities.azureblobstorage import upload_to_blob, get_blob_service_client
-import json
-import os
-import io
-import zipfile
+from utilities.azureblobstorage import upload_json_with_legacy_zip, get_blob_service_client
+from apps.embeddings.outbox import OutboxHandler, enqueue, is_outbox_enabled, register_handler
+from utilities.search_filters import SOURCE_TYPE_CONTACT
 from datetime import datetime
 import logging
 import re
 
 logger = logging.getLogger(__name__)
 
+def _contact_data(instance) -> dict:
+    """Datos del contacto que se guardan como JSON en Blob."""
+    return {
+        "id": instance.id,
+        "first_name": getattr(instance, 'first_name', ''),
+        "last_name": getattr(instance, 'last_name', ''),
+        "role": getattr(instance, 'role', ''),
+        "ministry": getattr(instance, 'ministry', ''),
+        "contact": getattr(instance, 'contact', ''),
+        "created_at": instance.created_at.isoformat() if instance.created_at else None
+    }
+
+
+def build_contact_search_document(instance):
+    """Documento para Azure AI Search (sin embedding), o None si no hay texto."""
+    # Construir contenido de búsqueda desde los campos del contacto
+    # NO incluir 'contact' para evitar indexar números de teléfono
+    parts = [
+        getattr(instance, "first_name", "") or "",
+        getattr(instance, "last_name", "") or "",
+        getattr(instance, "role", "") or "",
+        getattr(instance, "ministry", "") or "",
+    ]
+    content = " ".join(p for p in parts if p).strip()
+    if not content:
+        return None
+
+    # Campos seguros del índice: id, content, title (evitar props inexistentes)
+    doc = {
+        "id": f"contact_{instance.id}",
+        "content": content,
+        "source_type": SOURCE_TYPE_CONTACT,
+        "title": f"{(getattr(instance,'first_name','') or '').strip()} {(getattr(instance,'last_name','') or '').strip()}".strip() or None,
+    }
+    return {k: v for k, v in doc.items() if v not in (None, "")}
+
+
+def upload_contact_assets(instance) -> None:
+    """JSON + ZIP del contacto en Blob Storage."""
+    contact_data = _contact_data(instance)
+    json_blob_name = f"contacts/contact_{instance.id}.json"
+    
+    # JSON y ZIP legado (compatibilidad) desde el mismo buffer en memoria, sin archivos temporales
+    upload_json_with_legacy_zip(contact_data, json_blob_name)
+    logger.info(f"Contact data uploaded to blob: {json_blob_name} (+ converted/{json_blob_name}.zip)")
+
+
+def sync_contact_to_azure(instance) -> None:
+    """Sincronización en línea (sin outbox): embedding, Search y Blob."""
+    doc = build_contact_search_document(instance)
+    if doc:
+        # [DIRECTORY-DIRECT-VECTOR-UPLOAD] Upsert vectorial directo, id estable y sin created_at
+        try:
+            from apps.embeddings.openai_service import OpenAIService
+            from utilities.azure_search_client import get_azure_search_client
+            from utils.cache_layer import bump_index_generation
+
+            emb = OpenAIService().generate_embedding(doc["content"])
+            sc = get_azure_search_client()
+            sc.search_client.upload_documents(documents=[{**doc, "embedding": emb}])
+            bump_index_generation()
+            logger.info("[DIRECTORY] Upsert OK id=%s", doc["id"])
+        except Exception as ex:
+            logger.warning("[DIRECTORY] Upsert failed: %s", ex)
+
+    upload_contact_assets(instance)
+
+
+register_handler('contact', OutboxHandler(
+    model=Contact,
+    build_document=build_contact_search_document,
+    sync_extras=upload_contact_assets,
+))
+
+
 @receiver(post_save, sender=Contact)
 def upload_contact_to_blob(sender, instance, created, **kwargs):
     """
     Signal handler for contact processing.
     
-    This signal automatically:
+    With INDEXING_OUTBOX_ENABLED the contact is only registered in the indexing
+    outbox (same transaction as the save) and process_indexing_outbox syncs it.
+    Otherwise this signal automatically:
     1. Uploads contact data to Azure Blob Storage
     2. Generates embeddings for contact information
     3. Stores embeddings in Azure AI Search
@@ -34,82 +109,10 @@ def upload_contact_to_blob(sender, instance, created, **kwargs):
     logger.info(f"Contact signal activated for Contact: {instance.id}")
     
     try:
-        # Prepare contact data
-        contact_data = {
-            "id": instance.id,
-            "first_name": getattr(instance, 'first_name', ''),
-            "last_name": getattr(instance, 'last_name', ''),
-            "role": getattr(instance, 'role', ''),
-            "ministry": getattr(instance, 'ministry', ''),
-            "contact": getattr(instance, 'contact', ''),
-            "created_at": instance.created_at.isoformat() if instance.created_at else None
-        }
-        
-        # Create text content for embedding
-        # NO incluir 'contact' para evitar indexar números de teléfono
-        contact_text = f"{contact_data['first_name']} {contact_data['last_name']} {contact_data['role']} {contact_data['ministry']}"
-        contact_text = contact_text.strip()
-        
-        if contact_text:
-            # [DIRECTORY-DIRECT-VECTOR-UPLOAD] Upsert vectorial directo, id estable y sin created_at
-            try:
-                from apps.embeddings.openai_service import OpenAIService
-                from utilities.azure_search_client import get_azure_search_client
-
-                idx_id = f"contact_{instance.id}"
-
-                # Construir contenido de búsqueda desde los campos del contacto
-                # NO incluir 'contact' para evitar indexar números de teléfono
-                parts = [
-                    getattr(instance, "first_name", "") or "",
-                    getattr(instance, "last_name", "") or "",
-                    getattr(instance, "role", "") or "",
-                    getattr(instance, "ministry", "") or "",
-                ]
-                content = " ".join(p for p in parts if p).strip()
-
-                emb = OpenAIService().generate_embedding(content or "")
-                sc = get_azure_search_client()
-
-                # Campos seguros del índice: id, content, embedding, title (evitar props inexistentes)
-                doc = {
-                    "id": idx_id,
-                    "content": content or "",
-                    "title": f"{(getattr(instance,'first_name','') or '').strip()} {(getattr(instance,'last_name','') or '').strip()}".strip() or None,
-                    "embedding": emb,
-                }
-                doc = {k: v for k, v in doc.items() if v not in (None, "")}
-
-                sc.search_client.upload_documents(documents=[doc])
-                logger.info("[DIRECTORY] Upsert OK id=%s", idx_id)
-            except Exception as ex:
-                logger.warning("[DIRECTORY] Upsert failed: %s", ex)
-        
-        # Save contact data to blob storage
-        json_blob_name = f"contacts/contact_{instance.id}.json"
-        
-        # Save JSON temporarily
-        with open(f"temp_contact_{instance.id}.json", "w", encoding="utf-8") as f:
-            json.dump(contact_data, f, ensure_ascii=False, indent=2)
-        
-        # Upload JSON to blob
-        upload_to_blob(f"temp_contact_{instance.id}.json", json_blob_name)
-        logger.info(f"Contact data uploaded to blob: {json_blob_name}")
-        
-        # Create ZIP with contact data (legacy support)
-        buffer = io.BytesIO()
-        with zipfile.ZipFile(buffer, 'w') as zip_file:
-            with open(f"temp_contact_{instance.id}.json", 'rb') as f:
-                zip_file.writestr(json_blob_name, f.read())
-        
-        buffer.seek(0)
-        zip_blob_name = f"converted/{json_blob_name}.zip"
-        upload_to_blob(buffer, zip_blob_name)
-        logger.info(f"Contact ZIP uploaded to blob: {zip_blob_name}")
-        
-        # Clean up temporary file
-        os.remove(f"temp_contact_{instance.id}.json")
-        
+        if is_outbox_enabled():
+            enqueue('contact', instance.id)
+            return
+        sync_contact_to_azure(instance)
     except Exception as e:
         logger.error(f"Error in contact signal processing: {e}") 
 
@@ -119,8 +122,10 @@ def upload_contact_to_blob(sender, instance, created, **kwargs):
 def delete_contact_from_search(sender, instance, **kwargs):
     try:
         from utilities.azure_search_client import get_azure_search_client
+        from utils.cache_layer import bump_index_generation
         sc = get_azure_search_client()
         sc.search_client.delete_documents(documents=[{"id": f"contact_{instance.id}"}])
+        bump_index_generation()
         # Limpieza de legado (ids numéricos previos)
         try:
             sc.search_client.delete_documents(documents=[{"id": str(instance.id)}])
@@ -0,0 +1,143 @@
+"""
+Caché de conversión direccionada por contenido - VEA Connect
+
+El texto extraído de un archivo se identifica por el SHA-256 de sus bytes
+originales. Se guarda en Blob como ``converted/by-hash/<sha>.txt`` y se indexa
+en la tabla document_conversion_cache junto con la versión del extractor: si
+cambia la versión (nuevo OCR, otra estrategia de PDF) la entrada deja de servir
+y se regenera. Volver a subir el mismo PDF o editar un documento sin cambiar el
+archivo ya no repite el OCR.
+
+Feature flag: CONVERSION_CACHE_ENABLED (por defecto True)
+"""
+
+import hashlib
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "converted/by-hash/"
+
+
+def is_cache_enabled() -> bool:
+    """Indica si la caché de conversión está habilitada."""
+    return bool(getattr(settings, 'CONVERSION_CACHE_ENABLED', True))
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    SHA-256 de un archivo leído por bloques (mismo cálculo que ingest_canary.calculate_sha256)
+
+    Args:
+        file_path: Ruta del archivo
+
+    Returns:
+        str: SHA-256 hexadecimal
+    """
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+
+def blob_name_for(content_sha256: str) -> str:
+    """Nombre del blob con el texto convertido."""
+    return f"{BLOB_PREFIX}{content_sha256}.txt"
+
+
+def _blob_client(blob_name: str):
+    from services.storage_service import azure_storage
+
+    if not azure_storage.client and not azure_storage._ensure_client():
+        return None
+    return azure_storage.client.get_blob_client(container=azure_storage.container_name, blob=blob_name)
+
+
+def get_cached_text(content_sha256: str, extractor_version: str) -> Optional[str]:
+    """
+    Texto convertido para un hash y versión de extractor, o None si no hay entrada válida
+
+    Args:
+        content_sha256: SHA-256 del archivo original
+        extractor_version: Versión actual del extractor para ese tipo de archivo
+
+    Returns:
+        Optional[str]: Texto cacheado
+    """
+    from apps.documents.models import ConversionCacheEntry
+
+    try:
+        entry = ConversionCacheEntry.objects.filter(content_sha256=content_sha256).first()
+    except DatabaseError as e:
+        logger.warning(f"Caché de conversión no disponible (lectura): {str(e)}")
+        return None
+    if entry is None or entry.extractor_version != extractor_version:
+        return None
+
+    try:
+        blob_client = _blob_client(entry.blob_name)
+        if blob_client is None:
+            return None
+        text = blob_client.download_blob().readall().decode('utf-8')
+    except Exception as e:
+        # Blob borrado o inaccesible: se trata como fallo de caché y se regenerará
+        logger.warning(f"Caché de conversión: no se pudo leer {entry.blob_name}: {str(e)}")
+        return None
+
+    try:
+        ConversionCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1)
+    except DatabaseError:
+        pass
+    return text
+
+
+def store_text(content_sha256: str, extractor_version: str, text: str, source_name: str = "") -> bool:
+    """
+    Guarda el texto convertido en Blob y registra la entrada en el índice
+
+    Args:
+        content_sha256: SHA-256 del archivo original
+        extractor_version: Versión del extractor que produjo el texto
+        text: Texto extraído
+        source_name: Nombre del archivo de origen (solo informativo)
+
+    Returns:
+        bool: True si se guardó
+    """
+    from apps.documents.models import ConversionCacheEntry
+
+    blob_name = blob_name_for(content_sha256)
+    try:
+        blob_client = _blob_client(blob_name)
+        if blob_client is None:
+            return False
+        from azure.storage.blob import ContentSettings
+        blob_client.upload_blob(
+            text.encode('utf-8'),
+            overwrite=True,
+            content_settings=ContentSettings(content_type='text/plain; charset=utf-8'),
+        )
+    except Exception as e:
+        logger.warning(f"Caché de conversión: no se pudo escribir {blob_name}: {str(e)}")
+        return False
+
+    try:
+        ConversionCacheEntry.objects.update_or_create(
+            content_sha256=content_sha256,
+            defaults={
+                'extractor_version': extractor_version,
+                'blob_name': blob_name,
+                'text_length': len(text),
+                'source_name': (source_name or '')[:255],
+            },
+        )
+    except DatabaseError as e:
+        logger.warning(f"Caché de conversión no disponible (escritura): {str(e)}")
+        return False
+    return True
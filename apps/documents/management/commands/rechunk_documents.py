@@ -0,0 +1,79 @@
+"""
+Comando de gestión para migrar documentos a la configuración de chunking vigente
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from apps.documents.models import Document, ProcessingState
+from tasks.document_pipeline import chunking_is_current, get_chunking_config, process_document_async
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Reprocesa los documentos cuyo metadata["chunking"] no coincide con la configuración '
+        'vigente (CHUNKING_STRATEGY), por lotes para migrar de forma incremental'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Máximo de documentos a migrar en esta ejecución (0 = todos)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Listar los documentos pendientes sin reprocesarlos',
+        )
+
+    def handle(self, *args, **options):
+        limit = max(0, options['limit'])
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Ejecutando en modo DRY-RUN (sin cambios reales)'))
+        self.stdout.write(f"Configuración vigente: {get_chunking_config()}")
+
+        documents = Document.objects.filter(processing_state=ProcessingState.READY).only('id', 'title', 'metadata').order_by('id')
+
+        checked = 0
+        migrated = 0
+        failed = 0
+        pending = 0
+        for document in documents.iterator():
+            checked += 1
+            if chunking_is_current(document.metadata):
+                continue
+            pending += 1
+            if limit and pending > limit:
+                continue
+
+            chunking = (document.metadata or {}).get('chunking') if isinstance(document.metadata, dict) else None
+            previous = (chunking or {}).get('strategy', 'chars') if isinstance(chunking, dict) else 'sin chunking'
+            self.stdout.write(f"Documento ID={document.id} '{document.title}' ({previous})")
+            if dry_run:
+                continue
+            # El pipeline reutiliza la caché de conversión y los embeddings ya almacenados
+            if process_document_async(document.id):
+                migrated += 1
+                self.stdout.write("  ✓ Migrado")
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR("  ✗ Error al reprocesar"))
+
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("RESUMEN:")
+        self.stdout.write(f"  Documentos revisados: {checked}")
+        self.stdout.write(f"  Con chunking desactualizado: {pending}")
+        if dry_run:
+            self.stdout.write(f"  Se migrarían en esta ejecución: {min(pending, limit) if limit else pending}")
+        else:
+            self.stdout.write(f"  Migrados: {migrated}")
+            self.stdout.write(f"  Con error: {failed}")
+            if limit and pending > limit:
+                self.stdout.write(f"  Pendientes para la próxima ejecución: {pending - limit}")
+        self.stdout.write(self.style.SUCCESS("Proceso completado"))
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_remove_vector_id_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 del archivo')),
+                ('extractor_version', models.CharField(max_length=64, verbose_name='Versión del extractor')),
+                ('blob_name', models.CharField(max_length=255, verbose_name='Blob del texto')),
+                ('text_length', models.PositiveIntegerField(default=0, verbose_name='Longitud del texto')),
+                ('source_name', models.CharField(blank=True, default='', max_length=255, verbose_name='Nombre de origen')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Aciertos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Caché de conversión',
+                'verbose_name_plural': 'Caché de conversión',
+                'db_table': 'document_conversion_cache',
+            },
+        ),
+    ]
@@ -64,6 +64,31 @@ class Document(models.Model):
         verbose_name = "Documento"
         verbose_name_plural = "Documentos"
 
+class ConversionCacheEntry(models.Model):
+    """
+    Índice de la caché de conversión (texto extraído por hash del archivo original)
+
+    El texto vive en Blob como ``converted/by-hash/<sha>.txt``; esta tabla evita
+    consultar Blob en cada subida y registra con qué versión del extractor se generó.
+    """
+
+    content_sha256 = models.CharField("SHA-256 del archivo", max_length=64, unique=True)
+    extractor_version = models.CharField("Versión del extractor", max_length=64)
+    blob_name = models.CharField("Blob del texto", max_length=255)
+    text_length = models.PositiveIntegerField("Longitud del texto", default=0)
+    source_name = models.CharField("Nombre de origen", max_length=255, blank=True, default="")
+    hits = models.PositiveIntegerField("Aciertos", default=0)
+    created_at = models.DateTimeField("Creado", auto_now_add=True)
+    updated_at = models.DateTimeField("Actualizado", auto_now=True)
+
+    def __str__(self):
+        return f"{self.content_sha256[:12]} ({self.extractor_version})"
+
+    class Meta:
+        db_table = "document_conversion_cache"
+        verbose_name = "Caché de conversión"
+        verbose_name_plural = "Caché de conversión"
+
 # Señales para manejar el ciclo de vida de los documentos
 @receiver(post_delete, sender=Document)
 def delete_blob_on_document_delete(sender, instance, **kwargs):
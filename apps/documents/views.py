@@ -23,15 +23,14 @@ from django.utils import timezone
 import json
 from tasks.document_pipeline import (
     convert_document_to_text,
-    generate_embeddings,
-    split_text_into_chunks,
+    resolve_chunk_embeddings,
+    chunk_document_text,
     get_document_chunk_ids,
-    DEFAULT_CHUNK_MAX_CHARS,
-    DEFAULT_CHUNK_OVERLAP_SEGMENTS,
-    CHUNK_VERSION,
-    GENERIC_CHUNK_MODE,
+    indexed_chunk_hashes,
+    reindex_document_chunks,
 )
 from services.search_index_service import search_index_service
+from utilities.search_filters import SOURCE_TYPE_DOCUMENT
 
 logger = logging.getLogger(__name__)
 
@@ -209,14 +208,7 @@ def upload_document(request):
                 _upload_blob_overwrite('vea-connect-files', txt_blob_name, embedding_text.encode('utf-8'), 'text/plain; charset=utf-8')
 
                 # 4) Embeddings por chunks y upsert
-                chunk_texts, chunk_mode = split_text_into_chunks(
-                    embedding_text,
-                    max_chars=DEFAULT_CHUNK_MAX_CHARS,
-                    overlap_segments=DEFAULT_CHUNK_OVERLAP_SEGMENTS
-                )
-                if not chunk_texts:
-                    chunk_texts = [embedding_text]
-                    chunk_mode = GENERIC_CHUNK_MODE
+                chunk_texts, chunk_mode, chunking_config = chunk_document_text(embedding_text)
 
                 total_chunks = len(chunk_texts)
                 document_vector_id = f"doc_{document.id}"
@@ -229,11 +221,14 @@ def upload_document(request):
                         created_dt = timezone.now()
                 created_at_iso = created_dt.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
 
+                chunk_vectors, _, _ = resolve_chunk_embeddings(chunk_texts)
+                index_documents = []
                 for idx, chunk_text in enumerate(chunk_texts):
                     chunk_id = document_vector_id if total_chunks == 1 else f"{document_vector_id}_chunk_{idx:03d}"
                     chunk_metadata = {
                         'title': title,
                         'created_at': created_at_iso,
+                        'source_type': SOURCE_TYPE_DOCUMENT,
                         'metadata': json.dumps({
                             'category': category,
                             'description': description,
@@ -245,10 +240,12 @@ def upload_document(request):
                         'chunk_mode': chunk_mode
                         })
                     }
-                    vector = generate_embeddings(chunk_text)
+                    vector = chunk_vectors[idx]
                     if isinstance(vector, list) and vector:
                         chunk_metadata['embedding'] = vector
-                    search_index_service.upsert_document(chunk_id, chunk_text, chunk_metadata)
+                    index_documents.append({'id': chunk_id, 'content': chunk_text, **chunk_metadata})
+                index_status = search_index_service.upsert_documents(index_documents)
+                recorded_hashes = indexed_chunk_hashes(index_documents, index_status)
 
                 # 5) Actualizar y guardar
                 document.title = title
@@ -262,11 +259,10 @@ def upload_document(request):
                 doc_metadata = document.metadata if isinstance(document.metadata, dict) else {}
                 doc_metadata = doc_metadata or {}
                 doc_metadata['chunking'] = {
-                    'version': CHUNK_VERSION,
+                    **chunking_config,
                     'chunk_count': total_chunks,
-                    'max_chars': DEFAULT_CHUNK_MAX_CHARS,
-                    'overlap_segments': DEFAULT_CHUNK_OVERLAP_SEGMENTS,
                     'mode': chunk_mode,
+                    **recorded_hashes,
                     'last_indexed_at': timezone.now().isoformat()
                 }
                 document.metadata = doc_metadata
@@ -584,27 +580,17 @@ def edit_document(request, pk):
                     created_dt = timezone.now()
             created_at_iso = created_dt.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
 
-            chunk_texts, chunk_mode = split_text_into_chunks(
-                embedding_text,
-                max_chars=DEFAULT_CHUNK_MAX_CHARS,
-                overlap_segments=DEFAULT_CHUNK_OVERLAP_SEGMENTS
-            )
-            if not chunk_texts:
-                chunk_texts = [embedding_text]
-                chunk_mode = GENERIC_CHUNK_MODE
+            chunk_texts, chunk_mode, chunking_config = chunk_document_text(embedding_text)
 
             total_chunks = len(chunk_texts)
 
-            # Limpiar documentos previos en el índice
-            existing_chunk_ids = get_document_chunk_ids(document.id, document.metadata)
-            for chunk_id in existing_chunk_ids:
-                search_index_service.delete_document(chunk_id)
-
+            index_documents = []
             for idx, chunk_text in enumerate(chunk_texts):
                 chunk_id = document_vector_id if total_chunks == 1 else f"{document_vector_id}_chunk_{idx:03d}"
                 chunk_metadata = {
                     'title': new_title,
                     'created_at': created_at_iso,
+                    'source_type': SOURCE_TYPE_DOCUMENT,
                     'metadata': json.dumps({
                         'category': new_category,
                         'description': new_description,
@@ -616,10 +602,10 @@ def edit_document(request, pk):
                     'chunk_mode': chunk_mode
                     })
                 }
-                vector = generate_embeddings(chunk_text)
-                if isinstance(vector, list) and vector:
-                    chunk_metadata['embedding'] = vector
-                search_index_service.upsert_document(chunk_id, chunk_text, chunk_metadata)
+                index_documents.append({'id': chunk_id, 'content': chunk_text, **chunk_metadata})
+
+            # Solo se embeben y suben los chunks que cambiaron; se borran los IDs sobrantes
+            recorded_hashes, _ = reindex_document_chunks(document.id, index_documents, document.metadata)
 
             # Actualizar campos del documento sin marcar PENDING
             document.title = new_title
@@ -633,11 +619,10 @@ def edit_document(request, pk):
             doc_metadata = document.metadata if isinstance(document.metadata, dict) else {}
             doc_metadata = doc_metadata or {}
             doc_metadata['chunking'] = {
-                'version': CHUNK_VERSION,
+                **chunking_config,
                 'chunk_count': total_chunks,
-                'max_chars': DEFAULT_CHUNK_MAX_CHARS,
-                'overlap_segments': DEFAULT_CHUNK_OVERLAP_SEGMENTS,
                 'mode': chunk_mode,
+                **recorded_hashes,
                 'last_indexed_at': timezone.now().isoformat()
             }
             document.metadata = doc_metadata
@@ -703,9 +688,9 @@ def delete_document(request, pk):
                 from services.search_index_service import search_index_service as _sis
                 if _sis.client:
                     chunk_ids = get_document_chunk_ids(document.id, document.metadata)
+                    delete_status = _sis.delete_documents(chunk_ids)
                     deleted_count = 0
-                    for search_key in chunk_ids:
-                        deleted = _sis.delete_document(search_key)
+                    for search_key, deleted in delete_status.items():
                         if deleted:
                             deleted_count += 1
                             logger.info(f"Documento eliminado de Azure AI Search: {search_key}")
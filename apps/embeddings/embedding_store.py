@@ -0,0 +1,136 @@
+"""
+Almacén de embeddings direccionado por contenido
+
+Los vectores se identifican por SHA-256 del texto normalizado del chunk más el
+deployment de embeddings. La base de datos es la fuente persistente y Redis
+(utils.cache_layer, namespace vea:emb) actúa como frente opcional.
+
+Feature flag: EMBEDDING_STORE_ENABLED (por defecto True)
+"""
+
+import hashlib
+import logging
+import os
+import re
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+def is_store_enabled() -> bool:
+    """Indica si el almacén de embeddings está habilitado."""
+    return bool(getattr(settings, 'EMBEDDING_STORE_ENABLED', True))
+
+
+def get_embeddings_deployment() -> str:
+    """Deployment de embeddings activo (forma parte de la clave del almacén)."""
+    return os.getenv('AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT', '') or ''
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Normaliza espacios y saltos de línea para que cambios cosméticos no alteren el hash."""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def chunk_content_hash(text: str, deployment: str) -> str:
+    """
+    Calcula la clave de contenido de un chunk
+
+    Args:
+        text: Texto del chunk
+        deployment: Deployment de embeddings
+
+    Returns:
+        str: SHA-256 hexadecimal
+    """
+    payload = f"{deployment}\n{normalize_chunk_text(text)}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_stored_embeddings(hashes: Iterable[str], deployment: str) -> Dict[str, List[float]]:
+    """
+    Recupera vectores existentes, primero desde Redis y luego desde la base de datos
+
+    Args:
+        hashes: Claves de contenido a buscar
+        deployment: Deployment de embeddings
+
+    Returns:
+        Dict[str, List[float]]: Vectores encontrados por hash
+    """
+    wanted = list(dict.fromkeys(h for h in hashes if h))
+    found: Dict[str, List[float]] = {}
+    if not wanted:
+        return found
+
+    from utils.cache_layer import mget_emb, mset_emb, is_cache_enabled
+
+    use_redis = is_cache_enabled()
+    if use_redis:
+        # Una sola ida y vuelta a Redis para todos los chunks
+        for content_hash, cached in zip(wanted, mget_emb(wanted)):
+            if isinstance(cached, list) and cached:
+                found[content_hash] = cached
+
+    missing = [h for h in wanted if h not in found]
+    if not missing:
+        return found
+
+    try:
+        from apps.embeddings.models import ChunkEmbedding
+        rows = ChunkEmbedding.objects.filter(
+            deployment=deployment,
+            content_hash__in=missing,
+        ).values_list('content_hash', 'embedding_vector')
+        from_db = {h: v for h, v in rows if isinstance(v, list) and v}
+        found.update(from_db)
+        # Calentar el frente Redis para la siguiente lectura
+        if use_redis and from_db:
+            mset_emb(list(from_db.items()))
+    except DatabaseError as e:
+        logger.warning(f"Almacén de embeddings no disponible (lectura): {str(e)}")
+
+    return found
+
+
+def store_embeddings(vectors: Dict[str, List[float]], deployment: str) -> int:
+    """
+    Persiste vectores nuevos en la base de datos y en Redis
+
+    Args:
+        vectors: Vectores por hash de contenido
+        deployment: Deployment de embeddings
+
+    Returns:
+        int: Número de vectores enviados a persistir
+    """
+    items = {h: v for h, v in vectors.items() if h and isinstance(v, list) and v}
+    if not items:
+        return 0
+
+    from utils.cache_layer import mset_emb, is_cache_enabled
+
+    try:
+        from apps.embeddings.models import ChunkEmbedding
+        ChunkEmbedding.objects.bulk_create(
+            [
+                ChunkEmbedding(
+                    content_hash=content_hash,
+                    deployment=deployment,
+                    embedding_vector=vector,
+                    dimensions=len(vector),
+                )
+                for content_hash, vector in items.items()
+            ],
+            ignore_conflicts=True,
+        )
+    except DatabaseError as e:
+        logger.warning(f"Almacén de embeddings no disponible (escritura): {str(e)}")
+        return 0
+
+    if is_cache_enabled():
+        mset_emb(list(items.items()))
+    return len(items)
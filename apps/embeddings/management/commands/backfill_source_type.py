@@ -0,0 +1,77 @@
+"""
+Comando de gestión para completar source_type en los documentos existentes de Azure AI Search
+"""
+import logging
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utilities.search_filters import source_type_for_id
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Agrega el campo filtrable source_type al índice (si falta) y lo completa en los '
+        'documentos que no lo tienen, deduciéndolo del prefijo del ID'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Documentos por petición de merge',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Contar los documentos sin source_type sin modificar el índice',
+        )
+
+    def handle(self, *args, **options):
+        from utilities.azure_search_client import get_azure_search_client
+
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Ejecutando en modo DRY-RUN (sin cambios reales)'))
+
+        sc = get_azure_search_client()
+        if not dry_run and not sc.ensure_source_type_field():
+            raise CommandError("El índice no tiene un campo source_type filtrable (ver logs)")
+
+        # Se listan primero todos los IDs: el merge cambia el resultado del filtro y rompería la paginación
+        try:
+            results = sc.search_client.search(search_text="*", filter="source_type eq null", select=["id"])
+            pending_ids = [r["id"] for r in results]
+        except Exception as e:
+            raise CommandError(f"No se pudieron listar los documentos sin source_type: {e}")
+
+        by_type = Counter(source_type_for_id(doc_id) for doc_id in pending_ids)
+        updated = 0
+        failed = 0
+        if not dry_run:
+            for start in range(0, len(pending_ids), batch_size):
+                batch = [{"id": doc_id, "source_type": source_type_for_id(doc_id)}
+                         for doc_id in pending_ids[start:start + batch_size]]
+                try:
+                    result = sc.search_client.merge_documents(documents=batch)
+                    ok = sum(1 for r in result if r.succeeded)
+                except Exception as e:
+                    logger.error(f"[BACKFILL] Error en merge de source_type: {e}")
+                    ok = 0
+                updated += ok
+                failed += len(batch) - ok
+                self.stdout.write(f"  Lote {start // batch_size + 1}: {ok}/{len(batch)} actualizados")
+
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("RESUMEN:")
+        self.stdout.write(f"  Documentos sin source_type: {len(pending_ids)}")
+        for source_type, count in sorted(by_type.items()):
+            self.stdout.write(f"    {source_type}: {count}")
+        if not dry_run:
+            self.stdout.write(f"  Actualizados: {updated}")
+            self.stdout.write(f"  Con error: {failed}")
+        self.stdout.write(self.style.SUCCESS("Proceso completado"))
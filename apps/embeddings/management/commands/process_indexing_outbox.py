@@ -0,0 +1,106 @@
+"""
+Comando de gestión que drena el outbox de indexación (Eventos, Directorio, Donaciones)
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from apps.embeddings import outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza con Azure (Search + Blob) los objetos pendientes del outbox de indexación'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'INDEXING_OUTBOX_WORKERS', 2),
+            help='Número de hilos que procesan lotes en paralelo',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'INDEXING_OUTBOX_BATCH_SIZE', 50),
+            help='Filas reservadas por lote',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay trabajo',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drenar lo pendiente y terminar (sin quedarse escuchando)',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        batch_size = max(1, options['batch_size'])
+        poll_interval = max(0.1, options['poll_interval'])
+        once = options['once']
+        lease_seconds = getattr(settings, 'INDEXING_OUTBOX_LEASE_SECONDS', 300)
+
+        self.stdout.write(
+            f"Procesando outbox de indexación: workers={workers}, batch_size={batch_size}, "
+            f"modo={'once' if once else 'continuo'}"
+        )
+
+        totals = {'done': 0, 'failed': 0, 'missing': 0}
+        totals_lock = threading.Lock()
+        stop = threading.Event()
+        errors = []
+
+        def _worker(worker_no: int):
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    entries = outbox.claim_batch(batch_size, lease_seconds)
+                    if entries:
+                        counters = outbox.process_batch(entries)
+                        with totals_lock:
+                            for key, value in counters.items():
+                                totals[key] += value
+                        continue
+                    if once:
+                        break
+                except Exception as e:
+                    logger.error(f"[OUTBOX] Error en worker {worker_no}: {e}")
+                    if once:
+                        # Con --once un error (BD caída, tabla inexistente) termina en vez de reintentar sin fin
+                        errors.append(str(e))
+                        break
+                stop.wait(poll_interval)
+            connection.close()
+
+        threads = [
+            threading.Thread(target=_worker, args=(n,), name=f"outbox-worker-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("Deteniendo workers..."))
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("RESUMEN:")
+        self.stdout.write(f"  Sincronizados: {totals['done']}")
+        self.stdout.write(f"  Con error: {totals['failed']}")
+        self.stdout.write(f"  Eliminados antes de procesar: {totals['missing']}")
+        if errors:
+            raise CommandError(f"Workers detenidos por error: {errors[0]}")
+        self.stdout.write(self.style.SUCCESS("Proceso completado"))
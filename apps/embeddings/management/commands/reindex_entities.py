@@ -0,0 +1,229 @@
+"""
+Comando de gestión para reconstruir en Azure AI Search las entradas event_*, contact_* y donation_*
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.embeddings import outbox
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = ['event', 'contact', 'donation']
+
+
+class Command(BaseCommand):
+    help = (
+        'Reindexa Eventos, Directorio y Donaciones en Azure AI Search por lotes '
+        '(embeddings en lote y subida masiva), sin disparar señales'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entities',
+            default=','.join(ENTITY_TYPES),
+            help='Tipos a reindexar separados por coma (event,contact,donation)',
+        )
+        parser.add_argument(
+            '--since',
+            help='Solo objetos modificados desde esta fecha (YYYY-MM-DD o ISO-8601)',
+        )
+        parser.add_argument(
+            '--only-changed',
+            action='store_true',
+            help='Omitir objetos cuyo documento no cambió desde la última sincronización (hash de contenido)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'INDEXING_OUTBOX_BATCH_SIZE', 50) * 2,
+            help='Objetos por lote de embeddings y subida',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Subidas a Azure AI Search en vuelo como máximo',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Archivo JSON donde guardar el último ID procesado por tipo (reanudable)',
+        )
+        parser.add_argument(
+            '--reset-checkpoint',
+            action='store_true',
+            help='Ignorar el checkpoint existente y empezar desde el principio',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcular qué se reindexaría sin llamar a Azure',
+        )
+
+    def handle(self, *args, **options):
+        entity_types = [e.strip() for e in options['entities'].split(',') if e.strip()]
+        unknown = [e for e in entity_types if e not in ENTITY_TYPES]
+        if unknown:
+            raise CommandError(f"Tipos desconocidos: {', '.join(unknown)}")
+
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                since_date = parse_date(options['since'])
+                if since_date is None:
+                    raise CommandError("--since debe ser YYYY-MM-DD o ISO-8601")
+                since = datetime.combine(since_date, datetime.min.time())
+            if settings.USE_TZ and timezone.is_naive(since):
+                since = timezone.make_aware(since, timezone.get_current_timezone())
+
+        self.batch_size = max(1, options['batch_size'])
+        self.concurrency = max(1, options['concurrency'])
+        self.only_changed = options['only_changed']
+        self.dry_run = options['dry_run']
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = {}
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path) and not options['reset_checkpoint']:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.checkpoint = json.load(f)
+            self.stdout.write(f"Reanudando desde checkpoint: {self.checkpoint}")
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('Ejecutando en modo DRY-RUN (sin cambios reales)'))
+
+        # Los handlers se registran al importar las señales de cada app
+        import apps.events.signals  # noqa: F401
+        import apps.directory.signals  # noqa: F401
+        import apps.donations.signals  # noqa: F401
+
+        start = time.perf_counter()
+        summary = {}
+        for entity_type in entity_types:
+            summary[entity_type] = self._reindex(entity_type, since)
+
+        # Ejecución completa: el checkpoint ya no hace falta
+        if self.checkpoint_path and not self.dry_run and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        self.stdout.write("\n" + "="*50)
+        self.stdout.write("RESUMEN:")
+        for entity_type, stats in summary.items():
+            self.stdout.write(
+                f"  {entity_type}: leídos={stats['read']}, indexados={stats['indexed']}, "
+                f"sin cambios={stats['unchanged']}, sin texto={stats['empty']}, errores={stats['failed']}"
+            )
+        self.stdout.write(f"  Tiempo total: {time.perf_counter() - start:.1f}s")
+        self.stdout.write(self.style.SUCCESS("Proceso completado"))
+
+    def _reindex(self, entity_type, since):
+        """Recorre la tabla en orden de ID con iterator() y sube por lotes."""
+        handler = outbox.get_handler(entity_type)
+        stats = {'read': 0, 'indexed': 0, 'unchanged': 0, 'empty': 0, 'failed': 0}
+
+        queryset = handler.model.objects.select_related(*handler.select_related).order_by('pk')
+        if since is not None:
+            field_names = {f.name for f in handler.model._meta.get_fields()}
+            since_field = 'updated_at' if 'updated_at' in field_names else 'created_at'
+            queryset = queryset.filter(**{f"{since_field}__gte": since})
+        last_pk = self.checkpoint.get(entity_type)
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            batch = []
+            for instance in queryset.iterator(chunk_size=self.batch_size):
+                batch.append(instance)
+                if len(batch) >= self.batch_size:
+                    self._submit(entity_type, handler, batch, stats, executor, in_flight)
+                    batch = []
+            if batch:
+                self._submit(entity_type, handler, batch, stats, executor, in_flight)
+            while in_flight:
+                self._complete(entity_type, in_flight.popleft(), stats)
+
+        return stats
+
+    def _submit(self, entity_type, handler, instances, stats, executor, in_flight):
+        """Construye documentos, filtra sin cambios, genera embeddings y encola la subida."""
+        from tasks.document_pipeline import resolve_chunk_embeddings
+
+        stats['read'] += len(instances)
+        last_pk = instances[-1].pk
+        documents = []
+        for instance in instances:
+            try:
+                document = handler.build_document(instance)
+            except Exception as e:
+                stats['failed'] += 1
+                logger.warning(f"[REINDEX] No se pudo construir {entity_type}:{instance.pk}: {e}")
+                continue
+            if document:
+                documents.append((str(instance.pk), document, outbox.document_content_hash(document)))
+            else:
+                stats['empty'] += 1
+
+        if self.only_changed and documents:
+            synced = outbox.get_synced_hashes(entity_type, [pk for pk, _, _ in documents])
+            changed = [d for d in documents if synced.get(d[0]) != d[2]]
+            stats['unchanged'] += len(documents) - len(changed)
+            documents = changed
+
+        if self.dry_run or not documents:
+            stats['indexed'] += len(documents) if self.dry_run else 0
+            in_flight.append((last_pk, None, []))
+        else:
+            vectors, _, _ = resolve_chunk_embeddings([doc['content'] for _, doc, _ in documents])
+            ready = []
+            for (pk, doc, content_hash), vector in zip(documents, vectors):
+                if vector:
+                    ready.append((pk, {**doc, 'embedding': vector}, content_hash))
+                else:
+                    stats['failed'] += 1
+                    logger.warning(f"[REINDEX] Sin embedding para {doc['id']}")
+            future = executor.submit(self._upload, [doc for _, doc, _ in ready]) if ready else None
+            in_flight.append((last_pk, future, ready))
+
+        # Limitar las subidas en vuelo; se completan en orden para que el checkpoint sea contiguo
+        while len(in_flight) > self.concurrency:
+            self._complete(entity_type, in_flight.popleft(), stats)
+
+    @staticmethod
+    def _upload(documents):
+        from services.search_index_service import search_index_service
+        return search_index_service.upsert_documents(documents)
+
+    def _complete(self, entity_type, item, stats):
+        """Espera una subida, registra hashes y avanza el checkpoint."""
+        last_pk, future, ready = item
+        if future is not None:
+            try:
+                status = future.result()
+            except Exception as e:
+                logger.error(f"[REINDEX] Error subiendo lote de {entity_type}: {e}")
+                status = {}
+            synced = {pk: content_hash for pk, doc, content_hash in ready if status.get(doc['id'], False)}
+            stats['indexed'] += len(synced)
+            stats['failed'] += len(ready) - len(synced)
+            outbox.mark_synced(entity_type, synced)
+
+        self.checkpoint[entity_type] = last_pk
+        self._save_checkpoint()
+        self.stdout.write(f"  {entity_type}: hasta ID {last_pk} ({stats['indexed']} indexados)")
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path or self.dry_run:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
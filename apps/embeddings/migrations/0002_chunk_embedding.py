@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embeddings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of normalized chunk text and deployment', max_length=64)),
+                ('deployment', models.CharField(help_text='Embedding deployment/model name', max_length=100)),
+                ('embedding_vector', models.JSONField(help_text='Vector representation of the chunk')),
+                ('dimensions', models.PositiveIntegerField(default=0, help_text='Vector dimension')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Creation timestamp')),
+            ],
+            options={
+                'verbose_name': 'Chunk Embedding',
+                'verbose_name_plural': 'Chunk Embeddings',
+                'db_table': 'chunk_embeddings',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='chunkembedding',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'deployment'), name='uniq_chunk_embedding_hash_deployment'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:27
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embeddings', '0002_chunk_embedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexingOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(help_text='Registered entity type (event, contact, donation)', max_length=50)),
+                ('object_id', models.CharField(help_text='Primary key of the source object', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('version', models.PositiveIntegerField(default=1, help_text='Incremented on every enqueue')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Failed attempts for the current version')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Not claimed before this time (debounce, backoff or lease)')),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Creation timestamp')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Last enqueue or state change')),
+                ('processed_at', models.DateTimeField(blank=True, help_text='Last successful sync', null=True)),
+            ],
+            options={
+                'verbose_name': 'Indexing Outbox Entry',
+                'verbose_name_plural': 'Indexing Outbox Entries',
+                'db_table': 'indexing_outbox',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='indexing_ou_status_47a477_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='indexingoutbox',
+            constraint=models.UniqueConstraint(fields=('entity_type', 'object_id'), name='uniq_indexing_outbox_entity'),
+        ),
+    ]
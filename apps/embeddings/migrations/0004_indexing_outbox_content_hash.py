@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('embeddings', '0003_indexing_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexingoutbox',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', help_text='Hash of the last document synced to Search', max_length=64),
+        ),
+    ]
@@ -125,4 +125,79 @@ class EmbeddingSearchLog(models.Model):
     
     def __str__(self):
         """String representation of the search log."""
-        return f"Search {self.id} - {self.query_text[:50]}... ({self.created_at.strftime('%Y-%m-%d %H:%M')})" 
\ No newline at end of file
+        return f"Search {self.id} - {self.query_text[:50]}... ({self.created_at.strftime('%Y-%m-%d %H:%M')})" 
+
+class ChunkEmbedding(models.Model):
+    """
+    Content-addressed store of chunk embeddings.
+    
+    Vectors are keyed by the SHA-256 of the normalized chunk text plus the
+    embedding deployment, so reprocessing a document only embeds new chunks.
+    """
+    
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of normalized chunk text and deployment")
+    deployment = models.CharField(max_length=100, help_text="Embedding deployment/model name")
+    embedding_vector = models.JSONField(help_text="Vector representation of the chunk")
+    dimensions = models.PositiveIntegerField(default=0, help_text="Vector dimension")
+    created_at = models.DateTimeField(default=timezone.now, help_text="Creation timestamp")
+    
+    class Meta:
+        db_table = 'chunk_embeddings'
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'deployment'], name='uniq_chunk_embedding_hash_deployment'),
+        ]
+        verbose_name = "Chunk Embedding"
+        verbose_name_plural = "Chunk Embeddings"
+    
+    def __str__(self):
+        """String representation of the chunk embedding."""
+        return f"ChunkEmbedding {self.content_hash[:12]} ({self.deployment})"
+
+
+class IndexingOutbox(models.Model):
+    """
+    Transactional outbox for Azure indexing of events, contacts and donations.
+    
+    Rows are written by post_save signals in the same transaction as the model
+    save and drained by the process_indexing_outbox command. There is one row
+    per object: a new edit bumps ``version`` instead of adding a row, so rapid
+    successive edits are indexed once.
+    """
+    
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    entity_type = models.CharField(max_length=50, help_text="Registered entity type (event, contact, donation)")
+    object_id = models.CharField(max_length=64, help_text="Primary key of the source object")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    version = models.PositiveIntegerField(default=1, help_text="Incremented on every enqueue")
+    attempts = models.PositiveIntegerField(default=0, help_text="Failed attempts for the current version")
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time (debounce, backoff or lease)")
+    last_error = models.TextField(blank=True, default='')
+    content_hash = models.CharField(max_length=64, blank=True, default='', help_text="Hash of the last document synced to Search")
+    created_at = models.DateTimeField(default=timezone.now, help_text="Creation timestamp")
+    updated_at = models.DateTimeField(default=timezone.now, help_text="Last enqueue or state change")
+    processed_at = models.DateTimeField(null=True, blank=True, help_text="Last successful sync")
+    
+    class Meta:
+        db_table = 'indexing_outbox'
+        constraints = [
+            models.UniqueConstraint(fields=['entity_type', 'object_id'], name='uniq_indexing_outbox_entity'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+        verbose_name = "Indexing Outbox Entry"
+        verbose_name_plural = "Indexing Outbox Entries"
+    
+    def __str__(self):
+        """String representation of the outbox entry."""
+        return f"{self.entity_type}:{self.object_id} v{self.version} ({self.status})"
@@ -157,7 +157,52 @@ class OpenAIService:
             logger.error(f"Error generating embedding: {e}")
             logger.warning("Falling back to dummy embedding")
             return self._generate_dummy_embedding(text)
-    
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts in a single multi-input request.
+
+        Args:
+            texts: Non-empty texts to embed, in order
+
+        Returns:
+            List of embedding vectors aligned with ``texts``
+
+        Raises:
+            ValueError: If the list is empty or contains empty texts
+            Exception: If the request fails (callers decide how to fall back)
+        """
+        if not texts:
+            raise ValueError("Texts list cannot be empty")
+        if any(not t or not t.strip() for t in texts):
+            raise ValueError("Texts cannot be empty")
+
+        if not self.is_configured:
+            logger.warning("Azure OpenAI not configured - using dummy embeddings")
+            return [self._generate_dummy_embedding(t) for t in texts]
+
+        model = os.getenv('AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT')
+        if not model:
+            raise ValueError("Missing embeddings deployment configuration")
+
+        if not self.client:
+            raise ValueError("Azure OpenAI client not initialized")
+
+        response = self.client.embeddings.create(
+            input=texts,
+            model=model
+        )
+
+        # El servicio puede devolver los items en cualquier orden; alinear por index
+        ordered = sorted(response.data, key=lambda item: item.index)
+        if len(ordered) != len(texts):
+            raise ValueError(
+                f"Embedding batch size mismatch: sent {len(texts)}, received {len(ordered)}"
+            )
+        embeddings = [item.embedding for item in ordered]
+        logger.debug(f"Generated {len(embeddings)} embeddings in a single request")
+        return embeddings
+
     def generate_chat_response(self, messages: List[Dict[str, str]], 
                              max_tokens: int = 1000,
                              temperature: float = 0.7) -> str:
@@ -0,0 +1,300 @@
+"""
+Outbox transaccional de indexación - VEA Connect
+
+Las señales post_save de Eventos, Directorio y Donaciones registran aquí una
+fila (misma transacción que el guardado del modelo) en lugar de llamar a Azure
+dentro de la petición del admin. El comando process_indexing_outbox drena la
+tabla por lotes: embeddings en lote, una subida masiva a Azure AI Search y las
+subidas a Blob de cada objeto.
+
+Deduplicación: hay una fila por objeto; cada edición incrementa ``version`` y
+pospone ``available_at`` (debounce), de modo que ediciones seguidas se indexan
+una sola vez. Una fila solo se marca como hecha si su versión no cambió
+mientras se procesaba. La fila guarda además el hash del último documento
+sincronizado, que usa reindex_entities --only-changed.
+
+Feature flag: INDEXING_OUTBOX_ENABLED (por defecto False, requiere el worker)
+"""
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxHandler:
+    """Cómo sincronizar un tipo de entidad registrado en el outbox."""
+
+    model: Any
+    # Documento para Azure AI Search sin embedding (debe incluir 'id' y 'content'), o None
+    build_document: Callable[[Any], Optional[Dict[str, Any]]]
+    # Trabajo adicional por objeto (JSON/ZIP en Blob, metadata, etc.)
+    sync_extras: Optional[Callable[[Any], None]] = None
+    # Relaciones usadas por build_document (evita una consulta por fila)
+    select_related: Tuple[str, ...] = ()
+
+
+_handlers: Dict[str, OutboxHandler] = {}
+
+
+def register_handler(entity_type: str, handler: OutboxHandler) -> None:
+    """Registra el handler de un tipo de entidad (se llama al importar las señales)."""
+    _handlers[entity_type] = handler
+
+
+def get_handler(entity_type: str) -> Optional[OutboxHandler]:
+    """Handler registrado para un tipo de entidad."""
+    return _handlers.get(entity_type)
+
+
+def is_outbox_enabled() -> bool:
+    """Indica si las señales deben encolar en lugar de sincronizar en línea."""
+    return bool(getattr(settings, 'INDEXING_OUTBOX_ENABLED', False))
+
+
+def document_content_hash(document: Dict[str, Any]) -> str:
+    """
+    Hash del documento de Search (sin embedding) más el deployment de embeddings
+
+    Permite saltar objetos cuyo contenido indexado no cambió.
+    """
+    from apps.embeddings.embedding_store import get_embeddings_deployment
+
+    payload = json.dumps(document, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{get_embeddings_deployment()}\n{payload}".encode('utf-8')).hexdigest()
+
+
+def get_synced_hashes(entity_type: str, object_ids: Iterable[Any]) -> Dict[str, str]:
+    """Hash del último documento sincronizado por objeto (solo filas sin cambios pendientes)."""
+    from apps.embeddings.models import IndexingOutbox
+
+    rows = IndexingOutbox.objects.filter(
+        entity_type=entity_type,
+        object_id__in=[str(pk) for pk in object_ids],
+        status=IndexingOutbox.STATUS_DONE,
+    ).exclude(content_hash='').values_list('object_id', 'content_hash')
+    return dict(rows)
+
+
+def mark_synced(entity_type: str, hashes: Dict[str, str]) -> None:
+    """
+    Registra objetos sincronizados fuera del worker (p. ej. reindexación masiva)
+
+    Las filas con una edición pendiente no se tocan: el worker las procesará.
+    """
+    from apps.embeddings.models import IndexingOutbox
+
+    if not hashes:
+        return
+    now = timezone.now()
+    existing = {
+        row.object_id: row
+        for row in IndexingOutbox.objects.filter(entity_type=entity_type, object_id__in=list(hashes))
+    }
+    to_create = []
+    to_update = []
+    for object_id, content_hash in hashes.items():
+        row = existing.get(object_id)
+        if row is None:
+            to_create.append(IndexingOutbox(
+                entity_type=entity_type, object_id=object_id, status=IndexingOutbox.STATUS_DONE,
+                content_hash=content_hash, processed_at=now, updated_at=now,
+            ))
+        elif row.status == IndexingOutbox.STATUS_DONE:
+            row.content_hash, row.processed_at, row.updated_at = content_hash, now, now
+            to_update.append(row)
+    IndexingOutbox.objects.bulk_create(to_create, ignore_conflicts=True)
+    IndexingOutbox.objects.bulk_update(to_update, ['content_hash', 'processed_at', 'updated_at'])
+
+
+def enqueue(entity_type: str, object_id: Any) -> None:
+    """
+    Registra (o re-registra) un objeto para indexación
+
+    Se ejecuta dentro de la transacción del guardado del modelo cuando la hay
+    (el admin envuelve el guardado en una transacción). Todo corre en un
+    savepoint: las señales capturan los errores, y un fallo aquí no debe
+    abortar la transacción del admin (TransactionManagementError en PostgreSQL).
+
+    Args:
+        entity_type: Tipo registrado (event, contact, donation)
+        object_id: Clave primaria del objeto
+    """
+    from apps.embeddings.models import IndexingOutbox
+
+    now = timezone.now()
+    debounce = getattr(settings, 'INDEXING_OUTBOX_DEBOUNCE_SECONDS', 5)
+    changes = dict(
+        version=F('version') + 1,
+        status=IndexingOutbox.STATUS_PENDING,
+        attempts=0,
+        last_error='',
+        available_at=now + timedelta(seconds=debounce),
+        updated_at=now,
+    )
+    rows = IndexingOutbox.objects.filter(entity_type=entity_type, object_id=str(object_id))
+    with transaction.atomic():
+        if rows.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                IndexingOutbox.objects.create(
+                    entity_type=entity_type,
+                    object_id=str(object_id),
+                    available_at=changes['available_at'],
+                )
+        except IntegrityError:
+            # Otra petición creó la fila al mismo tiempo
+            rows.update(**changes)
+
+
+def claim_batch(batch_size: int, lease_seconds: int) -> List[Any]:
+    """
+    Reserva hasta batch_size filas listas para procesar
+
+    Las filas en 'processing' cuyo lease venció (worker caído) se vuelven a tomar.
+
+    Returns:
+        List[IndexingOutbox]: Filas reservadas (con la versión leída)
+    """
+    from apps.embeddings.models import IndexingOutbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            IndexingOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[IndexingOutbox.STATUS_PENDING, IndexingOutbox.STATUS_PROCESSING],
+                available_at__lte=now,
+            )
+            .order_by('available_at')[:batch_size]
+        )
+        if entries:
+            IndexingOutbox.objects.filter(pk__in=[e.pk for e in entries]).update(
+                status=IndexingOutbox.STATUS_PROCESSING,
+                available_at=now + timedelta(seconds=lease_seconds),
+                updated_at=now,
+            )
+    return entries
+
+
+def _finish(entry: Any, error: Optional[str], content_hash: str = '') -> None:
+    """Marca el resultado de una fila si su versión no cambió durante el proceso."""
+    from apps.embeddings.models import IndexingOutbox
+
+    now = timezone.now()
+    rows = IndexingOutbox.objects.filter(pk=entry.pk, version=entry.version)
+    if error is None:
+        rows.update(
+            status=IndexingOutbox.STATUS_DONE, last_error='', content_hash=content_hash,
+            processed_at=now, updated_at=now,
+        )
+        return
+
+    attempts = entry.attempts + 1
+    max_attempts = getattr(settings, 'INDEXING_OUTBOX_MAX_ATTEMPTS', 5)
+    if attempts >= max_attempts:
+        status, available_at = IndexingOutbox.STATUS_FAILED, now
+        logger.error(f"[OUTBOX] {entry.entity_type}:{entry.object_id} falló {attempts} veces: {error}")
+    else:
+        # Backoff exponencial acotado a 10 minutos
+        status, available_at = IndexingOutbox.STATUS_PENDING, now + timedelta(seconds=min(600, 5 * 2 ** attempts))
+        logger.warning(f"[OUTBOX] {entry.entity_type}:{entry.object_id} reintento {attempts}: {error}")
+    rows.update(status=status, attempts=attempts, last_error=error[:2000], available_at=available_at, updated_at=now)
+
+
+def process_batch(entries: List[Any]) -> Dict[str, int]:
+    """
+    Sincroniza un lote reservado con Azure
+
+    Los embeddings se generan en lote (reutilizando el almacén por contenido)
+    y los documentos se suben a Azure AI Search en una sola petición masiva.
+
+    Args:
+        entries: Filas devueltas por claim_batch
+
+    Returns:
+        Dict[str, int]: Contadores (done, failed, missing)
+    """
+    from services.search_index_service import search_index_service
+    from tasks.document_pipeline import resolve_chunk_embeddings
+
+    start = time.perf_counter()
+    counters = {'done': 0, 'failed': 0, 'missing': 0}
+    errors: Dict[int, Optional[str]] = {}
+    missing = set()
+    work = []  # (entry, handler, instance, document)
+
+    for entry in entries:
+        handler = get_handler(entry.entity_type)
+        if handler is None:
+            errors[entry.pk] = f"Tipo de entidad no registrado: {entry.entity_type}"
+            continue
+        try:
+            instance = handler.model.objects.select_related(*handler.select_related).filter(pk=entry.object_id).first()
+        except Exception as e:
+            errors[entry.pk] = f"Error cargando objeto: {e}"
+            continue
+        if instance is None:
+            # Eliminado después de encolar; post_delete ya limpia Search y Blob
+            missing.add(entry.pk)
+            errors[entry.pk] = None
+            continue
+        try:
+            document = handler.build_document(instance)
+        except Exception as e:
+            errors[entry.pk] = f"Error construyendo documento: {e}"
+            continue
+        work.append((entry, handler, instance, document))
+
+    indexed = [(entry, doc) for entry, _, _, doc in work if doc]
+    if indexed:
+        vectors, _, _ = resolve_chunk_embeddings([doc.get('content', '') for _, doc in indexed])
+        documents = []
+        for (entry, doc), vector in zip(indexed, vectors):
+            if vector:
+                documents.append({**doc, 'embedding': vector})
+            else:
+                errors[entry.pk] = "No se pudo generar el embedding"
+        status = search_index_service.upsert_documents(documents) if documents else {}
+        for entry, doc in indexed:
+            if entry.pk not in errors and not status.get(doc['id'], False):
+                errors[entry.pk] = f"Azure AI Search no indexó {doc['id']}"
+
+    for entry, handler, instance, _ in work:
+        if handler.sync_extras is not None:
+            try:
+                handler.sync_extras(instance)
+            except Exception as e:
+                errors.setdefault(entry.pk, f"Error en Blob/metadata: {e}")
+        errors.setdefault(entry.pk, None)
+
+    hashes = {entry.pk: document_content_hash(doc) for entry, _, _, doc in work if doc}
+    for entry in entries:
+        error = errors.get(entry.pk)
+        _finish(entry, error, hashes.get(entry.pk, ''))
+        if entry.pk in missing:
+            counters['missing'] += 1
+        elif error is None:
+            counters['done'] += 1
+        else:
+            counters['failed'] += 1
+
+    logger.info(
+        f"[OUTBOX] Lote procesado: {len(entries)} filas, {counters['done']} ok, "
+        f"{counters['failed']} con error, {counters['missing']} eliminadas, "
+        f"{int((time.perf_counter() - start) * 1000)}ms"
+    )
+    return counters
+
@@ -2,14 +2,12 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from .models import Event
-from utilities.azureblobstorage import upload_to_blob, get_blob_service_client
+from utilities.azureblobstorage import upload_json_with_legacy_zip, get_blob_service_client
 from utilities.embedding_manager import EmbeddingManager
+from apps.embeddings.outbox import OutboxHandler, enqueue, is_outbox_enabled, register_handler
+from utilities.search_filters import SOURCE_TYPE_EVENT
 from django.utils import timezone  # [EVENTS-DATETIME-OData-ONLY]
 import datetime as _dt  # [EVENTS-DATETIME-OData-ONLY]
-import json
-import os
-import io
-import zipfile
 from datetime import datetime
 import logging
 
@@ -102,12 +100,103 @@ def _to_odata_dt(dt):
         return s[:-6] + "Z" if s.endswith("+00:00") else s
     return dt
 
+def _event_data(instance) -> dict:
+    """Datos del evento que se guardan como JSON en Blob."""
+    return {
+        "id": instance.id,
+        "title": getattr(instance, 'title', ''),
+        "description": getattr(instance, 'description', ''),
+        "date": str(instance.date) if instance.date else None,
+        "time": str(instance.time) if instance.time else None,
+        "location": getattr(instance, 'location', ''),
+        "created_at": instance.created_at.isoformat() if instance.created_at else None,
+        "updated_at": instance.updated_at.isoformat() if instance.updated_at else None
+    }
+
+
+def build_event_search_document(instance):
+    """Documento para Azure AI Search (sin embedding, con metadata si EVENTS_ENABLE_METADATA_UPSERT), o None si no hay texto."""
+    event_data = _event_data(instance)
+    # [EVENTS-ALIGN-WITH-DOCS] ID estable (sin timestamp), y contenido concatenado
+    event_text = " ".join(filter(None, [
+        event_data.get('title') or None,
+        event_data.get('description') or None,
+        event_data.get('location') or None,
+    ])).strip()
+    if not event_text:
+        return None
+    # [EVENTS-CONTENT-COMPOSER] concatenar fecha/hora/lugar en content (sin eliminar lo actual)
+    try:
+        _extra = _compose_event_content(instance)
+    except Exception:
+        _extra = ""
+    content_text = (event_text + "\n" + (_extra or "")).strip()
+    # [EVENTS-DIRECT-VECTOR-UPLOAD] id estable y SIN created_at
+    document = {"id": f"event_{instance.id}", "content": content_text, "source_type": SOURCE_TYPE_EVENT}
+    # [EVENTS-METADATA-OFF] La metadata va en el mismo documento que el embedding:
+    # upload_documents reemplaza el documento completo, un upsert aparte la borraría o borraría el vector
+    if getattr(settings, "EVENTS_ENABLE_METADATA_UPSERT", False):
+        metadata = {
+            "title": event_data.get('title') or None,
+            "description": event_data.get('description') or None,
+            "date": event_data.get('date'),   # mantener como string si el índice lo define así
+            "time": event_data.get('time'),   # mantener como string si el índice lo define así
+            "location": event_data.get('location') or None,
+        }
+        # Limpia None para no enviar nulos innecesarios
+        document.update({k: v for k, v in metadata.items() if v is not None})
+    return document
+
+
+def upload_event_assets(instance) -> None:
+    """JSON + ZIP del evento en Blob Storage."""
+    event_data = _event_data(instance)
+    json_blob_name = f"events/event_{instance.id}.json"
+    
+    # JSON y ZIP legado (compatibilidad) desde el mismo buffer en memoria, sin archivos temporales
+    upload_json_with_legacy_zip(event_data, json_blob_name)
+    logger.info(f"Event data uploaded to blob: {json_blob_name} (+ converted/{json_blob_name}.zip)")
+
+
+def sync_event_to_azure(instance) -> None:
+    """Sincronización en línea (sin outbox): embedding, Search y Blob."""
+    document = build_event_search_document(instance)
+    if document:
+        try:
+            # [EVENTS-DIRECT-VECTOR-UPLOAD] — upsert vectorial directo, sin created_at
+            from apps.embeddings.openai_service import OpenAIService
+            from utilities.azure_search_client import get_azure_search_client
+            from utils.cache_layer import bump_index_generation
+
+            # 1) Generar embedding DIRECTO (sin pasar por EmbeddingManager)
+            emb = OpenAIService().generate_embedding(document["content"])
+
+            # 2) Subir a Search DIRECTO, con id estable y SIN created_at
+            sc = get_azure_search_client()
+            sc.search_client.upload_documents(documents=[{**document, "embedding": emb}])
+            bump_index_generation()  # invalida respuestas RAG cacheadas
+            logger.info("[EVENTS-DIRECT-VECTOR-UPLOAD] Vector upsert OK id=%s", document["id"])
+        except Exception as e:
+            logger.error("[EVENTS-DIRECT-VECTOR-UPLOAD] Falló vector upsert id=%s: %s", document["id"], e)
+
+    upload_event_assets(instance)
+
+
+register_handler('event', OutboxHandler(
+    model=Event,
+    build_document=build_event_search_document,
+    sync_extras=upload_event_assets,
+))
+
+
 @receiver(post_save, sender=Event)
 def upload_event_to_blob(sender, instance, created, **kwargs):
     """
     Signal handler for event processing.
     
-    This signal automatically:
+    With INDEXING_OUTBOX_ENABLED the event is only registered in the indexing
+    outbox (same transaction as the save) and process_indexing_outbox syncs it.
+    Otherwise this signal automatically:
     1. Uploads event data to Azure Blob Storage
     2. Generates embeddings for event content
     3. Stores embeddings in Azure AI Search
@@ -123,122 +212,10 @@ def upload_event_to_blob(sender, instance, created, **kwargs):
     logger.info(f"Event signal activated for Event: {instance.id}")
     
     try:
-        # Prepare event data
-        event_data = {
-            "id": instance.id,
-            "title": getattr(instance, 'title', ''),
-            "description": getattr(instance, 'description', ''),
-            "date": str(instance.date) if instance.date else None,
-            "time": str(instance.time) if instance.time else None,
-            "location": getattr(instance, 'location', ''),
-            "created_at": instance.created_at.isoformat() if instance.created_at else None,
-            "updated_at": instance.updated_at.isoformat() if instance.updated_at else None
-        }
-        
-        # Create text content for embedding
-        event_text = f"{event_data['title']} {event_data['description']} {event_data['location']}"
-        event_text = event_text.strip()
-        
-        if event_text:
-            # Generate embedding and store in Azure AI Search
-            try:
-                # Eliminar referencia a embedding_manager, usar EmbeddingManager() directo si es necesario
-                
-                # [EVENTS-ALIGN-WITH-DOCS] --- Payload metadata para Search (análogo a Documents) ---
-                # ID estable (sin timestamp), y contenido concatenado
-                document_id = f"event_{instance.id}"
-                event_title = event_data.get('title') or None
-                event_desc = event_data.get('description') or None
-                event_loc = event_data.get('location') or None
-                event_text = " ".join(filter(None, [event_title, event_desc, event_loc])).strip() or None
-                # [EVENTS-CONTENT-COMPOSER] concatenar fecha/hora/lugar en content (sin eliminar lo actual)
-                try:
-                    _extra = _compose_event_content(instance)
-                except Exception:
-                    _extra = ""
-                content_text = ((event_text or "") + "\n" + (_extra or "")).strip()
-
-                metadata_doc_id = document_id
-                index_doc = {
-                    "id": metadata_doc_id,
-                    "title": event_title,
-                    "description": event_desc,
-                    "date": event_data.get('date'),   # mantener como string si el índice lo define así
-                    "time": event_data.get('time'),   # mantener como string si el índice lo define así
-                    "location": event_loc,
-                    "content": content_text,
-                    "source": "event",
-                }
-                # Limpia None para no enviar nulos innecesarios
-                index_doc = {k: v for k, v in index_doc.items() if v is not None}
-
-                # [EVENTS-METADATA-OFF] Desactivar upsert metadata de Search para EVENTOS (evita 'source' y DateTimeOffset)
-                if getattr(settings, "EVENTS_ENABLE_METADATA_UPSERT", False):
-                    try:
-                        from services.search_index_service import search_index_service
-                        if getattr(search_index_service, 'client', None):
-                            # Asegurar que no se envíe 'source' y quitar 'id' del metadata
-                            index_doc.pop("source", None)
-                            logger.info("[EVENTS-METADATA-OFF] Upserting metadata id=%s", metadata_doc_id)
-                            meta_without_id = {k: v for k, v in index_doc.items() if k != 'id'}
-                            search_index_service.upsert_document(metadata_doc_id, index_doc.get("content", "") or "", meta_without_id)
-                    except Exception as _e_upsert_meta:
-                        logger.warning(f"[EVENTS-METADATA-OFF] Fallo upsert metadata: {_e_upsert_meta}")
-                else:
-                    logger.info("[EVENTS-METADATA-OFF] Metadata upsert is disabled for Events (embedding-only).")
-
-                # Create embedding
-                try:
-                    # [EVENTS-DIRECT-VECTOR-UPLOAD] — upsert vectorial directo, sin created_at
-                    from apps.embeddings.openai_service import OpenAIService
-                    from utilities.azure_search_client import get_azure_search_client
-
-                    idx_id = document_id
-                    text_for_embedding = content_text or ""
-
-                    # 1) Generar embedding DIRECTO (sin pasar por EmbeddingManager)
-                    emb = OpenAIService().generate_embedding(text_for_embedding)
-
-                    # 2) Subir a Search DIRECTO, con id estable y SIN created_at
-                    sc = get_azure_search_client()
-                    doc = {
-                        "id": idx_id,
-                        "content": text_for_embedding,
-                        "embedding": emb,
-                    }
-                    sc.search_client.upload_documents(documents=[doc])
-                    logger.info("[EVENTS-DIRECT-VECTOR-UPLOAD] Vector upsert OK id=%s", idx_id)
-                except Exception as e:
-                    logger.error("[EVENTS-DIRECT-VECTOR-UPLOAD] Falló vector upsert id=%s: %s", document_id, e)
-                    
-            except Exception as e:
-                logger.error(f"Error creating event embedding: {e}")
-        
-        # Save event data to blob storage
-        json_blob_name = f"events/event_{instance.id}.json"
-        
-        # Save JSON temporarily
-        with open(f"temp_event_{instance.id}.json", "w", encoding="utf-8") as f:
-            json.dump(event_data, f, ensure_ascii=False, indent=2)
-        
-        # Upload JSON to blob
-        upload_to_blob(f"temp_event_{instance.id}.json", json_blob_name)
-        logger.info(f"Event data uploaded to blob: {json_blob_name}")
-        
-        # Create ZIP with event data (legacy support)
-        buffer = io.BytesIO()
-        with zipfile.ZipFile(buffer, 'w') as zip_file:
-            with open(f"temp_event_{instance.id}.json", 'rb') as f:
-                zip_file.writestr(json_blob_name, f.read())
-        
-        buffer.seek(0)
-        zip_blob_name = f"converted/{json_blob_name}.zip"
-        upload_to_blob(buffer, zip_blob_name)
-        logger.info(f"Event ZIP uploaded to blob: {zip_blob_name}")
-        
-        # Clean up temporary file
-        os.remove(f"temp_event_{instance.id}.json")
-        
+        if is_outbox_enabled():
+            enqueue('event', instance.id)
+            return
+        sync_event_to_azure(instance)
     except Exception as e:
         logger.error(f"Error in event signal processing: {e}") 
 
@@ -287,9 +264,11 @@ def cleanup_event_assets(sender, instance, **kwargs):
     # 2) [EVENTS-INDEX-NORMALIZE-ONLY] delete por id estable
     try:
         from utilities.azure_search_client import get_azure_search_client  # el MISMO que usa Documentos
+        from utils.cache_layer import bump_index_generation
         sc = get_azure_search_client()
         stable_id = f"event_{event_pk}"
         sc.search_client.delete_documents(documents=[{"id": stable_id}])
+        bump_index_generation()
         logger.info(f"[EVENTS-ID-STABLE-DELETE] Eliminado de Search por ID exacto: {stable_id}")
         # (Opcional) intento adicional para legado con id crudo
         try:
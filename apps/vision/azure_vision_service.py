@@ -1,6 +1,9 @@
 import os
 import logging
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from pathlib import Path
 
 from django.conf import settings
@@ -12,6 +15,21 @@ from msrest.authentication import CognitiveServicesCredentials
 
 logger = logging.getLogger(__name__)
 
+# Límite de peticiones simultáneas a Form Recognizer en todo el proceso (VISION_OCR_MAX_CONCURRENCY)
+_remote_slots: Optional[threading.BoundedSemaphore] = None
+_remote_slots_lock = threading.Lock()
+
+
+def _get_remote_slots() -> threading.BoundedSemaphore:
+    global _remote_slots
+    if _remote_slots is None:
+        with _remote_slots_lock:
+            if _remote_slots is None:
+                _remote_slots = threading.BoundedSemaphore(
+                    max(1, getattr(settings, 'VISION_OCR_MAX_CONCURRENCY', 4))
+                )
+    return _remote_slots
+
 
 class AzureVisionService:
     """
@@ -89,6 +107,15 @@ class AzureVisionService:
             
             logger.info(f"Processing image for text extraction: {file_path}")
             
+            # TIFF multipágina: OCR por páginas en paralelo con Form Recognizer
+            if file_extension in ('.tif', '.tiff'):
+                page_count = self._page_count(file_path)
+                if page_count and page_count > 1:
+                    page_texts = self._extract_pages_parallel(file_path, list(range(1, page_count + 1)))
+                    cleaned_text = self._clean_text("\n".join(page_texts[n] for n in sorted(page_texts)))
+                    logger.info(f"Successfully extracted text from multi-page TIFF: {file_path} ({page_count} pages)")
+                    return cleaned_text.strip()
+            
             # Read image file
             with open(file_path, "rb") as image_file:
                 # Extract text using OCR
@@ -96,14 +123,11 @@ class AzureVisionService:
                 result = self.vision_client.recognize_printed_text_in_stream(image_file)
             
             # Validate result and extract text
-            extracted_text = ""
             if result and hasattr(result, 'regions') and result.regions:
-                for region in result.regions:
-                    for line in region.lines:
-                        for word in line.words:
-                            extracted_text += word.text + " "
-                        extracted_text += "\n"
-                    extracted_text += "\n"
+                extracted_text = "\n\n".join(
+                    "\n".join(" ".join(word.text for word in line.words) for line in region.lines)
+                    for region in result.regions
+                )
             else:
                 logger.warning(f"No text regions found in image: {file_path}")
                 return ""
@@ -151,26 +175,25 @@ class AzureVisionService:
             
             logger.info(f"Processing PDF for text extraction: {file_path}")
             
-            # Read PDF file
-            with open(file_path, "rb") as pdf_file:
-                pdf_data = pdf_file.read()
-            
-            # Analyze document
-            # Aquí se almacena el resultado del procesamiento de Vision, se mantiene documentado para posibles ajustes de integración con AI Search.
-            poller = self.document_client.begin_analyze_document(
-                "prebuilt-document", pdf_data
-            )
-            result = poller.result()
+            # Documentos grandes: lotes de páginas en paralelo
+            page_count = self._page_count(file_path)
+            if page_count and page_count > getattr(settings, 'VISION_OCR_PAGE_BATCH_SIZE', 4):
+                page_texts = self._extract_pages_parallel(file_path, list(range(1, page_count + 1)))
+            else:
+                # Read PDF file
+                with open(file_path, "rb") as pdf_file:
+                    pdf_data = pdf_file.read()
+                
+                # Analyze document
+                # Aquí se almacena el resultado del procesamiento de Vision, se mantiene documentado para posibles ajustes de integración con AI Search.
+                result = self._analyze_document(pdf_data)
+                page_texts = self._page_texts(result)
             
             # Validate result and extract text from all pages
-            extracted_text = ""
-            if result and hasattr(result, 'pages') and result.pages:
-                for page in result.pages:
-                    for line in page.lines:
-                        extracted_text += line.content + "\n"
-            else:
+            if not page_texts:
                 logger.warning(f"No pages found in PDF: {file_path}")
                 return ""
+            extracted_text = "\n".join(page_texts[n] for n in sorted(page_texts))
             
             # Clean text (remove special characters and emojis)
             cleaned_text = self._clean_text(extracted_text)
@@ -189,6 +212,147 @@ class AzureVisionService:
             logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
     
+    def extract_pages_from_pdf(self, file_path: str, page_numbers: List[int]) -> Dict[int, str]:
+        """
+        Extract text from selected pages of a PDF using Azure Form Recognizer.
+        
+        Only the requested pages are analyzed (and billed) by the service.
+        
+        Args:
+            file_path (str): Path to the PDF file to process
+            page_numbers (List[int]): 1-based page numbers to analyze
+            
+        Returns:
+            Dict[int, str]: Cleaned text per page number
+            
+        Raises:
+            FileNotFoundError: If the PDF file does not exist
+            Exception: If there's an error during text extraction
+        """
+        if not page_numbers:
+            return {}
+        if not os.path.exists(file_path):
+            logger.error(f"PDF file not found: {file_path}")
+            raise FileNotFoundError(f"PDF file not found: {file_path}")
+        
+        try:
+            page_texts = self._extract_pages_parallel(file_path, page_numbers)
+            return {number: self._clean_text(text) for number, text in page_texts.items()}
+            
+        except Exception as e:
+            logger.error(f"Error extracting pages from PDF {file_path}: {str(e)}")
+            raise Exception(f"Failed to extract text from PDF pages: {str(e)}")
+    
+    def _analyze_document(self, data, pages: Optional[str] = None):
+        """
+        Run one Form Recognizer analysis, throttled by VISION_OCR_MAX_CONCURRENCY.
+        
+        Args:
+            data: Document bytes or binary stream
+            pages: Optional page selection ("1,3-4")
+            
+        Returns:
+            AnalyzeResult
+        """
+        kwargs = {'pages': pages} if pages else {}
+        with _get_remote_slots():
+            poller = self.document_client.begin_analyze_document("prebuilt-document", data, **kwargs)
+            return poller.result()
+    
+    @staticmethod
+    def _page_texts(result, page_map: Optional[List[int]] = None) -> Dict[int, str]:
+        """
+        Text per page of an AnalyzeResult.
+        
+        Args:
+            result: AnalyzeResult
+            page_map: Original page number for each page of the analyzed document
+                (when it was a subset of the original file)
+        """
+        texts: Dict[int, str] = {}
+        for page in (getattr(result, 'pages', None) or []):
+            number = page.page_number
+            if page_map:
+                number = page_map[number - 1]
+            texts[number] = "\n".join(line.content for line in (page.lines or []))
+        return texts
+    
+    @staticmethod
+    def _page_count(file_path: str) -> Optional[int]:
+        """Page count with PyMuPDF (None if unavailable)."""
+        try:
+            import fitz  # type: ignore
+            with fitz.open(file_path) as doc:
+                return doc.page_count
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _split_pages(file_path: str, batches: List[List[int]]) -> Optional[List[bytes]]:
+        """
+        Build one small PDF per page batch so each request uploads only its pages.
+        
+        Returns:
+            List of PDF bytes aligned with batches, or None if PyMuPDF is unavailable
+        """
+        try:
+            import fitz  # type: ignore
+        except ImportError:
+            return None
+        try:
+            with fitz.open(file_path) as source:
+                if not source.is_pdf:
+                    # TIFF y otras imágenes multipágina: convertir a PDF en memoria
+                    source = fitz.open("pdf", source.convert_to_pdf())
+                parts = []
+                for batch in batches:
+                    with fitz.open() as part:
+                        for number in batch:
+                            part.insert_pdf(source, from_page=number - 1, to_page=number - 1)
+                        parts.append(part.tobytes())
+                return parts
+        except Exception as e:
+            logger.warning(f"Could not split {file_path} into page batches: {str(e)}")
+            return None
+    
+    def _extract_pages_parallel(self, file_path: str, page_numbers: List[int]) -> Dict[int, str]:
+        """
+        Analyze pages in batches of VISION_OCR_PAGE_BATCH_SIZE concurrently.
+        
+        Each batch is sent as its own small PDF (or, without PyMuPDF, as the
+        whole file with a pages= selection). Results are keyed by original page
+        number so callers can reassemble them in order.
+        
+        Returns:
+            Dict[int, str]: Raw (uncleaned) text per page number
+        """
+        start = time.perf_counter()
+        numbers = sorted(set(page_numbers))
+        batch_size = max(1, getattr(settings, 'VISION_OCR_PAGE_BATCH_SIZE', 4))
+        batches = [numbers[i:i + batch_size] for i in range(0, len(numbers), batch_size)]
+        parts = self._split_pages(file_path, batches)
+        
+        def _run(index: int) -> Dict[int, str]:
+            batch = batches[index]
+            if parts is not None:
+                return self._page_texts(self._analyze_document(parts[index]), page_map=batch)
+            with open(file_path, "rb") as document_file:
+                result = self._analyze_document(document_file, pages=",".join(str(n) for n in batch))
+            return self._page_texts(result)
+        
+        texts: Dict[int, str] = {}
+        workers = min(len(batches), max(1, getattr(settings, 'VISION_OCR_MAX_CONCURRENCY', 4)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch_texts in executor.map(_run, range(len(batches))):
+                texts.update(batch_texts)
+        
+        logger.info(
+            f"OCR by page batches: {file_path} pages={len(numbers)} batches={len(batches)} "
+            f"workers={workers} split={'local' if parts is not None else 'pages_param'} "
+            f"elapsed_ms={int((time.perf_counter() - start) * 1000)}"
+        )
+        return texts
+    
     def _clean_text(self, text: str) -> str:
         """
         Clean extracted text by removing special characters and emojis.
@@ -5,10 +5,10 @@ This module contains the core bot handler that orchestrates all services
 and implements the main bot logic for processing WhatsApp messages.
 """
 
-import json
+import hashlib
 import logging
+import os
 import time
-from datetime import datetime
 from typing import Dict, Any, Optional
 from django.conf import settings
 from .services import (
@@ -30,10 +30,6 @@ except ImportError:
             return cache.get(f"whatsapp:conversation:{phone_number}")
         def store_conversation_context(self, phone_number, context):
             return cache.set(f"whatsapp:conversation:{phone_number}", context, 1800)
-        def get_cached_llm_response(self, query):
-            return cache.get(f"whatsapp:llm_response:{hash(query)}")
-        def cache_llm_response(self, query, response):
-            return cache.set(f"whatsapp:llm_response:{hash(query)}", response, 3600)
     whatsapp_cache = WhatsAppCacheFallback()
 
 # Embedding manager con fallback (asegurando métodos usados por este módulo)
@@ -48,7 +44,7 @@ except ImportError:
         # Nombres usados por este módulo
         def generate_embedding(self, text):
             return None
-        def find_similar(self, embedding, limit=3, threshold=0.7):
+        def find_similar(self, embedding, limit=3, threshold=0.7, **kwargs):
             return []
         # Compatibilidad retro: por si en algún punto se usan estos nombres
         def create_embedding(self, text):
@@ -59,6 +55,24 @@ import unicodedata
 
 OpenAIService = object
 
+RAG_SYSTEM_PROMPT = (
+    "Eres un asistente de WhatsApp para la organización de VEA. Responde SOLO con base en el contexto "
+    "del índice que se te proporciona. Sé claro, breve y respetuoso y usa lenguaje religioso amable. "
+    "Si el contexto no contiene la respuesta, dilo explícitamente y sugiere contactar al equipo de Iglesia VEA."
+)
+RAG_MAX_TOKENS = 350
+RAG_TEMPERATURE = 0.2
+
+
+def _rag_prompt_version(top_k: int) -> str:
+    """Versión del prompt para la cache de respuestas: cambia si cambia el prompt, el modelo o los parámetros."""
+    signature = "|".join([
+        RAG_SYSTEM_PROMPT,
+        os.getenv('AZURE_OPENAI_CHAT_DEPLOYMENT', ''),
+        str(top_k), str(RAG_MAX_TOKENS), str(RAG_TEMPERATURE),
+    ])
+    return "rag:" + hashlib.sha256(signature.encode('utf-8')).hexdigest()[:12]
+
 logger = logging.getLogger(__name__)
 
 
@@ -228,35 +242,20 @@ class WhatsAppBotHandler:
             Dictionary with fallback response data
         """
         try:
-            # Asegurar que prompt esté siempre disponible aunque haya cache HIT
+            # Create context-aware prompt
             prompt = self._create_fallback_prompt(message_text, intent, context_data)
-            # Check cache first for AI Search response
-            cached_response_raw = whatsapp_cache.get_cached_llm_response(message_text)
-            cached_response = None
-            if isinstance(cached_response_raw, str):
-                try:
-                    cached_response = json.loads(cached_response_raw)
-                except Exception:
-                    cached_response = None
-            elif isinstance(cached_response_raw, dict):
-                cached_response = cached_response_raw
-            # Inicializar similar_docs por si se usa cache
-            similar_docs = []
-            if cached_response:
-                logger.info(f"Using cached AI Search response for query: {message_text[:50]}...")
-                fallback_response = cached_response.get('response', self._generate_structured_fallback(intent, message_text))
-            else:
-                # Create context-aware prompt (ya inicializado arriba)
-                
-                # Generate embedding for the message
-                message_embedding = self.embedding_manager.generate_embedding(message_text)
-                
-                # Find similar content for context
-                similar_docs = self.embedding_manager.find_similar(
-                    message_embedding,
-                    limit=3,
-                    threshold=0.7
-                )
+            # Sin cache de respuestas: la respuesta estructurada no sale del LLM y la cache
+            # de respuestas RAG (utils.cache_layer.get_rag_answer) solo guarda respuestas del LLM
+            
+            # Generate embedding for the message
+            message_embedding = self.embedding_manager.generate_embedding(message_text)
+            
+            # Find similar content for context
+            similar_docs = self.embedding_manager.find_similar(
+                message_embedding,
+                limit=3,
+                threshold=0.7
+            ) or []
             
             # Build context from similar documents
             context_info = ""
@@ -288,20 +287,6 @@ class WhatsAppBotHandler:
             # In a real implementation, this would call OpenAI API
             fallback_response = self._generate_structured_fallback(intent, message_text)
             
-            # Cache the AI Search response
-            search_response = {
-                'response': fallback_response,
-                'similar_docs': len(similar_docs) if similar_docs else 0,
-                'context_info': context_info,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            try:
-                whatsapp_cache.cache_llm_response(message_text, json.dumps(search_response))
-            except Exception:
-                # Si el backend acepta objetos, intentar directo
-                whatsapp_cache.cache_llm_response(message_text, str(search_response))
-            logger.info(f"Cached AI Search response for query: {message_text[:50]}...")
-            
             # Send fallback response via ACS
             acs_response = self.acs_service.send_text_message(
                 phone_number, fallback_response
@@ -641,10 +626,30 @@ class WhatsAppBotHandler:
         """
         Construye una respuesta usando el índice (RAG) y, si está disponible, redacta con LLM.
         No modifica estado ni configuración; solo lectura del índice.
+
+        Las respuestas del LLM se cachean por pregunta normalizada + IDs recuperados +
+        versión del prompt bajo la generación del índice (utils.cache_layer), así una
+        pregunta repetida no vuelve a buscar ni a llamar al LLM y cualquier escritura
+        al índice invalida las respuestas previas.
         """
+        prompt_version = _rag_prompt_version(top_k)
+        generation = None
         try:
-            # Buscar documentos similares (acepta texto directamente)
-            hits = self.embedding_manager.find_similar(message_text or '', top_k=top_k, threshold=0.0)
+            from utils.cache_layer import get_rag_answer
+            cached, generation = get_rag_answer(message_text or '', prompt_version)
+            if cached and cached.get('answer'):
+                logger.info(f"RAG answer cache HIT: {(message_text or '')[:50]}")
+                return cached['answer']
+        except Exception as _cache_err:
+            logger.debug(f"RAG answer cache no disponible: {_cache_err}")
+
+        try:
+            # Buscar documentos similares (acepta texto directamente), filtrando por tipo en el servicio
+            from utilities.search_filters import source_type_filter_for_query
+            hits = self.embedding_manager.find_similar(
+                message_text or '', top_k=top_k, threshold=0.0,
+                filter_query=source_type_filter_for_query(message_text or '')
+            )
             if not hits:
                 return "No encontré información relevante en el índice."
 
@@ -665,11 +670,12 @@ class WhatsAppBotHandler:
                 oai = OpenAIService()
                 if getattr(oai, 'is_configured', False):
                     messages = [
-                        {"role": "system", "content": "Eres un asistente de WhatsApp para la organización de VEA. Responde SOLO con base en el contexto del índice que se te proporciona. Sé claro, breve y respetuoso y usa lenguaje religioso amable. Si el contexto no contiene la respuesta, dilo explícitamente y sugiere contactar al equipo de Iglesia VEA."},
+                        {"role": "system", "content": RAG_SYSTEM_PROMPT},
                         {"role": "user", "content": f"Contexto:\n{context}\n\nPregunta: {message_text}"}
                     ]
-                    llm_answer = oai.generate_chat_response(messages, max_tokens=350, temperature=0.2)
+                    llm_answer = oai.generate_chat_response(messages, max_tokens=RAG_MAX_TOKENS, temperature=RAG_TEMPERATURE)
                     if llm_answer:
+                        self._cache_rag_answer(message_text or '', hits, prompt_version, llm_answer, generation)
                         return llm_answer
             except Exception as _llm_err:
                 logger.info(f"RAG LLM no disponible: {_llm_err}")
@@ -686,4 +692,17 @@ class WhatsAppBotHandler:
             return "Según el índice:\n" + "\n".join(resumen) if resumen else "No encontré información legible en el índice."
         except Exception as e:
             logger.warning(f"RAG error: {e}")
-            return "No encontré información en el índice."
\ No newline at end of file
+            return "No encontré información en el índice."
+
+    def _cache_rag_answer(self, message_text: str, hits: list, prompt_version: str,
+                          answer: str, generation: Optional[str]) -> None:
+        """Guarda la respuesta del LLM con la generación leída antes de buscar (nunca falla)."""
+        if generation is None:
+            return
+        try:
+            from utils.cache_layer import set_rag_answer
+            doc_ids = [str(h.get('id')) for h in hits if isinstance(h, dict) and h.get('id')]
+            if doc_ids:
+                set_rag_answer(message_text, doc_ids, prompt_version, {'answer': answer}, generation)
+        except Exception as e:
+            logger.debug(f"RAG answer cache no guardada: {e}")
\ No newline at end of file
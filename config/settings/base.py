@@ -24,6 +24,17 @@ CONFIG_ADAPTER_ENABLED = os.environ.get('CONFIG_ADAPTER_ENABLED', 'False') == 'T
 CACHE_LAYER_ENABLED = os.environ.get('CACHE_LAYER_ENABLED', 'False') == 'True'
 CANARY_INGEST_ENABLED = os.environ.get('CANARY_INGEST_ENABLED', 'False') == 'True'
 
+# Codificación de embeddings en Redis: float32 | float16 | json
+CACHE_EMB_ENCODING = os.environ.get('CACHE_EMB_ENCODING', 'float32')
+# Migración perezosa de claves v1 del cache: fecha ISO de corte, "off" o vacío (corte fijo por defecto)
+CACHE_LEGACY_MIGRATION_UNTIL = os.environ.get('CACHE_LEGACY_MIGRATION_UNTIL', '')
+# Cache L1 en proceso delante de Redis
+CACHE_L1_ENABLED = os.environ.get('CACHE_L1_ENABLED', 'True') == 'True'
+CACHE_L1_MAX_ENTRIES = int(os.environ.get('CACHE_L1_MAX_ENTRIES', '2048'))
+CACHE_L1_MAX_BYTES = int(os.environ.get('CACHE_L1_MAX_BYTES', str(64 * 1024 * 1024)))
+CACHE_L1_TTL = int(os.environ.get('CACHE_L1_TTL', '300'))
+CACHE_L1_VERSION_CHECK_SECONDS = int(os.environ.get('CACHE_L1_VERSION_CHECK_SECONDS', '5'))
+
 # Azure Function App Settings
 FUNCTION_APP_URL = os.environ.get('FUNCTION_APP_URL') # ej: https://func-vea-connect-dev.azurewebsites.net/api/FunctionName
 FUNCTION_APP_KEY = os.environ.get('FUNCTION_APP_KEY') # La clave 'default' de tus Host Keys
@@ -50,6 +61,9 @@ VISION_KEY = os.environ.get('VISION_KEY')
 # Azure Form Recognizer (Document Intelligence) Configuration
 FORM_RECOGNIZER_ENDPOINT = os.environ.get('FORM_RECOGNIZER_ENDPOINT', VISION_ENDPOINT)
 FORM_RECOGNIZER_KEY = os.environ.get('FORM_RECOGNIZER_KEY', VISION_KEY)
+# OCR por lotes de páginas en paralelo (PDF/TIFF grandes) y límite de peticiones simultáneas
+VISION_OCR_PAGE_BATCH_SIZE = int(os.environ.get('VISION_OCR_PAGE_BATCH_SIZE', '4'))
+VISION_OCR_MAX_CONCURRENCY = int(os.environ.get('VISION_OCR_MAX_CONCURRENCY', '4'))
 
 # Azure AI Search Configuration
 # Este cambio se realizó basado en un análisis de costos y mantenimiento. 
@@ -59,6 +73,43 @@ AZURE_SEARCH_ENDPOINT = os.environ.get('AZURE_SEARCH_ENDPOINT')
 AZURE_SEARCH_KEY = os.environ.get('AZURE_SEARCH_KEY')
 AZURE_SEARCH_INDEX_NAME = os.environ.get('AZURE_SEARCH_INDEX_NAME', 'vea-connect-index')
 
+# Dimensión de los embeddings del deployment (forma parte de las claves de cache)
+EMBEDDINGS_DIMENSIONS = int(os.environ.get('EMBEDDINGS_DIMENSIONS', '1536'))
+
+# Embeddings por lotes (pipeline de documentos)
+EMBEDDINGS_BATCH_MAX_INPUTS = int(os.environ.get('EMBEDDINGS_BATCH_MAX_INPUTS', '16'))
+EMBEDDINGS_BATCH_MAX_TOKENS = int(os.environ.get('EMBEDDINGS_BATCH_MAX_TOKENS', '8000'))
+EMBEDDINGS_MAX_WORKERS = int(os.environ.get('EMBEDDINGS_MAX_WORKERS', '4'))
+# Almacén de embeddings por hash de contenido (evita re-embeber chunks sin cambios)
+EMBEDDING_STORE_ENABLED = os.environ.get('EMBEDDING_STORE_ENABLED', 'True') == 'True'
+# Chunking: chars (DEFAULT_CHUNK_MAX_CHARS) | tokens (presupuesto de tokens con tokenizer local)
+CHUNKING_STRATEGY = os.environ.get('CHUNKING_STRATEGY', 'chars')
+CHUNK_MAX_TOKENS = int(os.environ.get('CHUNK_MAX_TOKENS', '512'))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get('CHUNK_OVERLAP_TOKENS', '64'))
+CHUNK_TOKEN_ENCODING = os.environ.get('CHUNK_TOKEN_ENCODING', 'cl100k_base')
+
+# Indexación por lotes en Azure AI Search (máx. 1000 documentos por petición)
+AZURE_SEARCH_BATCH_SIZE = int(os.environ.get('AZURE_SEARCH_BATCH_SIZE', '1000'))
+AZURE_SEARCH_MAX_RETRIES = int(os.environ.get('AZURE_SEARCH_MAX_RETRIES', '3'))
+
+# Descarga de blobs por bloques directamente a archivo temporal (pipeline de documentos)
+BLOB_DOWNLOAD_MAX_CONCURRENCY = int(os.environ.get('BLOB_DOWNLOAD_MAX_CONCURRENCY', '2'))
+
+# Extracción de PDF: local_first (PyMuPDF y Form Recognizer solo para páginas escaneadas) | remote_first
+PDF_EXTRACTION_STRATEGY = os.environ.get('PDF_EXTRACTION_STRATEGY', 'local_first')
+PDF_LOCAL_MIN_CHARS_PER_PAGE = int(os.environ.get('PDF_LOCAL_MIN_CHARS_PER_PAGE', '100'))
+# Caché de conversión por SHA-256 del archivo (converted/by-hash/<sha>.txt): evita repetir el OCR
+CONVERSION_CACHE_ENABLED = os.environ.get('CONVERSION_CACHE_ENABLED', 'True') == 'True'
+
+# Outbox de indexación (Eventos/Directorio/Donaciones): el admin solo escribe en BD
+# y el comando process_indexing_outbox sincroniza con Azure en segundo plano
+INDEXING_OUTBOX_ENABLED = os.environ.get('INDEXING_OUTBOX_ENABLED', 'False') == 'True'
+INDEXING_OUTBOX_DEBOUNCE_SECONDS = int(os.environ.get('INDEXING_OUTBOX_DEBOUNCE_SECONDS', '5'))
+INDEXING_OUTBOX_BATCH_SIZE = int(os.environ.get('INDEXING_OUTBOX_BATCH_SIZE', '50'))
+INDEXING_OUTBOX_WORKERS = int(os.environ.get('INDEXING_OUTBOX_WORKERS', '2'))
+INDEXING_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('INDEXING_OUTBOX_MAX_ATTEMPTS', '5'))
+INDEXING_OUTBOX_LEASE_SECONDS = int(os.environ.get('INDEXING_OUTBOX_LEASE_SECONDS', '300'))
+
 # -------------------------
 # Base de Datos
 # -------------------------
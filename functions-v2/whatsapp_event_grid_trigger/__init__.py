@@ -10,6 +10,21 @@ import requests
 import hmac
 import hashlib
 import base64
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from . import client_registry
+from .search_projection import get_select_fields
+from .search_filters import source_type_filter_for_query
+from .hybrid_search import build_search_options, run_search
+from .conversation_store import (
+    ConversationSnapshot,
+    build_turn,
+    clean_phone_number,
+    get_conversation_store,
+)
+from . import query_embedding_cache
+from . import answer_cache
+from .telemetry import telemetry
 
 # Try to import Azure Communication Messages SDK
 try:
@@ -46,6 +61,11 @@ logger = logging.getLogger(__name__)
 E2E_DEBUG = os.getenv('E2E_DEBUG', 'false').lower() == 'true'
 WHATSAPP_DEBUG = os.getenv('WHATSAPP_DEBUG', 'false').lower() == 'true'
 RAG_ENABLED = os.getenv('RAG_ENABLED', 'true').lower() == 'true'  # Changed to true by default
+# Historial y RAG en paralelo (son independientes), con timeouts por etapa y deadline global
+PARALLEL_RETRIEVAL_ENABLED = os.getenv('PARALLEL_RETRIEVAL_ENABLED', 'true').lower() == 'true'
+HISTORY_TIMEOUT_SECONDS = float(os.getenv('HISTORY_TIMEOUT_SECONDS', '5'))
+RAG_TIMEOUT_SECONDS = float(os.getenv('RAG_TIMEOUT_SECONDS', '12'))
+RETRIEVAL_DEADLINE_SECONDS = float(os.getenv('RETRIEVAL_DEADLINE_SECONDS', '12'))
 BOT_SYSTEM_PROMPT = os.getenv('BOT_SYSTEM_PROMPT', """
 Eres el asistente de la IGLESIA Cristiana VEA en WhatsApp (VEA ES UNA IGLESIA CRISTIANA). Responde SIEMPRE en español neutro, lenguaje religioso, tono cálido y directo. No uses emojis ni Markdown. Zona horaria: America/Mexico_City. Usa EXCLUSIVAMENTE el contenido que te llegue en dos bloques: CONVERSACIÓN (historial de esta charla del usuario) y DOCUMENTOS (datos oficiales de VEA).
 
@@ -513,123 +533,71 @@ def _extract_message_data_tolerant(data: Dict[str, Any]) -> Optional[Dict[str, A
         logger.error(f"Error extracting message data: {e}")
         return None
 
-def _get_conversation_history(phone_number: str) -> List[Dict[str, str]]:
+def _load_conversation(phone_number: str) -> Optional[ConversationSnapshot]:
     """
-    Get conversation history from Blob Storage.
+    Load the conversation snapshot (messages + version) from the configured store.
     
     Args:
         phone_number: User's phone number
         
     Returns:
-        List of conversation messages (max 10 messages / 5 turns)
+        ConversationSnapshot, or None if history is disabled or the read failed
     """
     try:
-        connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-        if not connection_string:
-            logger.warning("AZURE_STORAGE_CONNECTION_STRING not configured - history disabled")
-            return []
-        
-        from azure.storage.blob import BlobServiceClient
-        
-        # Limpiar número de teléfono (eliminar todos los caracteres no numéricos)
-        clean_phone = phone_number.replace('+', '').replace('-', '').replace(' ', '').replace('(', '').replace(')', '').replace('[', '').replace(']', '')
-        
-        # Configurar cliente de Blob
-        blob_service = BlobServiceClient.from_connection_string(connection_string)
-        container_name = os.getenv('AZURE_STORAGE_DOCUMENTS_CONTAINER', 'documents')
-        blob_name = f"conversations/{clean_phone}.json"
-        
-        blob_client = blob_service.get_blob_client(
-            container=container_name,
-            blob=blob_name
-        )
-        
-        # Intentar descargar historial (con timeout de 10 segundos)
-        if blob_client.exists(timeout=10):
-            data = blob_client.download_blob(timeout=10).readall()
-            history = json.loads(data.decode('utf-8'))
-            messages = history.get("messages", [])
-            # Devolver últimos 10 mensajes (5 turnos)
-            logger.info(f"Conversation history loaded for {clean_phone}: {len(messages)} messages")
-            return messages[-10:]
+        store = get_conversation_store()
+        if store is None:
+            logger.warning("No conversation store configured (Redis/Blob) - history disabled")
+            return None
         
-        logger.debug(f"No conversation history found for {clean_phone}")
-        return []
+        clean_phone = clean_phone_number(phone_number)
+        snapshot = store.load(clean_phone)
+        if snapshot.found:
+            logger.info(f"Conversation history loaded for {clean_phone}: {len(snapshot.messages)} messages")
+        else:
+            logger.debug(f"No conversation history found for {clean_phone}")
+        return snapshot
         
     except Exception as e:
         logger.error(f"Error getting conversation history for {phone_number}: {e}")
-        return []
+        return None
 
-def _update_conversation_history(phone_number: str, user_message: str, bot_response: str) -> bool:
+def _get_conversation_history(phone_number: str) -> List[Dict[str, str]]:
     """
-    Update conversation history in Blob Storage.
+    Get conversation history.
+    
+    Args:
+        phone_number: User's phone number
+        
+    Returns:
+        List of conversation messages (max 10 messages / 5 turns)
+    """
+    snapshot = _load_conversation(phone_number)
+    return snapshot.messages[-10:] if snapshot else []
+
+def _update_conversation_history(phone_number: str, user_message: str, bot_response: str,
+                                 snapshot: Optional[ConversationSnapshot] = None) -> bool:
+    """
+    Append one turn to the conversation history.
     
     Args:
         phone_number: User's phone number
         user_message: User's message
         bot_response: Bot's response
+        snapshot: History read earlier in this request (avoids reading it again)
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-        if not connection_string:
-            logger.warning("AZURE_STORAGE_CONNECTION_STRING not configured - history disabled")
+        store = get_conversation_store()
+        if store is None:
+            logger.warning("No conversation store configured (Redis/Blob) - history disabled")
             return False
         
-        from azure.storage.blob import BlobServiceClient
-        
-        # Limpiar número de teléfono (eliminar todos los caracteres no numéricos)
-        clean_phone = phone_number.replace('+', '').replace('-', '').replace(' ', '').replace('(', '').replace(')', '').replace('[', '').replace(']', '')
-        
-        # Configurar cliente de Blob
-        blob_service = BlobServiceClient.from_connection_string(connection_string)
-        container_name = os.getenv('AZURE_STORAGE_DOCUMENTS_CONTAINER', 'documents')
-        blob_name = f"conversations/{clean_phone}.json"
+        clean_phone = clean_phone_number(phone_number)
+        messages = store.append(clean_phone, build_turn(user_message, bot_response), snapshot)
         
-        blob_client = blob_service.get_blob_client(
-            container=container_name,
-            blob=blob_name
-        )
-        
-        # 1. Leer historial existente (si existe, con timeout de 10 segundos)
-        existing_messages = []
-        if blob_client.exists(timeout=10):
-            data = blob_client.download_blob(timeout=10).readall()
-            existing_data = json.loads(data.decode('utf-8'))
-            existing_messages = existing_data.get("messages", [])
-        
-        # 2. Agregar nuevos mensajes
-        now = datetime.now(timezone.utc).isoformat()
-        existing_messages.append({
-            "role": "user",
-            "content": user_message,
-            "timestamp": now
-        })
-        existing_messages.append({
-            "role": "assistant",
-            "content": bot_response,
-            "timestamp": now
-        })
-        
-        # 3. Mantener solo últimos 10 mensajes (5 turnos)
-        existing_messages = existing_messages[-10:]
-        
-        # 4. Guardar en Blob Storage
-        history_data = {
-            "phone_number": clean_phone,
-            "messages": existing_messages,
-            "last_modified": now
-        }
-        
-        blob_client.upload_blob(
-            json.dumps(history_data, ensure_ascii=False, indent=2),
-            overwrite=True,
-            timeout=10
-        )
-        
-        logger.info(f"Conversation history updated for {clean_phone}: {len(existing_messages)} messages stored")
+        logger.info(f"Conversation history updated for {clean_phone}: {len(messages)} messages stored")
         return True
         
     except Exception as e:
@@ -714,12 +682,28 @@ def _extraer_dia_semana_del_content(content: str) -> Optional[str]:
     
     return None
 
-def _get_rag_context(query: str) -> Optional[str]:
+def _track_rag_search(query: str, hits: int, start: float, embedding_info: Dict[str, Any]) -> None:
+    """Report rag.search with the query embedding cache outcome (hit rate, saved ms)."""
+    duration_ms = (time.perf_counter() - start) * 1000
+    try:
+        telemetry.track_rag_search(
+            query, hits, duration_ms, True,
+            embedding_cache=embedding_info.get('cache'),
+            embedding_ms_saved=embedding_info.get('ms_saved'),
+            embedding_cache_hit_rate=embedding_info.get('hit_rate'),
+        )
+    except Exception as e:
+        logger.debug(f"Telemetry error: {e}")
+    logger.info(f"[EMB-CACHE] stats={query_embedding_cache.stats.snapshot()}")
+
+def _get_rag_context(query: str, retrieved_ids: Optional[List[str]] = None) -> Optional[str]:
     """
     Get RAG context for the query using Azure Search directly.
     
     Args:
         query: User's query
+        retrieved_ids: If given, receives the IDs of the documents in the context
+            (key of the answer cache)
         
     Returns:
         RAG context or None
@@ -730,6 +714,7 @@ def _get_rag_context(query: str) -> Optional[str]:
             return None
         
         logger.info(f"Performing Azure Search for query: {query}")
+        rag_start = time.perf_counter()
         
         # Get Azure Search configuration
         search_endpoint = os.getenv('AZURE_SEARCH_ENDPOINT')
@@ -741,14 +726,11 @@ def _get_rag_context(query: str) -> Optional[str]:
             return None
         
         try:
-            from azure.core.credentials import AzureKeyCredential
-            from azure.search.documents import SearchClient
-            
-            # Initialize Azure Search client
-            search_client = SearchClient(
-                endpoint=search_endpoint,  # type: ignore
-                index_name=search_index,  # type: ignore
-                credential=AzureKeyCredential(search_key)  # type: ignore
+            # Clientes reutilizados entre invocaciones (pool por worker)
+            search_client, search_client_name, search_cold = client_registry.get_search_client(
+                search_endpoint,  # type: ignore
+                search_index,  # type: ignore
+                search_key  # type: ignore
             )
             
             # Perform VECTOR search EXACTAMENTE como CLI
@@ -761,35 +743,70 @@ def _get_rag_context(query: str) -> Optional[str]:
                 logger.error("OpenAI configuration missing for embeddings")
                 return None
             
-            from openai import AzureOpenAI
-            openai_client = AzureOpenAI(
-                api_key=openai_key,
-                api_version="2024-02-15-preview",
-                azure_endpoint=openai_endpoint
+            openai_client, openai_client_name, openai_cold = client_registry.get_openai_client(
+                openai_endpoint,
+                openai_key,
+                "2024-02-15-preview"
             )
             
-            embedding_response = openai_client.embeddings.create(
-                input=query,
-                model=embedding_deployment
-            )
-            query_embedding = embedding_response.data[0].embedding
+            def _embed(text: str) -> List[float]:
+                try:
+                    embedding_response = openai_client.embeddings.create(
+                        input=text,
+                        model=embedding_deployment
+                    )
+                except Exception:
+                    client_registry.report_failure(openai_client_name)
+                    raise
+                client_registry.report_success(openai_client_name)
+                return embedding_response.data[0].embedding
             
-            # Paso 2: Búsqueda vectorial (como AzureSearchClient.search_vector línea 198-213)
-            search_options = {
-                "vector_queries": [{
-                    "vector": query_embedding,
-                    "fields": "embedding",
-                    "k": 15,  # Aumentado para filtrado posterior
-                    "kind": "vector"
-                }],
-                "select": ["id", "content", "embedding", "created_at"],
-                "top": 15  # Aumentado de 5 a 15
-            }
+            # Caché de embeddings por consulta normalizada (LRU en proceso + Redis opcional)
+            embedding_start = time.perf_counter()
+            query_embedding, embedding_info = query_embedding_cache.get_query_embedding(
+                query, embedding_deployment, _embed
+            )
+            logger.info(
+                f"[V2][LATENCY] embedding path={'cold' if openai_cold else 'warm'} "
+                f"cache={embedding_info['cache']} ms={int((time.perf_counter() - embedding_start) * 1000)} "
+                f"saved_ms={embedding_info['ms_saved']} hit_rate={embedding_info['hit_rate']}"
+            )
             
-            search_results = search_client.search(search_text="", **search_options)
+            # Paso 2: Búsqueda híbrida BM25 + vector en una sola petición (RRF en el servicio);
+            # con AZURE_SEARCH_HYBRID_ENABLED=false es la búsqueda vectorial anterior
+            # Filtro por intención en el servicio (source_type): los k vecinos ya excluyen
+            # contactos/donaciones que no aplican a la pregunta
+            source_filter = source_type_filter_for_query(query)
+            search_options = build_search_options(
+                query,
+                query_embedding,
+                15,  # Aumentado de 5 a 15
+                get_select_fields(),  # perfil "rag": sin el vector embedding
+                source_filter,
+            )
+            if source_filter:
+                logger.info(f"[FILTER] Server-side filter: {source_filter}")
             
-            # Filtrado inteligente
-            results_list = list(search_results)
+            search_start = time.perf_counter()
+            try:
+                try:
+                    results_list = run_search(search_client, search_options)
+                except Exception as filter_error:
+                    if "filter" not in search_options:
+                        raise
+                    # Índice sin source_type filtrable: repetir sin filtro (el filtrado en Python cubre)
+                    logger.warning(f"[FILTER] Server-side filter rejected, retrying without it: {filter_error}")
+                    search_options.pop("filter")
+                    results_list = run_search(search_client, search_options)
+            except Exception:
+                client_registry.report_failure(search_client_name)
+                raise
+            client_registry.report_success(search_client_name)
+            logger.info(
+                f"[V2][LATENCY] search path={'cold' if search_cold else 'warm'} "
+                f"mode={'hybrid' if search_options.get('search_text') else 'vector'} "
+                f"ms={int((time.perf_counter() - search_start) * 1000)}"
+            )
             
             # Detectar si pregunta por CONTACTO o MINISTERIOS o PERSONAS o DONACIONES
             palabras_contacto = ['contacto', 'teléfono', 'telefono', 'número', 'numero', 'llamar', 'comunicar', 'hablar', 'whatsapp']
@@ -800,6 +817,8 @@ def _get_rag_context(query: str) -> Optional[str]:
             es_pregunta_ministerio = any(palabra in query.lower() for palabra in palabras_ministerio)
             es_pregunta_donacion = any(palabra in query.lower() for palabra in palabras_donacion)
             
+            # Respaldo en Python por prefijo de ID: cubre documentos aún sin source_type
+            # (antes de backfill_source_type) y el reintento sin filtro
             # Filtrar contactos SOLO si ES pregunta de contacto Y NO es pregunta de donación
             # REGLA CRÍTICA: Si pregunta por donaciones/diezmo, NUNCA incluir contactos personales
             if es_pregunta_donacion:
@@ -953,6 +972,7 @@ def _get_rag_context(query: str) -> Optional[str]:
             
             # Paso 3: Extraer contexto (como handlers._rag_answer línea 652-660)
             context_parts = []
+            context_ids = []
             for result in results_list:
                 try:
                     # CLI línea 655: h.get('text') or h.get('content')
@@ -961,8 +981,12 @@ def _get_rag_context(query: str) -> Optional[str]:
                     txt = ''
                 if txt:
                     context_parts.append(f"- {txt}")  # Sin truncar, como CLI línea 659
+                    context_ids.append(str(result.get('id', '')))
             
+            _track_rag_search(query, len(context_parts), rag_start, embedding_info)
             if context_parts:
+                if retrieved_ids is not None:
+                    retrieved_ids.extend(context_ids)
                 context = "\n".join(context_parts)[:4000]  # Límite 4000 como CLI línea 660
                 logger.info(f"[V2] Generated RAG context with {len(context)} characters from {len(context_parts)} results")
                 return str(context)
@@ -1022,7 +1046,8 @@ def _generate_hmac_signature(access_key: str, url: str, method: str = 'POST', co
         logger.error(f"Error generating HMAC signature: {e}")
         return ""
 
-def _generate_ai_response(user_message: str, conversation_history: List[Dict[str, str]], rag_context: Optional[str] = None) -> str:
+def _generate_ai_response(user_message: str, conversation_history: List[Dict[str, str]], rag_context: Optional[str] = None,
+                          outcome: Optional[Dict[str, Any]] = None) -> str:
     """
     Generate AI response using OpenAI.
     
@@ -1030,6 +1055,8 @@ def _generate_ai_response(user_message: str, conversation_history: List[Dict[str
         user_message: User's message
         conversation_history: Conversation history
         rag_context: RAG context
+        outcome: If given, 'llm' is set to True when the reply came from the model
+            (only those replies go to the answer cache)
         
     Returns:
         Generated response
@@ -1046,27 +1073,17 @@ def _generate_ai_response(user_message: str, conversation_history: List[Dict[str
             logger.warning("OpenAI not configured, using fallback response")
             return f"Hola! Recibí tu mensaje: '{user_message}'. Soy el asistente virtual de VEA Connect. ¿En qué puedo ayudarte?"
         
-        # Import OpenAI client
+        # Cliente reutilizado entre invocaciones (pool httpx keep-alive compartido)
         try:
-            from openai import AzureOpenAI
-            import httpx
+            client, client_name, client_cold = client_registry.get_openai_client(
+                openai_endpoint,  # type: ignore
+                openai_key,  # type: ignore
+                os.getenv('AZURE_OPENAI_CHAT_API_VERSION', '2024-02-15-preview')
+            )
         except ImportError:
             logger.error("OpenAI library not available")
             return "Lo siento, el servicio de IA no está disponible en este momento."
         
-        # Initialize OpenAI client with custom http_client to avoid proxies issue
-        http_client = httpx.Client(
-            timeout=httpx.Timeout(30.0, connect=10.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
-        )
-        
-        client = AzureOpenAI(
-            azure_endpoint=openai_endpoint,  # type: ignore
-            api_key=openai_key,  # type: ignore
-            api_version=os.getenv('AZURE_OPENAI_CHAT_API_VERSION', '2024-02-15-preview'),
-            http_client=http_client
-        )
-        
         # EXACTAMENTE como CLI handlers._rag_answer líneas 647-673
         
         # Detectar preguntas personales y saludos (no requieren RAG)
@@ -1128,12 +1145,18 @@ def _generate_ai_response(user_message: str, conversation_history: List[Dict[str
         # Manejo de errores de filtro de contenido
         try:
             # Generate response con temperatura reducida para evitar alucinaciones
+            chat_start = time.perf_counter()
             response = client.chat.completions.create(
                 model=openai_deployment,  # type: ignore
                 messages=messages,  # type: ignore
                 max_tokens=350,
                 temperature=0.0  # 0.0 para evitar inventar información
             )
+            client_registry.report_success(client_name)
+            logger.info(
+                f"[V2][LATENCY] chat path={'cold' if client_cold else 'warm'} "
+                f"ms={int((time.perf_counter() - chat_start) * 1000)}"
+            )
             
             if response.choices and response.choices[0].message and response.choices[0].message.content:
                 ai_response = response.choices[0].message.content.strip()
@@ -1194,6 +1217,8 @@ def _generate_ai_response(user_message: str, conversation_history: List[Dict[str
                     logger.info(f"[POST-PROCESS] Removed temporal words from response")
                 
                 logger.info(f"Generated AI response: {ai_response[:100]}...")
+                if outcome is not None:
+                    outcome['llm'] = True
                 return ai_response
             else:
                 logger.error("No response content from OpenAI")
@@ -1206,6 +1231,7 @@ def _generate_ai_response(user_message: str, conversation_history: List[Dict[str
                 logger.warning(f"[CONTENT_FILTER] Message blocked for user: {user_message[:50]}")
                 return "Disculpa, no pude procesar tu mensaje debido a las políticas de seguridad. Intenta reformular tu pregunta de otra forma."
             else:
+                client_registry.report_failure(client_name)
                 logger.error(f"Error generating AI response: {e}")
                 raise
             
@@ -1481,6 +1507,108 @@ def _send_whatsapp_image(to_number: str, image_url: str, caption: str = "") -> b
         logger.error(f"Error sending WhatsApp image message: {e}")
         return False
 
+# Pool de hilos por worker para la recuperación concurrente (reutilizado entre invocaciones)
+_retrieval_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_retrieval_executor() -> ThreadPoolExecutor:
+    global _retrieval_executor
+    if _retrieval_executor is None:
+        _retrieval_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('RETRIEVAL_MAX_WORKERS', '4')),
+            thread_name_prefix='v2-retrieval'
+        )
+    return _retrieval_executor
+
+
+def _timed(func_to_time, *args):
+    """Ejecuta una función y devuelve (resultado, ms)."""
+    start = time.perf_counter()
+    result = func_to_time(*args)
+    return result, int((time.perf_counter() - start) * 1000)
+
+
+def _cached_answer_or_rag(text: str, answer_version: Optional[str], stage_ms: Dict[str, int],
+                          retrieved_ids: Optional[List[str]] = None):
+    """
+    Consulta la cache de respuestas y, solo si no hay HIT, el contexto RAG.
+    
+    Corre como una única etapa junto a la carga del historial: un HIT evita la
+    búsqueda sin serializar nada detrás del historial.
+    
+    Returns:
+        (rag_context, answer_ctx); answer_ctx es None si la cache no aplica
+    """
+    answer_ctx = None
+    if answer_version is not None:
+        answer_ctx, stage_ms['answer_cache'] = _timed(answer_cache.lookup, text, answer_version)
+        if answer_ctx.answer:
+            return None, answer_ctx
+    rag_context, stage_ms['rag_search'] = _timed(_get_rag_context, text, retrieved_ids)
+    return rag_context, answer_ctx
+
+
+def _load_history_and_rag(phone_number: str, text: str, skip_rag: bool, stage_ms: Dict[str, int],
+                          retrieved_ids: Optional[List[str]] = None, answer_version: Optional[str] = None):
+    """
+    Carga historial y contexto RAG, en paralelo si PARALLEL_RETRIEVAL_ENABLED.
+    
+    Cada etapa tiene su propio timeout y ambas comparten un deadline global;
+    si una etapa no termina a tiempo se continúa sin ella (historial vacío / sin RAG),
+    igual que cuando falla. La etapa RAG consulta antes la cache de respuestas
+    (ver _cached_answer_or_rag) cuando se pasa answer_version.
+    
+    Args:
+        phone_number: Número del usuario
+        text: Mensaje del usuario
+        skip_rag: True para no consultar RAG (saludos simples)
+        stage_ms: Diccionario donde se registran los tiempos por etapa
+        retrieved_ids: Lista que recibe los IDs del contexto RAG (ver _get_rag_context)
+        answer_version: Versión del prompt para la cache de respuestas, None si no aplica
+        
+    Returns:
+        (conversation_snapshot, rag_context, answer_ctx); the snapshot is None if
+        history could not be loaded, answer_ctx is None without cache lookup
+    """
+    if not PARALLEL_RETRIEVAL_ENABLED:
+        snapshot, stage_ms['history'] = _timed(_load_conversation, phone_number)
+        rag_context, answer_ctx = None, None
+        if not skip_rag:
+            (rag_context, answer_ctx), stage_ms['rag'] = _timed(
+                _cached_answer_or_rag, text, answer_version, stage_ms, retrieved_ids
+            )
+        return snapshot, rag_context, answer_ctx
+    
+    executor = _get_retrieval_executor()
+    deadline = time.monotonic() + RETRIEVAL_DEADLINE_SECONDS
+    history_future = executor.submit(_timed, _load_conversation, phone_number)
+    rag_future = None if skip_rag else executor.submit(
+        _timed, _cached_answer_or_rag, text, answer_version, stage_ms, retrieved_ids
+    )
+    
+    def _collect(future, step: str, step_timeout: float, default):
+        remaining = max(0.0, min(step_timeout, deadline - time.monotonic()))
+        try:
+            result, elapsed = future.result(timeout=remaining)
+            stage_ms[step] = elapsed
+            return result
+        except FutureTimeoutError:
+            future.cancel()
+            stage_ms[step] = int(remaining * 1000)
+            logger.warning(f"[V2][TIMEOUT] {step} did not finish in {remaining:.1f}s - continuing without it")
+            return default
+        except Exception as e:
+            logger.error(f"[V2] {step} failed: {e}")
+            return default
+    
+    # RAG primero: suele ser la etapa más lenta y el historial corre mientras tanto
+    rag_context, answer_ctx = (
+        _collect(rag_future, 'rag', RAG_TIMEOUT_SECONDS, (None, None)) if rag_future else (None, None)
+    )
+    snapshot = _collect(history_future, 'history', HISTORY_TIMEOUT_SECONDS, None)
+    return snapshot, rag_context, answer_ctx
+
+
 def main(event: func.EventGridEvent) -> None:
     """
     WhatsApp Event Grid trigger handler.
@@ -1545,31 +1673,57 @@ def main(event: func.EventGridEvent) -> None:
             
             logger.info(f"[V2] Processing message from {from_number} (ID: {message_id}): {text}")
             
-            # Get conversation history
-            conversation_history = _get_conversation_history(from_number)
+            stage_ms: Dict[str, int] = {}
             
             # Detectar saludos simples (NO buscar en RAG para saludos)
             saludos_simples = ['hola', 'buenos días', 'buenas tardes', 'buenas noches', 'qué tal', 'hey', 'saludos', 'buenas']
             es_saludo_simple = text.lower().strip() in saludos_simples
-            
-            # Get RAG context if enabled (SKIP para saludos simples)
             if es_saludo_simple:
                 logger.info(f"[V2] Simple greeting detected - skipping RAG search: {text}")
-                rag_context = None
-            else:
-                rag_context = _get_rag_context(text)
+            
+            # Cache de respuestas completas (pregunta + prompt, por generación del índice): la consulta
+            # corre dentro de la etapa RAG, en paralelo con el historial; un HIT evita búsqueda y LLM
+            answer_version = None
+            retrieved_ids: List[str] = []
+            if not es_saludo_simple:
+                answer_version = answer_cache.prompt_version(BOT_SYSTEM_PROMPT, os.getenv('AZURE_OPENAI_CHAT_DEPLOYMENT'))
+            
+            # Get conversation history and RAG context (en paralelo; SKIP RAG para saludos simples y HIT de cache)
+            retrieval_start = time.perf_counter()
+            history_snapshot, rag_context, answer_ctx = _load_history_and_rag(
+                from_number, text, es_saludo_simple, stage_ms, retrieved_ids, answer_version
+            )
+            conversation_history = history_snapshot.messages[-10:] if history_snapshot else []
+            stage_ms['retrieval'] = int((time.perf_counter() - retrieval_start) * 1000)
             
             # Generate AI response
-            ai_response = _generate_ai_response(text, conversation_history, rag_context)
+            cached_answer = answer_ctx.answer if answer_ctx else None
+            if cached_answer:
+                logger.info(f"[ANSWER-CACHE] HIT generation={answer_ctx.generation}")
+                ai_response = cached_answer
+                stage_ms['answer_cache_hit'] = 1
+            else:
+                # Solo preguntas independientes (answer_cache.is_cacheable_question): su respuesta no depende
+                # de la conversación, se genera sin historial y se comparte entre usuarios; el resto usa historial
+                cacheable = bool(answer_ctx and answer_ctx.enabled and rag_context)
+                llm_history = [] if cacheable else conversation_history
+                outcome: Dict[str, Any] = {}
+                ai_response, stage_ms['llm'] = _timed(
+                    _generate_ai_response, text, llm_history, rag_context, outcome
+                )
+                if cacheable and outcome.get('llm') and retrieved_ids:
+                    answer_ctx.store(retrieved_ids, ai_response)
             
-            # Update conversation history
-            _update_conversation_history(from_number, text, ai_response)
+            # Update conversation history (reutiliza la lectura inicial; sin segunda descarga)
+            _, stage_ms['history_update'] = _timed(
+                _update_conversation_history, from_number, text, ai_response, history_snapshot
+            )
             
             # Normalizar UTF-8 antes de enviar (evitar mojibake)
             # ai_response_normalized = ai_response.encode('utf-8').decode('utf-8')  # ← comentado para evitar doble transcodificación
             
             # Send WhatsApp response (enviar la cadena Unicode tal cual)
-            success = _send_whatsapp_text(from_number, ai_response)
+            success, stage_ms['send'] = _timed(_send_whatsapp_text, from_number, ai_response)
             
             # Log the response and status
             logger.info(f"Response sent: {ai_response[:100]}...")
@@ -1582,7 +1736,9 @@ def main(event: func.EventGridEvent) -> None:
             
             # Log processing time
             processing_time_ms = int((time.time() - start_time) * 1000)
+            stage_ms['total'] = processing_time_ms
             logger.info(f"Total processing time: {processing_time_ms}ms")
+            logger.info(f"[V2][STAGES] {json.dumps({'message_id': message_id, 'parallel': PARALLEL_RETRIEVAL_ENABLED, 'stage_ms': stage_ms})}")
             
         else:
             logger.info(f"Ignoring event type: {event.event_type}")
@@ -0,0 +1,193 @@
+"""
+Full RAG answer cache for the v2 WhatsApp function.
+
+Repeated questions ("horarios del domingo", "cómo donar") skip both the Azure
+Search round trip and the chat completion. One Redis entry per normalized
+question holds the reply together with the index generation, the prompt
+version and the IDs of the documents that built the context; the lookup reads
+it and the generation with a single MGET.
+
+The generation lives in ``vea:index:gen`` and is incremented by the web app on
+every write to Azure AI Search (utils.cache_layer.bump_index_generation:
+pipeline, views, signals, outbox). An entry is only served if its generation
+is the current one, so an edit or delete makes every previous entry stale at
+once and a cached answer is never older than the index. The generation is read
+BEFORE searching: an entry built while the index was being written carries the
+old generation and is never served.
+
+The chat prompt also carries the conversation history and the current date
+and time, so:
+
+- the prompt version hashes the system prompt, the chat deployment and the
+  local time in America/Mexico_City bucketed by ANSWER_CACHE_TTL_SECONDS
+  (a cached answer never outlives the time window it was generated in);
+- only standalone questions are cached: not personal ("me llamo", "mi
+  donativo"), not follow-ups ("¿y eso?", "¿y el sábado?") and not about the
+  current time ("¿qué hora es?", "¿ya empezó?"). Their answers do not depend on
+  the conversation, so they are generated without the history and shared by
+  every user; everything else goes through search + LLM with the history.
+
+Without Redis (or with the generation unreadable) nothing is cached.
+
+The web app has its own answer cache (utils.cache_layer.get_rag_answer) and
+only the generation key is shared. The keyspaces stay separate on purpose:
+this function does not load Django or utils.cache_layer, and its replies come
+from a different prompt (BOT_SYSTEM_PROMPT with date and time), so an answer
+cached by one side is never valid for the other.
+
+Environment:
+    ANSWER_CACHE_ENABLED (default "true"; needs REDIS_URL / AZURE_REDIS_URL)
+    ANSWER_CACHE_TTL_SECONDS (default 1800)
+    ANSWER_PROMPT_VERSION (default "1"; bump to drop every cached answer)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from . import client_registry
+from .query_embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_TTL_SECONDS = int(os.getenv('ANSWER_CACHE_TTL_SECONDS', '1800'))
+PROMPT_VERSION = os.getenv('ANSWER_PROMPT_VERSION', '1')
+GENERATION_KEY = 'vea:index:gen'
+KEY_PREFIX = 'vea:rag:v2'
+
+# Palabras (ya normalizadas, sin acentos) cuya respuesta depende de la hora actual;
+# "¿a qué hora empieza?" es un horario de los documentos y sí se cachea
+_TIME_SENSITIVE = re.compile(
+    r'\b(hora es|ahora|ya|aun|todavia|falta|faltan|empezo|comenzo|acabo|termino)\b'
+)
+# Preguntas sobre el propio usuario: la respuesta depende de su conversación
+_PERSONAL = re.compile(r'\b(me llamo|mi nombre|soy|mi|mis|tengo|anos)\b')
+# Seguimientos: conectores al inicio, referencias a lo anterior o solo un interrogativo
+_FOLLOW_UP = re.compile(
+    r'^(y|e|o|pero|entonces|tambien|ademas)\b'
+    r'|\b(eso|esa|ese|esos|esas|esto|anterior|mismo|misma|dicho|dicha)\b'
+    r'|^(que|cual|cuales|cuando|donde|como|quien|por que|cuanto|cuanta|cuantos|cuantas)$'
+)
+
+
+def _local_time_bucket() -> str:
+    """Local date plus the index of the TTL-sized window of the day."""
+    try:
+        import pytz
+        now = datetime.now(pytz.timezone('America/Mexico_City'))
+    except Exception:
+        now = datetime.now(timezone.utc)
+    seconds = now.hour * 3600 + now.minute * 60 + now.second
+    return f"{now.strftime('%Y-%m-%d')}:{seconds // max(CACHE_TTL_SECONDS, 1)}"
+
+
+def prompt_version(system_prompt: str, deployment: Optional[str]) -> str:
+    """Changes with the system prompt, the chat deployment and the local time bucket."""
+    signature = '|'.join([PROMPT_VERSION, system_prompt or '', deployment or '', _local_time_bucket()])
+    return hashlib.sha256(signature.encode('utf-8')).hexdigest()[:16]
+
+
+def is_time_sensitive(question: str) -> bool:
+    """True if the answer depends on the current time, not only on the documents."""
+    return bool(_TIME_SENSITIVE.search(normalize_query(question)))
+
+
+def is_cacheable_question(question: str) -> bool:
+    """Standalone question whose answer depends only on the documents (see module docstring)."""
+    normalized = normalize_query(question)
+    return bool(normalized) and not (
+        _PERSONAL.search(normalized) or _FOLLOW_UP.search(normalized) or _TIME_SENSITIVE.search(normalized)
+    )
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _redis_client():
+    """Pooled Redis client, or (None, None) when the cache is off or Redis is not configured."""
+    redis_url = os.getenv('REDIS_URL') or os.getenv('AZURE_REDIS_URL')
+    if not CACHE_ENABLED or not redis_url:
+        return None, None
+    client, name, _ = client_registry.get_redis_client(redis_url)
+    return client, name
+
+
+class AnswerCacheContext:
+    """Lookup result for one message, bound to the generation read before searching."""
+
+    def __init__(self, question: str, version: Optional[str], generation: Optional[str] = None,
+                 answer: Optional[str] = None, client=None, client_name: Optional[str] = None):
+        self.question = normalize_query(question)
+        self.version = version
+        self.generation = generation
+        self.answer = answer
+        self._client = client
+        self._client_name = client_name
+
+    @property
+    def enabled(self) -> bool:
+        return self._client is not None and self.generation is not None and bool(self.version)
+
+    def store(self, doc_ids: List[str], answer: str) -> bool:
+        """Stores the reply under the generation read by lookup()."""
+        if not self.enabled or not doc_ids or not answer:
+            return False
+        entry = {
+            'generation': self.generation,
+            'version': self.version,
+            'doc_ids': sorted(doc_ids),
+            'answer': answer,
+        }
+        try:
+            self._client.setex(_entry_key(self.question), CACHE_TTL_SECONDS, json.dumps(entry))
+        except Exception as e:
+            client_registry.report_failure(self._client_name)
+            logger.warning(f"[ANSWER-CACHE] Redis set failed: {e}")
+            return False
+        client_registry.report_success(self._client_name)
+        return True
+
+
+def _entry_key(normalized_question: str) -> str:
+    return f"{KEY_PREFIX}:ans:{_digest(normalized_question)}"
+
+
+def lookup(question: str, version: str) -> AnswerCacheContext:
+    """
+    Reads the index generation and the cached entry in one MGET.
+
+    The context is disabled if the question is not cacheable or Redis is
+    unavailable; ``answer`` is set only on a hit for the current generation
+    and prompt version.
+    """
+    if not is_cacheable_question(question):
+        return AnswerCacheContext(question, None)
+    client, name = None, None
+    try:
+        client, name = _redis_client()
+        if client is None:
+            return AnswerCacheContext(question, None)
+        generation, raw_entry = client.mget([GENERATION_KEY, _entry_key(normalize_query(question))])
+    except Exception as e:
+        if name:
+            client_registry.report_failure(name)
+        logger.warning(f"[ANSWER-CACHE] Redis get failed: {e}")
+        return AnswerCacheContext(question, None)
+    client_registry.report_success(name)
+
+    generation = str(generation or '0')
+    answer = None
+    if raw_entry:
+        try:
+            entry = json.loads(raw_entry)
+        except (TypeError, ValueError):
+            entry = {}
+        if entry.get('generation') == generation and entry.get('version') == version:
+            answer = entry.get('answer') or None
+    return AnswerCacheContext(question, version, generation, answer, client, name)
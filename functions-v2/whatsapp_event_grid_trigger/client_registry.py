@@ -0,0 +1,277 @@
+"""
+Client registry for the v2 WhatsApp function.
+
+Azure OpenAI, Azure Search, Blob and Redis clients are created lazily once per worker
+and reused across invocations, so warm messages skip TCP/TLS handshakes.
+All OpenAI clients share one httpx keep-alive pool. Clients are recycled when
+they exceed a maximum age or accumulate consecutive failures; an OpenAI client
+recycled after failures also retires the shared pool (and the other OpenAI
+clients bound to it), since stale sockets live in the pool. A recycled client
+is only dropped from the registry: other threads (parallel retrieval) may still
+be using it, so it is closed once it has been retired for
+CLIENT_CLOSE_GRACE_SECONDS, checked on every client lookup (not only on the
+next recycle, so the last retired client of each kind is closed too).
+
+Environment:
+    HTTP_MAX_CONNECTIONS (default 20)
+    HTTP_MAX_KEEPALIVE_CONNECTIONS (default 10)
+    HTTP_KEEPALIVE_EXPIRY_SECONDS (default 60)
+    HTTP_TIMEOUT_SECONDS / HTTP_CONNECT_TIMEOUT_SECONDS (default 30 / 10)
+    CLIENT_MAX_AGE_SECONDS (default 1800)
+    CLIENT_MAX_FAILURES (default 3)
+    CLIENT_CLOSE_GRACE_SECONDS (default 120)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLIENT_MAX_AGE_SECONDS = int(os.getenv('CLIENT_MAX_AGE_SECONDS', '1800'))
+CLIENT_MAX_FAILURES = int(os.getenv('CLIENT_MAX_FAILURES', '3'))
+CLIENT_CLOSE_GRACE_SECONDS = int(os.getenv('CLIENT_CLOSE_GRACE_SECONDS', '120'))
+
+
+class _ClientEntry:
+    """Registry slot: the client plus its health bookkeeping."""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.failures = 0
+
+
+_lock = threading.RLock()
+_entries: Dict[str, _ClientEntry] = {}
+# Clientes reciclados pendientes de cerrar: (name, client, retired_at)
+_retired: List[Tuple[str, Any, float]] = []
+# Momento (monotonic) en que vence el primer cliente retirado; evita tomar el lock en cada lookup
+_next_close_at = float('inf')
+
+
+def _key(*parts: Optional[str]) -> str:
+    """Registry key; secrets are hashed so they never appear in logs."""
+    return hashlib.sha256('|'.join(p or '' for p in parts).encode('utf-8')).hexdigest()[:16]
+
+
+def _expired(name: str, entry: _ClientEntry) -> bool:
+    """The shared httpx pool is long-lived (keepalive_expiry prunes idle sockets)."""
+    if name.startswith('http:'):
+        return False
+    return time.monotonic() - entry.created_at >= CLIENT_MAX_AGE_SECONDS
+
+
+def _close(name: str, client: Any) -> None:
+    """Close SDK clients that own their transport; OpenAI clients share the httpx pool."""
+    if not name.startswith(('search:', 'blob:', 'redis:', 'http:')):
+        return
+    close = getattr(client, 'close', None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"[CLIENTS] Error closing client: {e}")
+
+
+def _close_retired(now: float) -> None:
+    """Close the clients retired more than CLIENT_CLOSE_GRACE_SECONDS ago. Call with _lock held."""
+    global _next_close_at
+    pending = []
+    for retired_name, retired_client, retired_at in _retired:
+        if now - retired_at >= CLIENT_CLOSE_GRACE_SECONDS:
+            _close(retired_name, retired_client)
+        else:
+            pending.append((retired_name, retired_client, retired_at))
+    _retired[:] = pending
+    _next_close_at = min((retired_at for _, _, retired_at in pending), default=float('inf')) + CLIENT_CLOSE_GRACE_SECONDS
+
+
+def _retire(name: str, client: Any) -> None:
+    """
+    Drop a client without closing it (in-flight calls keep working); it is
+    closed by a later lookup once the grace period is over. Call with _lock held.
+    """
+    now = time.monotonic()
+    _retired.append((name, client, now))
+    _close_retired(now)
+
+
+def _acquire(name: str, factory: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Return the cached client for ``name`` or build it with ``factory``.
+
+    Returns:
+        (client, cold) where cold is True if the client was created by this call
+    """
+    if time.monotonic() >= _next_close_at:
+        with _lock:
+            _close_retired(time.monotonic())
+
+    entry = _entries.get(name)
+    if entry is not None and not _expired(name, entry):
+        return entry.client, False
+
+    with _lock:
+        entry = _entries.get(name)
+        if entry is not None and not _expired(name, entry):
+            return entry.client, False
+        if entry is not None:
+            logger.info(f"[CLIENTS] Recycling {name.split(':')[0]} client (max age reached)")
+            _retire(name, entry.client)
+
+        start = time.perf_counter()
+        client = factory()
+        _entries[name] = _ClientEntry(client)
+        logger.info(
+            f"[CLIENTS] Created {name.split(':')[0]} client in "
+            f"{int((time.perf_counter() - start) * 1000)}ms"
+        )
+        return client, True
+
+
+def report_success(name: str) -> None:
+    """Reset the failure counter of a client after a successful call."""
+    entry = _entries.get(name)
+    if entry is not None:
+        entry.failures = 0
+
+
+def report_failure(name: str) -> None:
+    """
+    Record a failed call; after CLIENT_MAX_FAILURES consecutive failures the
+    client is dropped and rebuilt on next use (stale pools, rotated keys, DNS).
+    """
+    with _lock:
+        entry = _entries.get(name)
+        if entry is None:
+            return
+        entry.failures += 1
+        if entry.failures >= CLIENT_MAX_FAILURES:
+            logger.warning(f"[CLIENTS] Recycling {name.split(':')[0]} client after {entry.failures} failures")
+            _entries.pop(name, None)
+            _retire(name, entry.client)
+            if name.startswith('openai:'):
+                _retire_http_pool()
+
+
+def _retire_http_pool() -> None:
+    """
+    Retire the shared httpx pool and every OpenAI client bound to it, so the
+    next lookup builds a fresh pool; the old one is closed after the grace
+    period like any other retired client. Call with _lock held.
+    """
+    for name in [n for n in _entries if n.startswith(('http:', 'openai:'))]:
+        _retire(name, _entries.pop(name).client)
+
+
+def get_http_client():
+    """Shared httpx client with a keep-alive pool, used by every OpenAI client."""
+    def _factory():
+        import httpx
+        return httpx.Client(
+            timeout=httpx.Timeout(
+                float(os.getenv('HTTP_TIMEOUT_SECONDS', '30')),
+                connect=float(os.getenv('HTTP_CONNECT_TIMEOUT_SECONDS', '10'))
+            ),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '20')),
+                max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '10')),
+                keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY_SECONDS', '60'))
+            )
+        )
+
+    client, _ = _acquire('http:shared', _factory)
+    return client
+
+
+def get_openai_client(endpoint: str, api_key: str, api_version: str) -> Tuple[Any, str, bool]:
+    """
+    Pooled AzureOpenAI client for the given endpoint/key/version.
+
+    Returns:
+        (client, registry_name, cold)
+    """
+    name = f"openai:{_key(endpoint, api_key, api_version)}"
+
+    def _factory():
+        from openai import AzureOpenAI
+        return AzureOpenAI(
+            azure_endpoint=endpoint,
+            api_key=api_key,
+            api_version=api_version,
+            http_client=get_http_client()
+        )
+
+    client, cold = _acquire(name, _factory)
+    return client, name, cold
+
+
+def get_search_client(endpoint: str, index_name: str, api_key: str) -> Tuple[Any, str, bool]:
+    """
+    Pooled Azure Search client (its transport keeps its own keep-alive session).
+
+    Returns:
+        (client, registry_name, cold)
+    """
+    name = f"search:{_key(endpoint, index_name, api_key)}"
+
+    def _factory():
+        from azure.core.credentials import AzureKeyCredential
+        from azure.search.documents import SearchClient
+        return SearchClient(
+            endpoint=endpoint,
+            index_name=index_name,
+            credential=AzureKeyCredential(api_key)
+        )
+
+    client, cold = _acquire(name, _factory)
+    return client, name, cold
+
+
+def get_blob_service_client(connection_string: str) -> Tuple[Any, str, bool]:
+    """
+    Pooled BlobServiceClient for conversation history.
+
+    Returns:
+        (client, registry_name, cold)
+    """
+    name = f"blob:{_key(connection_string)}"
+
+    def _factory():
+        from azure.storage.blob import BlobServiceClient
+        return BlobServiceClient.from_connection_string(connection_string)
+
+    client, cold = _acquire(name, _factory)
+    return client, name, cold
+
+
+def get_redis_client(redis_url: str) -> Tuple[Any, str, bool]:
+    """
+    Pooled Redis client (redis-py keeps its own connection pool).
+
+    Returns:
+        (client, registry_name, cold)
+    """
+    name = f"redis:{_key(redis_url)}"
+
+    def _factory():
+        import redis
+        from urllib.parse import urlparse
+        ssl_config = {}
+        if urlparse(redis_url).scheme == 'rediss':
+            ssl_config = {'ssl_cert_reqs': None}
+        return redis.from_url(
+            redis_url,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            health_check_interval=30,
+            **ssl_config
+        )
+
+    client, cold = _acquire(name, _factory)
+    return client, name, cold
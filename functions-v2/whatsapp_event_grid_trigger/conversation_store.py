@@ -0,0 +1,293 @@
+"""
+Conversation history stores for the v2 WhatsApp function.
+
+- RedisConversationStore: one Redis list per user. A read is a single LRANGE.
+  An append is a single MULTI pipeline (RPUSH + LTRIM + EXPIRE + LRANGE), so
+  concurrent messages from the same user append instead of overwriting.
+- BlobConversationStore: the previous JSON blob format
+  (conversations/<phone>.json). Writes are conditional on the ETag read
+  earlier in the request and retry on conflict instead of blindly overwriting.
+- TieredConversationStore: Redis is the hot tier and the blob is the cold tier.
+  A Redis miss is filled from the blob (atomic seed, first writer wins). An
+  append writes the updated window to the blob without reading it only when
+  the Redis list is known to be complete; otherwise (seed failed, history load
+  timed out, key evicted) the turn goes through the blob's ETag append and the
+  resulting window is copied back to Redis, so the blob is never truncated.
+
+Environment:
+    CONVERSATION_STORE: auto | redis | blob (default auto)
+    CONVERSATION_MAX_MESSAGES (default 10)
+    CONVERSATION_TTL_SECONDS (default 604800)
+    REDIS_URL / AZURE_REDIS_URL
+    AZURE_STORAGE_CONNECTION_STRING, AZURE_STORAGE_DOCUMENTS_CONTAINER
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from . import client_registry
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGES = int(os.getenv('CONVERSATION_MAX_MESSAGES', '10'))
+TTL_SECONDS = int(os.getenv('CONVERSATION_TTL_SECONDS', str(7 * 24 * 3600)))
+BLOB_WRITE_RETRIES = 3
+
+
+def clean_phone_number(phone_number: str) -> str:
+    """Remove formatting characters from a phone number (same rule as before)."""
+    return (
+        phone_number.replace('+', '').replace('-', '').replace(' ', '')
+        .replace('(', '').replace(')', '').replace('[', '').replace(']', '')
+    )
+
+
+def build_turn(user_message: str, bot_response: str) -> List[Dict[str, str]]:
+    """Messages appended for one user/assistant turn."""
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        {"role": "user", "content": user_message, "timestamp": now},
+        {"role": "assistant", "content": bot_response, "timestamp": now},
+    ]
+
+
+class ConversationSnapshot:
+    """History read at the start of a request, reused when appending the reply."""
+
+    def __init__(self, messages: List[Dict[str, str]], etag: Optional[str] = None, found: bool = False,
+                 tier: Optional[str] = None):
+        self.messages = messages
+        self.etag = etag
+        self.found = found
+        self.tier = tier
+
+
+class BlobConversationStore:
+    """JSON blob per user with ETag-conditional writes."""
+
+    name = 'blob'
+
+    def __init__(self, connection_string: str, container_name: str):
+        self.connection_string = connection_string
+        self.container_name = container_name
+
+    def _blob_client(self, clean_phone: str):
+        blob_service, _, _ = client_registry.get_blob_service_client(self.connection_string)
+        return blob_service.get_blob_client(
+            container=self.container_name,
+            blob=f"conversations/{clean_phone}.json"
+        )
+
+    def load(self, clean_phone: str) -> ConversationSnapshot:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            # Una sola petición: download (404 si no existe) en lugar de exists() + download
+            downloader = self._blob_client(clean_phone).download_blob(timeout=10)
+            data = downloader.readall()
+        except ResourceNotFoundError:
+            return ConversationSnapshot([], None, False, tier=self.name)
+        history = json.loads(data.decode('utf-8'))
+        return ConversationSnapshot(history.get("messages", []), downloader.properties.etag, True, tier=self.name)
+
+    def _write(self, clean_phone: str, messages: List[Dict[str, str]], snapshot: Optional[ConversationSnapshot]) -> None:
+        from azure.core import MatchConditions
+
+        payload = json.dumps({
+            "phone_number": clean_phone,
+            "messages": messages,
+            "last_modified": datetime.now(timezone.utc).isoformat()
+        }, ensure_ascii=False)
+        blob_client = self._blob_client(clean_phone)
+        if snapshot is None:
+            blob_client.upload_blob(payload, overwrite=True, timeout=10)
+        elif snapshot.found:
+            blob_client.upload_blob(
+                payload, overwrite=True, etag=snapshot.etag,
+                match_condition=MatchConditions.IfNotModified, timeout=10
+            )
+        else:
+            # Si no existía al leer, solo crear (falla si otro mensaje lo creó antes)
+            blob_client.upload_blob(payload, overwrite=False, timeout=10)
+
+    def append(self, clean_phone: str, new_messages: List[Dict[str, str]],
+               snapshot: Optional[ConversationSnapshot] = None) -> List[Dict[str, str]]:
+        from azure.core.exceptions import ResourceExistsError, ResourceModifiedError
+
+        for attempt in range(BLOB_WRITE_RETRIES):
+            if snapshot is None:
+                snapshot = self.load(clean_phone)
+            messages = (snapshot.messages + new_messages)[-MAX_MESSAGES:]
+            try:
+                self._write(clean_phone, messages, snapshot)
+                return messages
+            except (ResourceModifiedError, ResourceExistsError):
+                # Otro mensaje del mismo usuario escribió en medio: releer y reintentar
+                logger.info(f"[HISTORY] Concurrent update for {clean_phone}, retrying ({attempt + 1})")
+                snapshot = None
+        raise RuntimeError(f"Could not update conversation for {clean_phone} after {BLOB_WRITE_RETRIES} attempts")
+
+    def replace(self, clean_phone: str, messages: List[Dict[str, str]]) -> None:
+        """Write the full window as-is (used by the tiered store, Redis is authoritative)."""
+        self._write(clean_phone, messages[-MAX_MESSAGES:], None)
+
+
+class RedisConversationStore:
+    """Redis list per user, trimmed to the last MAX_MESSAGES, with TTL."""
+
+    name = 'redis'
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+
+    def _client(self):
+        client, _, _ = client_registry.get_redis_client(self.redis_url)
+        return client
+
+    @staticmethod
+    def _key(clean_phone: str) -> str:
+        return f"vea:conv:{clean_phone}"
+
+    def load(self, clean_phone: str) -> ConversationSnapshot:
+        raw = self._client().lrange(self._key(clean_phone), -MAX_MESSAGES, -1)
+        messages = [json.loads(item) for item in raw]
+        return ConversationSnapshot(messages, None, bool(messages), tier=self.name)
+
+    def append(self, clean_phone: str, new_messages: List[Dict[str, str]],
+               snapshot: Optional[ConversationSnapshot] = None) -> List[Dict[str, str]]:
+        key = self._key(clean_phone)
+        pipe = self._client().pipeline(transaction=True)
+        pipe.rpush(key, *[json.dumps(m, ensure_ascii=False) for m in new_messages])
+        pipe.ltrim(key, -MAX_MESSAGES, -1)
+        pipe.expire(key, TTL_SECONDS)
+        pipe.lrange(key, -MAX_MESSAGES, -1)
+        results = pipe.execute()
+        return [json.loads(item) for item in results[-1]]
+
+    # EXISTS + RPUSH + EXPIRE en el servidor: dos primeros mensajes concurrentes no siembran dos veces
+    _SEED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('RPUSH', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+    def seed(self, clean_phone: str, messages: List[Dict[str, str]]) -> bool:
+        """
+        Fill an empty Redis list from the cold tier, atomically.
+
+        Returns:
+            True if this call seeded the list (False if it already existed or there is nothing to seed)
+        """
+        if not messages:
+            return False
+        payload = [json.dumps(m, ensure_ascii=False) for m in messages[-MAX_MESSAGES:]]
+        return bool(self._client().eval(self._SEED_SCRIPT, 1, self._key(clean_phone), TTL_SECONDS, *payload))
+
+    def replace(self, clean_phone: str, messages: List[Dict[str, str]]) -> None:
+        """Overwrite the list with a window read from the cold tier (repairs an incomplete list)."""
+        key = self._key(clean_phone)
+        pipe = self._client().pipeline(transaction=True)
+        pipe.delete(key)
+        if messages:
+            pipe.rpush(key, *[json.dumps(m, ensure_ascii=False) for m in messages[-MAX_MESSAGES:]])
+            pipe.expire(key, TTL_SECONDS)
+        pipe.execute()
+
+
+class TieredConversationStore:
+    """Redis hot tier with the blob as cold tier."""
+
+    name = 'redis+blob'
+
+    def __init__(self, hot: RedisConversationStore, cold: BlobConversationStore):
+        self.hot = hot
+        self.cold = cold
+
+    def load(self, clean_phone: str) -> ConversationSnapshot:
+        try:
+            snapshot = self.hot.load(clean_phone)
+            if snapshot.found:
+                return snapshot
+        except Exception as e:
+            logger.warning(f"[HISTORY] Redis read failed, using blob: {e}")
+            return self.cold.load(clean_phone)
+
+        snapshot = self.cold.load(clean_phone)
+        try:
+            self.hot.seed(clean_phone, snapshot.messages)
+        except Exception as e:
+            logger.warning(f"[HISTORY] Could not seed Redis from blob: {e}")
+        return snapshot
+
+    def append(self, clean_phone: str, new_messages: List[Dict[str, str]],
+               snapshot: Optional[ConversationSnapshot] = None) -> List[Dict[str, str]]:
+        # Solo un snapshot leído del blob sirve como ETag para el append en frío
+        cold_snapshot = snapshot if snapshot is not None and snapshot.tier == self.cold.name else None
+        try:
+            messages = self.hot.append(clean_phone, new_messages, snapshot)
+        except Exception as e:
+            logger.warning(f"[HISTORY] Redis append failed, using blob: {e}")
+            return self.cold.append(clean_phone, new_messages, cold_snapshot)
+
+        # La lista de Redis está completa si contiene todo lo leído al inicio más el turno nuevo;
+        # sin snapshot (timeout del historial) no se puede saber
+        expected = min(MAX_MESSAGES, len(snapshot.messages) + len(new_messages)) if snapshot is not None else None
+        if expected is not None and len(messages) >= expected:
+            try:
+                self.cold.replace(clean_phone, messages)
+            except Exception as e:
+                logger.warning(f"[HISTORY] Blob cold-tier write failed (Redis is up to date): {e}")
+            return messages
+
+        # Redis incompleto (seed fallido, clave expulsada o historial sin leer): nunca
+        # sobrescribir el blob con él; append con ETag y reparar Redis con el resultado
+        logger.info(f"[HISTORY] Redis list incomplete for {clean_phone}, appending to blob")
+        try:
+            messages = self.cold.append(clean_phone, new_messages, cold_snapshot)
+        except Exception as e:
+            logger.warning(f"[HISTORY] Blob append failed (Redis has the new turn only): {e}")
+            return messages
+        try:
+            self.hot.replace(clean_phone, messages)
+        except Exception as e:
+            logger.warning(f"[HISTORY] Could not repair Redis from blob: {e}")
+        return messages
+
+
+_store: Optional[Any] = None
+_store_configured = False
+
+
+def get_conversation_store():
+    """
+    Build the configured store once per worker.
+
+    Returns:
+        A store instance, or None if neither Redis nor Blob Storage is configured
+    """
+    global _store, _store_configured
+    if _store_configured:
+        return _store
+
+    mode = os.getenv('CONVERSATION_STORE', 'auto').lower()
+    redis_url = os.getenv('REDIS_URL') or os.getenv('AZURE_REDIS_URL')
+    connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+    container_name = os.getenv('AZURE_STORAGE_DOCUMENTS_CONTAINER', 'documents')
+
+    hot = RedisConversationStore(redis_url) if redis_url and mode in ('auto', 'redis') else None
+    cold = BlobConversationStore(connection_string, container_name) if connection_string and mode in ('auto', 'blob', 'redis') else None
+
+    if hot and cold:
+        _store = TieredConversationStore(hot, cold)
+    else:
+        _store = hot or cold
+
+    _store_configured = True
+    logger.info(f"[HISTORY] Conversation store: {getattr(_store, 'name', 'disabled')}")
+    return _store
@@ -0,0 +1,86 @@
+"""
+Hybrid (BM25 + vector) search for the v2 WhatsApp function.
+
+Mirrors utilities/hybrid_search.py in the web app (this package is deployed
+on its own). One request carries ``search_text`` and ``vector_queries``; the
+service fuses both rankings with Reciprocal Rank Fusion, so exact matches
+(CLABE, names, dates) surface without a second round trip. Optional semantic
+rerank on top.
+
+Environment:
+    AZURE_SEARCH_HYBRID_ENABLED (default "true")
+    AZURE_SEARCH_HYBRID_VECTOR_WEIGHT (default 1.0; needs azure-search-documents>=11.6)
+    AZURE_SEARCH_HYBRID_SEMANTIC_RERANK (default "false")
+    AZURE_SEARCH_SEMANTIC_CONFIG (default "default")
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def is_hybrid_enabled() -> bool:
+    return os.getenv('AZURE_SEARCH_HYBRID_ENABLED', 'true').lower() == 'true'
+
+
+def _vector_weight() -> float:
+    try:
+        weight = float(os.getenv('AZURE_SEARCH_HYBRID_VECTOR_WEIGHT', '1.0'))
+    except ValueError:
+        return 1.0
+    return weight if weight > 0 else 1.0
+
+
+def build_search_options(query_text: str,
+                         query_vector: List[float],
+                         top_k: int,
+                         select: List[str],
+                         filter_query: Optional[str] = None) -> Dict[str, Any]:
+    """search() kwargs: hybrid when enabled, vector-only otherwise."""
+    vector_query: Dict[str, Any] = {
+        "vector": query_vector,
+        "fields": "embedding",
+        "k": top_k,
+        "kind": "vector",
+    }
+    options: Dict[str, Any] = {
+        "search_text": "",
+        "vector_queries": [vector_query],
+        "select": select,
+        "top": top_k,
+    }
+    if filter_query:
+        options["filter"] = filter_query
+    if not is_hybrid_enabled():
+        return options
+
+    options["search_text"] = query_text
+    weight = _vector_weight()
+    if weight != 1.0:
+        vector_query["weight"] = weight
+    semantic_config = os.getenv('AZURE_SEARCH_SEMANTIC_CONFIG', 'default')
+    if os.getenv('AZURE_SEARCH_HYBRID_SEMANTIC_RERANK', 'false').lower() == 'true' and semantic_config:
+        options["query_type"] = "semantic"
+        options["semantic_configuration_name"] = semantic_config
+    return options
+
+
+def run_search(search_client, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Runs the search, degrading semantic -> hybrid -> vector-only on errors."""
+    try:
+        return list(search_client.search(**options))
+    except Exception as e:
+        error = e
+        if options.get("query_type") == "semantic":
+            logger.warning(f"[HYBRID] Semantic rerank unavailable, retrying without it: {e}")
+            options = {k: v for k, v in options.items() if k not in ("query_type", "semantic_configuration_name")}
+            try:
+                return list(search_client.search(**options))
+            except Exception as e_hybrid:
+                error = e_hybrid
+        if not options.get("search_text"):
+            raise error
+        logger.warning(f"[HYBRID] Hybrid search failed, falling back to vector-only: {error}")
+        return list(search_client.search(**{**options, "search_text": ""}))
@@ -0,0 +1,233 @@
+"""
+Query embedding cache for the v2 WhatsApp function's RAG path.
+
+FAQ-style messages ("horarios", "cómo donar") repeat constantly, and each one
+used to pay an Azure OpenAI embeddings call. Embeddings are cached under the
+normalized query text (case, accents, spacing and surrounding punctuation
+folded) and the embedding deployment:
+
+- L1: in-process LRU with TTL, shared by the invocations of a worker.
+- L2: Redis (optional), shared by all workers. Values are base64 float32 so
+  they fit the pooled decode_responses client from client_registry.
+
+Every lookup updates per-worker stats (hit rate and milliseconds saved, where a
+hit saves the moving average latency of the misses) that are reported with the
+rag.search telemetry event.
+
+Environment:
+    QUERY_EMBEDDING_CACHE_ENABLED (default "true")
+    QUERY_EMBEDDING_CACHE_SIZE (default 512 entries)
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS (default 86400)
+    QUERY_EMBEDDING_CACHE_REDIS (default "true"; needs REDIS_URL / AZURE_REDIS_URL)
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import client_registry
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv('QUERY_EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '512'))
+CACHE_TTL_SECONDS = int(os.getenv('QUERY_EMBEDDING_CACHE_TTL_SECONDS', str(24 * 3600)))
+REDIS_ENABLED = os.getenv('QUERY_EMBEDDING_CACHE_REDIS', 'true').lower() == 'true'
+KEY_PREFIX = 'vea:qemb:v1'
+
+_EDGE_PUNCTUATION = '¿?¡!.,;:"\'()[] '
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """Cache key text: lowercase, no accents, single spaces, no surrounding punctuation."""
+    folded = unicodedata.normalize('NFKD', (text or '').lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(' ', folded).strip(_EDGE_PUNCTUATION)
+
+
+def cache_key(text: str, deployment: str) -> str:
+    digest = hashlib.sha256(normalize_query(text).encode('utf-8')).hexdigest()
+    return f"{KEY_PREFIX}:{deployment}:{digest}"
+
+
+def _encode(embedding: List[float]) -> str:
+    return base64.b64encode(struct.pack(f'<{len(embedding)}f', *embedding)).decode('ascii')
+
+
+def _decode(raw: str) -> Optional[List[float]]:
+    try:
+        data = base64.b64decode(raw)
+        return list(struct.unpack(f'<{len(data) // 4}f', data)) if data and len(data) % 4 == 0 else None
+    except Exception:
+        return None
+
+
+class _LRUCache:
+    """Thread-safe LRU with per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Tuple[float, Tuple[float, ...]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(value)
+
+    def set(self, key: str, value: List[float]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, tuple(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _Stats:
+    """Per-worker hit/miss counters and saved time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.l1_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self.avg_miss_ms = 0.0
+
+    def record_hit(self, tier: str) -> float:
+        with self._lock:
+            if tier == 'l1':
+                self.l1_hits += 1
+            else:
+                self.redis_hits += 1
+            self.saved_ms += self.avg_miss_ms
+            return self.avg_miss_ms
+
+    def record_miss(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.misses += 1
+            # Media móvil de la latencia del endpoint de embeddings
+            self.avg_miss_ms = elapsed_ms if self.misses == 1 else 0.9 * self.avg_miss_ms + 0.1 * elapsed_ms
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.l1_hits + self.redis_hits + self.misses
+        return (self.l1_hits + self.redis_hits) / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'l1_hits': self.l1_hits,
+            'redis_hits': self.redis_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 4),
+            'saved_ms_total': round(self.saved_ms, 1),
+        }
+
+
+_l1 = _LRUCache(CACHE_SIZE, CACHE_TTL_SECONDS)
+stats = _Stats()
+
+
+def _redis_client():
+    """Pooled Redis client, or None when Redis is not configured for this cache."""
+    redis_url = os.getenv('REDIS_URL') or os.getenv('AZURE_REDIS_URL')
+    if not REDIS_ENABLED or not redis_url:
+        return None, None
+    client, name, _ = client_registry.get_redis_client(redis_url)
+    return client, name
+
+
+def _redis_get(key: str) -> Optional[List[float]]:
+    client, name = _redis_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(key)
+    except Exception as e:
+        client_registry.report_failure(name)
+        logger.warning(f"[EMB-CACHE] Redis get failed: {e}")
+        return None
+    client_registry.report_success(name)
+    return _decode(raw) if raw else None
+
+
+def _redis_set(key: str, embedding: List[float]) -> None:
+    client, name = _redis_client()
+    if client is None:
+        return
+    try:
+        client.setex(key, CACHE_TTL_SECONDS, _encode(embedding))
+        client_registry.report_success(name)
+    except Exception as e:
+        client_registry.report_failure(name)
+        logger.warning(f"[EMB-CACHE] Redis set failed: {e}")
+
+
+def get_query_embedding(query: str,
+                        deployment: str,
+                        compute: Callable[[str], List[float]]) -> Tuple[List[float], Dict[str, Any]]:
+    """
+    Embedding for ``query``, from the cache when possible.
+
+    Args:
+        query: User's query (the original text is embedded on a miss)
+        deployment: Embedding deployment (part of the key)
+        compute: Function that calls the embeddings endpoint
+
+    Returns:
+        (embedding, info) where info has 'cache' ('l1' | 'redis' | 'miss' | 'disabled'),
+        'ms_saved' for this lookup and the worker's 'hit_rate'
+    """
+    if not CACHE_ENABLED:
+        return compute(query), {'cache': 'disabled', 'ms_saved': 0.0, 'hit_rate': 0.0}
+
+    key = cache_key(query, deployment)
+    embedding = _l1.get(key)
+    tier = 'l1'
+    if embedding is None:
+        embedding = _redis_get(key)
+        tier = 'redis'
+        if embedding is not None:
+            _l1.set(key, embedding)
+
+    if embedding is not None:
+        ms_saved = stats.record_hit(tier)
+        return embedding, {'cache': tier, 'ms_saved': round(ms_saved, 1), 'hit_rate': round(stats.hit_rate, 4)}
+
+    start = time.perf_counter()
+    embedding = compute(query)
+    stats.record_miss((time.perf_counter() - start) * 1000)
+    if embedding:
+        _l1.set(key, embedding)
+        _redis_set(key, embedding)
+    return embedding, {'cache': 'miss', 'ms_saved': 0.0, 'hit_rate': round(stats.hit_rate, 4)}
+
+
+def clear() -> None:
+    """Drop the in-process entries and reset stats (Redis entries expire by TTL)."""
+    _l1.clear()
+    stats.reset()
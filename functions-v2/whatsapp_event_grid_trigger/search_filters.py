@@ -0,0 +1,62 @@
+"""
+OData source_type filters for the v2 WhatsApp function.
+
+Mirrors utilities/search_filters.py in the web app (this package is deployed
+on its own). Every index writer sets the filterable ``source_type`` field, so
+the RAG search can exclude contact/donation entries on the service side and
+k neighbors means k usable hits. Documents without source_type (not yet
+backfilled) pass the exclude filters.
+
+Environment:
+    AZURE_SEARCH_SOURCE_TYPE_FILTER (default "true")
+"""
+
+import os
+from typing import Iterable, Optional
+
+SOURCE_TYPE_CONTACT = "contact"
+SOURCE_TYPE_DONATION = "donation"
+
+CONTACT_KEYWORDS = ['contacto', 'teléfono', 'telefono', 'número', 'numero', 'llamar', 'comunicar', 'hablar', 'whatsapp']
+MINISTRY_KEYWORDS = ['ministerio', 'ministerios', 'qué ministerios', 'cuáles ministerios', 'quién trabaja', 'quien trabaja', 'quién es', 'quien es']
+DONATION_KEYWORDS = ['donación', 'donaciones', 'donar', 'diezmo', 'diezmos', 'ofrenda', 'ofrendas', 'dar', 'apoyo', 'apoyar']
+DONATION_EXTRA_KEYWORDS = ['cuenta', 'clabe', 'transferencia', 'bancario']
+
+
+def is_source_type_filter_enabled() -> bool:
+    return os.getenv('AZURE_SEARCH_SOURCE_TYPE_FILTER', 'true').lower() == 'true'
+
+
+def build_source_type_filter(include: Optional[Iterable[str]] = None,
+                             exclude: Optional[Iterable[str]] = None) -> Optional[str]:
+    """OData expression on source_type, or None when there is nothing to restrict."""
+    clauses = []
+    if include:
+        clauses.append(f"search.in(source_type, '{','.join(sorted(set(include)))}', ',')")
+    if exclude:
+        clauses.append(f"not search.in(source_type, '{','.join(sorted(set(exclude)))}', ',')")
+    return " and ".join(clauses) or None
+
+
+def excluded_source_types_for_query(query: str) -> set:
+    """Same intent rules the bot applied in Python: contacts only for contact/ministry
+    questions (never for donations), donations only for donation/bank questions."""
+    text = (query or "").lower()
+    is_contact = any(word in text for word in CONTACT_KEYWORDS)
+    is_ministry = any(word in text for word in MINISTRY_KEYWORDS)
+    is_donation = any(word in text for word in DONATION_KEYWORDS)
+    is_donation_full = is_donation or any(word in text for word in DONATION_EXTRA_KEYWORDS)
+
+    excluded = set()
+    if is_donation or not (is_contact or is_ministry):
+        excluded.add(SOURCE_TYPE_CONTACT)
+    if not is_donation_full:
+        excluded.add(SOURCE_TYPE_DONATION)
+    return excluded
+
+
+def source_type_filter_for_query(query: str) -> Optional[str]:
+    """Intent-based filter for the RAG search (None when disabled)."""
+    if not is_source_type_filter_enabled():
+        return None
+    return build_source_type_filter(exclude=excluded_source_types_for_query(query))
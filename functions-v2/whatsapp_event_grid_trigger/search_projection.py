@@ -0,0 +1,26 @@
+"""
+Search result projection profiles for the v2 WhatsApp function.
+
+Mirrors utilities/search_projection.py in the web app (this package is deployed
+on its own). Only the "debug" profile selects the ``embedding`` vector; the bot
+path uses "rag", so each hit carries just the fields the RAG context reads.
+
+Environment:
+    AZURE_SEARCH_SELECT_PROFILE (default "rag")
+"""
+
+import os
+from typing import Dict, List, Optional
+
+SEARCH_PROFILES: Dict[str, List[str]] = {
+    "rag": ["id", "content", "created_at"],
+    "admin": ["id", "title", "content", "metadata", "created_at"],
+    "debug": ["id", "title", "content", "metadata", "created_at", "embedding"],
+}
+DEFAULT_SEARCH_PROFILE = "rag"
+
+
+def get_select_fields(profile: Optional[str] = None) -> List[str]:
+    """Fields to select for a profile; unknown names fall back to "rag"."""
+    name = profile or os.getenv('AZURE_SEARCH_SELECT_PROFILE', DEFAULT_SEARCH_PROFILE)
+    return list(SEARCH_PROFILES.get(name, SEARCH_PROFILES[DEFAULT_SEARCH_PROFILE]))
@@ -0,0 +1,74 @@
+"""
+Telemetry for the v2 WhatsApp function.
+
+Mirrors the rag.search event of functions/telemetry.py (WhatsAppTelemetry) in
+this package, which is deployed on its own and cannot import the v1 module.
+Events go to Application Insights through opencensus-ext-azure when
+APPLICATIONINSIGHTS_CONNECTION_STRING is set, otherwise to the local log.
+
+Environment:
+    APPLICATIONINSIGHTS_CONNECTION_STRING
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WhatsAppTelemetry:
+    """Custom events (rag.search) with properties and measurements."""
+
+    def __init__(self):
+        self._events_logger: Optional[logging.Logger] = None
+        connection_string = os.getenv('APPLICATIONINSIGHTS_CONNECTION_STRING')
+        if not connection_string:
+            logger.info("Application Insights not configured, using local logging only")
+            return
+        try:
+            from opencensus.ext.azure.log_exporter import AzureLogHandler
+            events_logger = logging.getLogger(f"{__name__}.events")
+            events_logger.addHandler(AzureLogHandler(connection_string=connection_string))
+            events_logger.setLevel(logging.INFO)
+            events_logger.propagate = False
+            self._events_logger = events_logger
+        except ImportError:
+            logger.warning("OpenCensus not available, using local logging only")
+        except Exception as e:
+            logger.error(f"Failed to initialize Application Insights: {e}")
+
+    def track_event(self, name: str, properties: Dict[str, Any], measurements: Dict[str, float]) -> None:
+        if self._events_logger is None:
+            logger.info(f"{name}: {properties}, measurements: {measurements}")
+            return
+        try:
+            self._events_logger.info(name, extra={'custom_dimensions': {**properties, **measurements}})
+        except Exception as e:
+            logger.error(f"Failed to track event '{name}': {e}")
+
+    def track_rag_search(self, query: str, hits: int, duration_ms: float, success: bool = True,
+                         embedding_cache: Optional[str] = None,
+                         embedding_ms_saved: Optional[float] = None,
+                         embedding_cache_hit_rate: Optional[float] = None) -> None:
+        """Same properties and measurements as WhatsAppTelemetry.track_rag_search in v1."""
+        properties: Dict[str, Any] = {
+            'query': query[:100] + '...' if len(query) > 100 else query,
+            'hits': hits,
+            'success': success,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        if embedding_cache is not None:
+            properties['embedding_cache'] = embedding_cache
+
+        measurements: Dict[str, float] = {'duration_ms': duration_ms}
+        if embedding_ms_saved is not None:
+            measurements['embedding_ms_saved'] = embedding_ms_saved
+        if embedding_cache_hit_rate is not None:
+            measurements['embedding_cache_hit_rate'] = embedding_cache_hit_rate
+
+        self.track_event('rag.search', properties, measurements)
+
+
+telemetry = WhatsAppTelemetry()
@@ -53,7 +53,8 @@ class AzureSearchIntegration:
                 "id": f"doc_{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}",
                 "content": text,
                 "embedding": embedding,
-                "created_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+                "created_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "source_type": "document"
             }
             
             # Upload to Azure Search
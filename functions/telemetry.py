@@ -85,7 +85,10 @@ class WhatsAppTelemetry:
         else:
             logger.info(f"wa.reply: {properties}, measurements: {measurements}")
     
-    def track_rag_search(self, query: str, hits: int, duration_ms: float, success: bool = True) -> None:
+    def track_rag_search(self, query: str, hits: int, duration_ms: float, success: bool = True,
+                         embedding_cache: Optional[str] = None,
+                         embedding_ms_saved: Optional[float] = None,
+                         embedding_cache_hit_rate: Optional[float] = None) -> None:
         """
         Track RAG search operation.
         
@@ -94,6 +97,9 @@ class WhatsAppTelemetry:
             hits: Number of results found
             duration_ms: Time taken for search
             success: Whether search was successful
+            embedding_cache: Query embedding cache outcome (l1, redis, miss, disabled)
+            embedding_ms_saved: Milliseconds saved by the query embedding cache on this search
+            embedding_cache_hit_rate: Query embedding cache hit rate of the worker (0-1)
         """
         properties = {
             'query': query[:100] + '...' if len(query) > 100 else query,  # Truncate long queries
@@ -101,10 +107,16 @@ class WhatsAppTelemetry:
             'success': success,
             'timestamp': datetime.utcnow().isoformat()
         }
+        if embedding_cache is not None:
+            properties['embedding_cache'] = embedding_cache
         
         measurements = {
             'duration_ms': duration_ms
         }
+        if embedding_ms_saved is not None:
+            measurements['embedding_ms_saved'] = embedding_ms_saved
+        if embedding_cache_hit_rate is not None:
+            measurements['embedding_cache_hit_rate'] = embedding_cache_hit_rate
         
         if self.app_insights:
             self.app_insights.track_event('rag.search', properties, measurements)
@@ -163,6 +163,13 @@ echo "✓ Static files collected"
 # echo "Starting Celery worker..."
 # celery -A config worker --loglevel=info --detach
 
+# Indexing outbox worker (Eventos/Directorio/Donaciones) en segundo plano
+if [ "$INDEXING_OUTBOX_ENABLED" = "True" ]; then
+    echo "=== INDEXING OUTBOX WORKER START ==="
+    python3 manage.py process_indexing_outbox &
+    echo "✓ Indexing outbox worker started (PID $!)"
+fi
+
 # Gunicorn application startup
 echo "=== GUNICORN APPLICATION START ==="
 echo "Starting Django application with Gunicorn..."
@@ -0,0 +1,104 @@
+"""
+Microbenchmark de serialización para las subidas a Blob de las señales - VEA Connect
+
+Compara el flujo anterior (JSON a archivo temporal en el directorio de trabajo,
+reabrirlo para subir, reabrirlo para el ZIP y borrarlo) contra el flujo en memoria
+de utilities.azureblobstorage.serialize_json_with_legacy_zip.
+La subida se sustituye por un consumidor que lee todo el stream; no requiere Azure.
+
+Uso:
+    python scripts/benchmarks/bench_blob_serialization.py [--iterations 2000] [--description-size 2000]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+# Configurar Django para importar utilities.azureblobstorage
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.test')
+
+import django  # noqa: E402
+
+django.setup()
+
+from utilities.azureblobstorage import serialize_json_with_legacy_zip  # noqa: E402
+
+
+def _consume(data) -> int:
+    """Simula upload_blob: lee todo el contenido."""
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    data.seek(0)
+    return len(data.read())
+
+
+def _temp_file_path(payload: dict, json_blob_name: str, workdir: str, n: int) -> int:
+    """Flujo anterior de las señales de Eventos/Directorio."""
+    temp_path = os.path.join(workdir, f"temp_event_{n}.json")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    with open(temp_path, "rb") as data:
+        total = _consume(data)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        with open(temp_path, 'rb') as f:
+            zip_file.writestr(json_blob_name, f.read())
+    buffer.seek(0)
+    total += _consume(buffer)
+    os.remove(temp_path)
+    return total
+
+
+def _in_memory(payload: dict, json_blob_name: str) -> int:
+    """Flujo nuevo: un solo buffer para el JSON y el ZIP."""
+    json_bytes, zip_bytes = serialize_json_with_legacy_zip(payload, json_blob_name)
+    return _consume(json_bytes) + _consume(zip_bytes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON/ZIP para Blob")
+    parser.add_argument('--iterations', type=int, default=2000, help="Iteraciones por medición")
+    parser.add_argument('--description-size', type=int, default=2000, help="Caracteres de la descripción")
+    args = parser.parse_args()
+
+    payload = {
+        "id": 1,
+        "title": "Culto de jóvenes",
+        "description": ("Reunión semanal con alabanza y estudio. " * (args.description_size // 40 + 1))[:args.description_size],
+        "date": "2025-08-10",
+        "time": "18:00:00",
+        "location": "Templo principal",
+        "created_at": "2025-08-01T12:00:00+00:00",
+        "updated_at": "2025-08-02T12:00:00+00:00",
+    }
+    json_blob_name = "events/event_1.json"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        assert _temp_file_path(payload, json_blob_name, workdir, 0) == _in_memory(payload, json_blob_name)
+
+        start = time.perf_counter()
+        for n in range(args.iterations):
+            _temp_file_path(payload, json_blob_name, workdir, n)
+        temp_us = (time.perf_counter() - start) * 1_000_000 / args.iterations
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        _in_memory(payload, json_blob_name)
+    memory_us = (time.perf_counter() - start) * 1_000_000 / args.iterations
+
+    print(f"Payload description={args.description_size} chars, iterations={args.iterations}")
+    print(f"{'path':<12} {'us/save':>10} {'speedup':>8}")
+    print(f"{'temp_file':<12} {temp_us:>10.1f} {1.0:>8.1f}")
+    print(f"{'in_memory':<12} {memory_us:>10.1f} {temp_us / memory_us:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
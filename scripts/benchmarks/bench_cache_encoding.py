@@ -0,0 +1,68 @@
+"""
+Microbenchmark de codificación de embeddings para el cache Redis - VEA Connect
+
+Compara JSON (formato anterior) contra float32/float16 binario de utils.cache_layer:
+tamaño por entrada, tiempo de codificación y tiempo de decodificación.
+No requiere Redis; mide solo la serialización.
+
+Uso:
+    python scripts/benchmarks/bench_cache_encoding.py [--dim 1536] [--iterations 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Configurar Django para importar utils.cache_layer
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.test')
+
+import django  # noqa: E402
+
+django.setup()
+
+from utils.cache_layer import encode_embedding, decode_embedding  # noqa: E402
+
+
+def _time_it(func, iterations: int) -> float:
+    """Tiempo medio por llamada en microsegundos."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) * 1_000_000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de codificación de embeddings")
+    parser.add_argument('--dim', type=int, default=1536, help="Dimensión del vector")
+    parser.add_argument('--iterations', type=int, default=2000, help="Iteraciones por medición")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vector = [rng.uniform(-0.1, 0.1) for _ in range(args.dim)]
+
+    print(f"Vector dim={args.dim}, iterations={args.iterations}")
+    print(f"{'encoding':<10} {'bytes':>8} {'encode_us':>10} {'decode_us':>10} {'size_x':>7} {'decode_x':>8} {'max_err':>10}")
+
+    baseline = None
+    for encoding in ('json', 'float32', 'float16'):
+        raw = encode_embedding(vector, encoding)
+        # Las entradas JSON se leen como str con el cliente decodificado anterior
+        encode_us = _time_it(lambda: encode_embedding(vector, encoding), args.iterations)
+        decode_us = _time_it(lambda: decode_embedding(raw), args.iterations)
+        decoded = decode_embedding(raw)
+        max_err = max(abs(a - b) for a, b in zip(vector, decoded))
+        if baseline is None:
+            baseline = (len(raw), decode_us)
+        print(
+            f"{encoding:<10} {len(raw):>8} {encode_us:>10.1f} {decode_us:>10.1f} "
+            f"{baseline[0] / len(raw):>7.1f} {baseline[1] / decode_us:>8.1f} {max_err:>10.2e}"
+        )
+
+
+if __name__ == '__main__':
+    main()
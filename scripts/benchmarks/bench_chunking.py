@@ -0,0 +1,93 @@
+"""
+Benchmark de throughput de split_text_into_chunks - VEA Connect
+
+Mide MB/s del chunker sobre textos sintéticos de 10 KB, 1 MB y 10 MB con la
+forma de una salida OCR (párrafos, oraciones largas sin puntuación y un bloque
+FAQ). No requiere Azure.
+
+Uso:
+    python scripts/benchmarks/bench_chunking.py [--sizes 10KB,1MB,10MB] [--repeat 3] [--max-chars 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Configurar Django para importar tasks.document_pipeline
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.test')
+
+import django  # noqa: E402
+
+django.setup()
+
+from tasks.document_pipeline import split_text_into_chunks  # noqa: E402
+
+WORDS = [
+    'iglesia', 'culto', 'jóvenes', 'oración', 'ministerio', 'donación', 'evento', 'Dios',
+    'comunidad', 'alabanza', 'estudio', 'bíblico', 'domingo', 'reunión', 'servicio', 'de',
+    'la', 'el', 'en', 'y', 'con', 'para', '2025', '10:30',
+]
+
+UNITS = {'KB': 1024, 'MB': 1024 * 1024}
+
+
+def _parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for unit, factor in UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def _ocr_like_text(size: int, seed: int = 42) -> str:
+    """Texto tipo OCR: párrafos normales, oraciones largas sin puntos y líneas cortadas."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        kind = rng.random()
+        if kind < 0.2:
+            # Párrafo OCR sin puntuación (ruta de corte por palabras)
+            block = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(200, 2000)))
+        elif kind < 0.3:
+            block = '\n'.join(' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 10))) for _ in range(8))
+        else:
+            sentences = []
+            for _ in range(rng.randint(2, 12)):
+                words = [rng.choice(WORDS) for _ in range(rng.randint(5, 25))]
+                sentences.append(' '.join(words).capitalize() + '.')
+            block = ' '.join(sentences)
+        parts.append(block)
+        total += len(block) + 2
+    return '\n\n'.join(parts)[:size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput del chunker")
+    parser.add_argument('--sizes', default='10KB,1MB,10MB', help="Tamaños de texto separados por coma")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por tamaño (se reporta la mejor)")
+    parser.add_argument('--max-chars', type=int, default=1000, help="max_chars del chunker")
+    args = parser.parse_args()
+
+    print(f"max_chars={args.max_chars}, repeat={args.repeat}")
+    print(f"{'size':<8} {'chunks':>8} {'best_s':>9} {'MB/s':>8}")
+    for label in args.sizes.split(','):
+        size = _parse_size(label)
+        text = _ocr_like_text(size)
+        megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+        best = float('inf')
+        chunks = []
+        for _ in range(max(1, args.repeat)):
+            start = time.perf_counter()
+            chunks, _ = split_text_into_chunks(text, max_chars=args.max_chars)
+            best = min(best, time.perf_counter() - start)
+        print(f"{label.strip():<8} {len(chunks):>8} {best:>9.3f} {megabytes / best:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de payload de resultados de Azure AI Search por perfil de proyección - VEA Connect
+
+Simula la respuesta JSON de una búsqueda vectorial (top=15, como la ruta RAG
+del bot) y compara el select anterior (id, content, embedding, created_at)
+contra los perfiles de utilities.search_projection: bytes por consulta y
+tiempo de parseo (json.loads, lo que hace el SDK al recibir la página).
+No requiere Azure.
+
+Uso:
+    python scripts/benchmarks/bench_search_projection.py [--hits 15] [--dimensions 1536] [--iterations 200]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(BASE_DIR))
+
+from utilities.search_projection import SEARCH_PROFILES  # noqa: E402
+
+LEGACY_SELECT = ["id", "content", "embedding", "created_at"]
+
+
+def _fake_index_document(n: int, dimensions: int, rng: random.Random) -> dict:
+    content = ("Culto de jóvenes el sábado a las 18:00 en el templo principal. " * 16)[:1000]
+    return {
+        "id": f"doc_{n}_chunk_{n % 7:03d}",
+        "title": f"Documento {n}",
+        "content": content,
+        "metadata": json.dumps({"category": "eventos_generales", "description": "Aviso", "chunk_index": n % 7}),
+        "created_at": "2025-08-10T18:00:00Z",
+        "embedding": [rng.uniform(-0.1, 0.1) for _ in range(dimensions)],
+    }
+
+
+def _response_body(documents: list, select: list) -> bytes:
+    """Cuerpo de respuesta de Azure Search con solo los campos seleccionados."""
+    value = [{"@search.score": 0.82, **{field: doc[field] for field in select}} for doc in documents]
+    return json.dumps({"value": value}).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de proyección de resultados de búsqueda")
+    parser.add_argument('--hits', type=int, default=15, help="Resultados por consulta")
+    parser.add_argument('--dimensions', type=int, default=1536, help="Dimensión del embedding")
+    parser.add_argument('--iterations', type=int, default=200, help="Parseos por perfil")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    documents = [_fake_index_document(n, args.dimensions, rng) for n in range(args.hits)]
+
+    selects = {"legacy": LEGACY_SELECT, **SEARCH_PROFILES}
+    baseline = None
+    print(f"hits={args.hits}, dimensions={args.dimensions}, iterations={args.iterations}")
+    print(f"{'profile':<8} {'bytes/query':>12} {'parse_ms':>9} {'bytes_vs_legacy':>16}")
+    for name, select in selects.items():
+        body = _response_body(documents, select)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            json.loads(body)
+        parse_ms = (time.perf_counter() - start) * 1000 / args.iterations
+        if baseline is None:
+            baseline = len(body)
+        print(f"{name:<8} {len(body):>12} {parse_ms:>9.3f} {len(body) / baseline:>15.1%}")
+
+
+if __name__ == '__main__':
+    main()
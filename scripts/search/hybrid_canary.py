@@ -1,8 +1,10 @@
 """
 Hybrid Search Canary Script - VEA Connect
 
-This script demonstrates hybrid search (BM25 + vector) without calling actual services.
-It shows how the hybrid search would be constructed and executed.
+This script demonstrates hybrid search (BM25 + vector). The request is built by
+utilities.hybrid_search (the engine used by EmbeddingManager.find_similar and the
+v2 function); with Azure Search and Azure OpenAI configured it runs the query
+against the real index, otherwise it shows mock results.
 """
 
 import os
@@ -10,8 +12,13 @@ import json
 import logging
 import hashlib
 from typing import Dict, List, Any, Optional
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utilities.hybrid_search import HybridSearchConfig, build_hybrid_search_options  # noqa: E402
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -150,6 +157,17 @@ class HybridSearchCanary:
         # Build vector query
         vector_query = self._build_vector_query(query_embedding, filters)
         
+        # Request real: una sola petición con search_text + vector_queries (RRF en el servicio)
+        config = HybridSearchConfig.from_env()
+        request = build_hybrid_search_options(
+            query_text,
+            query_embedding,
+            self.default_top_k,
+            ['id', 'title', 'content', 'metadata'],
+            self._build_filter_string(filters) if filters else None,
+            config,
+        )
+        
         # Combine into hybrid query
         hybrid_query = {
             'query_type': 'hybrid',
@@ -163,7 +181,10 @@ class HybridSearchCanary:
             },
             'filters': filters or {},
             'rerank': self.rerank_enabled,
-            'top_k': self.default_top_k
+            'top_k': self.default_top_k,
+            'request': {**request, 'vector_queries': [
+                {**q, 'vector': f"<{len(q['vector'])} floats>"} for q in request['vector_queries']
+            ]}
         }
         
         return hybrid_query
@@ -212,7 +233,8 @@ class HybridSearchCanary:
             elif isinstance(value, (int, float)):
                 filter_parts.append(f"{key} eq {value}")
             elif isinstance(value, list):
-                filter_parts.append(f"{key} in ({','.join([f\"'{v}'\" for v in value])})")
+                values = ','.join(str(v) for v in value)
+                filter_parts.append(f"search.in({key}, '{values}', ',')")
         
         return ' and '.join(filter_parts) if filter_parts else None
     
@@ -260,15 +282,53 @@ class HybridSearchCanary:
             print("\n⚠️ Embedding service not available - using BM25 only")
             return self._get_bm25_only_results(query_text, hybrid_query)
         
-        # Show how the search would be executed
-        print("\n🚀 How the search would be executed:")
-        print("1. Generate query embedding using Azure OpenAI")
-        print("2. Execute BM25 search in Azure AI Search")
-        print("3. Execute vector similarity search in Azure AI Search")
-        print("4. Combine and rerank results")
-        print("5. Return hybrid results")
+        print("\n🚀 Executing against Azure AI Search (single hybrid request, RRF fusion)")
+        try:
+            return self._get_live_results(query_text, filters)
+        except Exception as e:
+            print(f"\n⚠️ Live search failed ({e}) - showing mock results")
+            return self._get_mock_results(query_text, hybrid_query)
+    
+    def _get_live_results(self, query_text: str, filters: Optional[Dict]) -> Dict[str, Any]:
+        """Run the hybrid query with the real engine (AzureSearchClient.search_hybrid)."""
+        from openai import AzureOpenAI
+        from utilities.azure_search_client import AzureSearchClient
+        
+        openai_client = AzureOpenAI(
+            api_key=os.getenv('AZURE_OPENAI_API_KEY'),
+            azure_endpoint=os.getenv('AZURE_OPENAI_ENDPOINT'),
+            api_version="2024-02-15-preview",
+        )
+        deployment = os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT', 'text-embedding-ada-002')
+        query_embedding = openai_client.embeddings.create(input=query_text, model=deployment).data[0].embedding
+        
+        client = AzureSearchClient(key=os.getenv('AZURE_SEARCH_API_KEY'))
+        hits = client.search_hybrid(
+            query_text,
+            query_embedding,
+            top_k=self.default_top_k,
+            filter_query=self._build_filter_string(filters) if filters else None,
+            profile="admin",
+        )
+        results = [{
+            'id': hit['id'],
+            'title': hit.get('title') or hit['id'],
+            'content': (hit.get('content') or '')[:200] + "...",
+            'metadata': hit.get('metadata', {}),
+            'scores': {'hybrid': round(hit.get('score', 0.0), 4)}
+        } for hit in hits]
         
-        return self._get_mock_results(query_text, hybrid_query)
+        return {
+            'query': query_text,
+            'query_type': 'hybrid',
+            'total_results': len(results),
+            'results': results,
+            'execution_info': {
+                'services_used': ['bm25', 'vector'],
+                'fusion': 'rrf',
+                'rerank_enabled': HybridSearchConfig.from_env().semantic_rerank
+            }
+        }
     
     def _get_mock_results(self, query_text: str, hybrid_query: Dict) -> Dict[str, Any]:
         """Get mock search results."""
@@ -2,6 +2,7 @@
 Servicio de búsqueda para Azure AI Search
 """
 import os
+import time
 import logging
 from typing import List, Dict, Any, Optional
 from azure.core.credentials import AzureKeyCredential
@@ -10,6 +11,20 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Límite de documentos por petición de indexación en Azure AI Search
+MAX_DOCUMENTS_PER_BATCH = 1000
+# Códigos por elemento que vale la pena reintentar (conflicto, throttling, no disponible)
+RETRYABLE_STATUS_CODES = {409, 422, 429, 500, 503}
+
+
+def _bump_index_generation() -> None:
+    """Invalida las respuestas RAG cacheadas tras escribir en el índice (utils.cache_layer)."""
+    try:
+        from utils.cache_layer import bump_index_generation
+        bump_index_generation()
+    except Exception as e:
+        logger.debug(f"Index generation not bumped: {e}")
+
 
 class SearchIndexService:
     """Servicio para manejar operaciones con Azure AI Search"""
@@ -64,6 +79,7 @@ class SearchIndexService:
             
             if result[0].succeeded:
                 logger.info(f"Document indexed successfully: {document_id}")
+                _bump_index_generation()
                 return True
             else:
                 logger.error(f"Failed to index document {document_id}: {result[0].errors}")
@@ -92,6 +108,7 @@ class SearchIndexService:
             
             if result[0].succeeded:
                 logger.info(f"Document deleted successfully: {document_id}")
+                _bump_index_generation()
                 return True
             else:
                 logger.error(f"Failed to delete document {document_id}: {result[0].errors}")
@@ -101,13 +118,138 @@ class SearchIndexService:
             logger.error(f"Error deleting document {document_id}: {e}")
             return False
     
-    def search(self, query: str, top: int = 10) -> List[Dict[str, Any]]:
+    def upsert_documents(self, documents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Inserta o actualiza varios documentos en lotes
+
+        Agrupa los documentos hasta el límite por petición del servicio y
+        reintenta únicamente las claves que fallaron según el resultado por elemento.
+
+        Args:
+            documents: Documentos a indexar; cada uno debe incluir 'id'
+
+        Returns:
+            Dict[str, bool]: Estado final por ID de documento
+        """
+        return self._index_in_batches(
+            self.client.upload_documents if self.client else None,
+            documents,
+            'index',
+        )
+
+    def merge_documents(self, documents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Actualiza solo los campos enviados de documentos existentes, en lotes
+
+        Los campos omitidos (p. ej. 'embedding') conservan su valor en el índice.
+
+        Args:
+            documents: Campos a actualizar; cada uno debe incluir 'id'
+
+        Returns:
+            Dict[str, bool]: Estado final por ID de documento
+        """
+        return self._index_in_batches(
+            self.client.merge_documents if self.client else None,
+            documents,
+            'merge',
+        )
+
+    def delete_documents(self, document_ids: List[str]) -> Dict[str, bool]:
+        """
+        Elimina varios documentos del índice en lotes
+
+        Args:
+            document_ids: IDs de los documentos a eliminar
+
+        Returns:
+            Dict[str, bool]: Estado final por ID de documento
+        """
+        return self._index_in_batches(
+            self.client.delete_documents if self.client else None,
+            [{'id': doc_id} for doc_id in document_ids],
+            'delete',
+        )
+
+    def _index_in_batches(self, operation, documents: List[Dict[str, Any]], action: str) -> Dict[str, bool]:
+        """
+        Ejecuta una operación de indexación por lotes con reintentos por clave
+
+        Args:
+            operation: Método del SearchClient (upload_documents / merge_documents / delete_documents)
+            documents: Documentos o claves a enviar
+            action: Nombre de la acción para logs
+
+        Returns:
+            Dict[str, bool]: Estado final por ID de documento
+        """
+        status: Dict[str, bool] = {doc['id']: False for doc in documents}
+        if not documents:
+            return status
+        if operation is None:
+            logger.warning("Azure AI Search client not available")
+            return status
+
+        batch_size = max(1, min(
+            int(getattr(settings, 'AZURE_SEARCH_BATCH_SIZE', MAX_DOCUMENTS_PER_BATCH)),
+            MAX_DOCUMENTS_PER_BATCH,
+        ))
+        max_retries = max(0, int(getattr(settings, 'AZURE_SEARCH_MAX_RETRIES', 3)))
+
+        pending = list(documents)
+        attempt = 0
+        requests_sent = 0
+        while pending:
+            failed: List[Dict[str, Any]] = []
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                requests_sent += 1
+                try:
+                    results = operation(batch)
+                except Exception as e:
+                    # Fallo de la petición completa: todas las claves del lote se reintentan
+                    logger.error(f"Error in bulk {action} ({len(batch)} documents): {e}")
+                    failed.extend(batch)
+                    continue
+
+                by_id = {doc['id']: doc for doc in batch}
+                for result in results:
+                    if result.succeeded:
+                        status[result.key] = True
+                    elif result.status_code in RETRYABLE_STATUS_CODES and result.key in by_id:
+                        failed.append(by_id[result.key])
+                    else:
+                        logger.error(
+                            f"Failed to {action} document {result.key}: "
+                            f"{result.status_code} {result.error_message}"
+                        )
+
+            if not failed or attempt >= max_retries:
+                for doc in failed:
+                    logger.error(f"Giving up {action} for document {doc['id']} after {attempt + 1} attempts")
+                break
+            attempt += 1
+            time.sleep(min(2 ** (attempt - 1) * 0.5, 8))
+            logger.warning(f"Retrying bulk {action} for {len(failed)} documents (attempt {attempt + 1})")
+            pending = failed
+
+        succeeded = sum(1 for ok in status.values() if ok)
+        logger.info(
+            f"Bulk {action} completed: {succeeded}/{len(status)} succeeded in {requests_sent} requests"
+        )
+        if succeeded:
+            _bump_index_generation()
+        return status
+
+    def search(self, query: str, top: int = 10, profile: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Busca documentos en el índice
         
         Args:
             query: Consulta de búsqueda
             top: Número máximo de resultados
+            profile: Perfil de proyección (utilities.search_projection); None usa el de las rutas
+                del bot ("rag"), las herramientas de administración pasan "admin"
             
         Returns:
             List[Dict]: Lista de documentos encontrados
@@ -117,8 +259,10 @@ class SearchIndexService:
             return []
         
         try:
+            from utilities.search_projection import get_select_fields
             results = self.client.search(
                 search_text=query,
+                select=get_select_fields(profile),
                 top=top
             )
             
@@ -755,12 +755,18 @@ class AzureStorageService:
             temp_path = temp_file.name
             temp_file.close()
             
-            # Download the blob
-            with open(temp_path, 'wb') as download_file:
-                download_stream = blob_client.download_blob()
-                download_file.write(download_stream.readall())
+            # Download the blob in chunks straight into the file (never holds the whole blob in memory)
+            try:
+                with open(temp_path, 'wb') as download_file:
+                    download_stream = blob_client.download_blob(
+                        max_concurrency=getattr(settings, 'BLOB_DOWNLOAD_MAX_CONCURRENCY', 2)
+                    )
+                    bytes_written = download_stream.readinto(download_file)
+            except Exception:
+                os.unlink(temp_path)
+                raise
             
-            logger.info(f"File downloaded to tempfile: {resolved_name} -> {temp_path}")
+            logger.info(f"File downloaded to tempfile: {resolved_name} -> {temp_path} ({bytes_written} bytes)")
             
             return temp_path
             
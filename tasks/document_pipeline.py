@@ -1,14 +1,20 @@
 """
 Pipeline de procesamiento asíncrono de documentos
 """
+import hashlib
 import logging
 import tempfile
 import os
 import re
+import threading
 from datetime import datetime
 from django.utils import timezone
 from typing import Optional, List, Dict, Any, Tuple
 import json
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 
 # from celery import shared_task
 from django.conf import settings
@@ -17,19 +23,40 @@ from django.core.files.base import ContentFile
 from apps.documents.models import Document, ProcessingState
 from services.storage_service import azure_storage
 from services.search_index_service import search_index_service
+from utilities.search_filters import SOURCE_TYPE_DOCUMENT
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_CHUNK_MAX_CHARS = 1000
 DEFAULT_CHUNK_OVERLAP_SEGMENTS = 1
 CHUNK_VERSION = 1
+# Chunking por presupuesto de tokens (CHUNKING_STRATEGY=tokens)
+TOKEN_CHUNK_VERSION = 1
+CHARS_CHUNK_STRATEGY = "chars"
+TOKENS_CHUNK_STRATEGY = "tokens"
+# Incrementar al cambiar los extractores: invalida la caché de conversión
+EXTRACTOR_VERSION = 1
+CONVERSION_CACHE_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.tif')
 FAQ_CHUNK_MODE = "faq"
 GENERIC_CHUNK_MODE = "generic"
 
 
+def _peak_rss_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso en MB (None si no está disponible en la plataforma)."""
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB; macOS reporta bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except Exception:
+        return None
+
+
 def _normalize_text(text: str) -> str:
     """Normaliza saltos de línea y espacios consecutivos."""
-    return re.sub(r'[ \t]+', ' ', text.replace('\r\n', '\n').replace('\r', '\n')).strip()
+    # Solo se reemplazan tramos de 2+ espacios o con tabulador (un espacio simple ya es ' ')
+    return re.sub(r'(?: [ \t]|\t)[ \t]*', ' ', text.replace('\r\n', '\n').replace('\r', '\n')).strip()
 
 
 def _split_paragraph_into_segments(paragraph: str, max_chars: int) -> List[str]:
@@ -45,7 +72,9 @@ def _split_paragraph_into_segments(paragraph: str, max_chars: int) -> List[str]:
 
     sentences = re.split(r'(?<=[\.\?\!])\s+(?=[A-ZÁÉÍÓÚÑ0-9])', paragraph)
     segments: List[str] = []
-    buffer = ""
+    # El buffer se acumula como partes + longitud (sin reconstruir el string por oración)
+    buffer_parts: List[str] = []
+    buffer_length = 0
 
     for sentence in sentences:
         sentence = sentence.strip()
@@ -54,31 +83,86 @@ def _split_paragraph_into_segments(paragraph: str, max_chars: int) -> List[str]:
 
         if len(sentence) > max_chars:
             # For very long sentences, cut hard limits while preserving words.
-            words = sentence.split(' ')
-            long_buffer = ""
-            for word in words:
-                candidate = f"{long_buffer} {word}".strip()
-                if len(candidate) > max_chars and long_buffer:
-                    segments.append(long_buffer.strip())
-                    long_buffer = word
-                else:
-                    long_buffer = candidate
-            if long_buffer:
-                segments.append(long_buffer.strip())
-            buffer = ""
+            segments.extend(_split_long_sentence(sentence, max_chars))
+            buffer_parts, buffer_length = [], 0
             continue
 
-        candidate = f"{buffer} {sentence}".strip() if buffer else sentence
-        if len(candidate) <= max_chars:
-            buffer = candidate
+        candidate_length = buffer_length + 1 + len(sentence) if buffer_parts else len(sentence)
+        if candidate_length <= max_chars:
+            buffer_parts.append(sentence)
+            buffer_length = candidate_length
+        else:
+            if buffer_parts:
+                segments.append(" ".join(buffer_parts))
+            buffer_parts, buffer_length = [sentence], len(sentence)
+
+    if buffer_parts:
+        segments.append(" ".join(buffer_parts))
+
+    return segments
+
+
+# Espacio en blanco pegado a un separador ' ' (palabras vacías o con espacios al borde)
+_IRREGULAR_WORD_SPACING = re.compile(r'\s | \s')
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    """
+    Corta una oración más larga que max_chars por palabras, en tiempo lineal
+
+    Equivale a acumular ``f"{buffer} {word}".strip()`` palabra a palabra, pero
+    guarda el buffer como partes + longitud en lugar de reconstruirlo. El string
+    solo se arma cuando el buffer está vacío o empieza con espacio en blanco
+    (como mucho una vez después de cada corte).
+    """
+    words = sentence.split(' ')
+    if not _IRREGULAR_WORD_SPACING.search(sentence):
+        # Caso común (sin palabras vacías ni con espacios pegados): el buffer es
+        # siempre " ".join(words[i:j]) y los cortes salen de sumas prefijas
+        prefix = list(accumulate([len(word) + 1 for word in words], initial=0))
+        segments_fast: List[str] = []
+        i = 0
+        while i < len(words):
+            j = max(i + 1, bisect_right(prefix, prefix[i] + max_chars + 1) - 1)
+            segments_fast.append(" ".join(words[i:j]))
+            i = j
+        return segments_fast
+
+    segments: List[str] = []
+    parts: List[str] = []  # buffer == " ".join(parts); nunca contiene partes vacías
+    length = 0
+
+    for word in words:
+        new_parts = None
+        if parts and not parts[0][0].isspace():
+            # strip() solo puede recortar por la derecha (la palabra o el final del buffer)
+            piece = word.rstrip()
+            if piece:
+                candidate_length = length + 1 + len(piece)
+            else:
+                last = parts[-1].rstrip()
+                candidate_length = length - (len(parts[-1]) - len(last))
         else:
-            if buffer:
-                segments.append(buffer.strip())
-            buffer = sentence
+            candidate = f"{' '.join(parts)} {word}".strip()
+            new_parts = [candidate] if candidate else []
+            candidate_length = len(candidate)
+
+        if candidate_length > max_chars and parts:
+            segments.append(" ".join(parts).strip())
+            parts = [word] if word else []
+            length = len(word)
+            continue
 
-    if buffer:
-        segments.append(buffer.strip())
+        if new_parts is not None:
+            parts = new_parts
+        elif piece:
+            parts.append(piece)
+        else:
+            parts[-1] = last
+        length = candidate_length
 
+    if parts:
+        segments.append(" ".join(parts).strip())
     return segments
 
 
@@ -123,11 +207,20 @@ from typing import Tuple
 def split_text_into_chunks(
     text: str,
     max_chars: int = DEFAULT_CHUNK_MAX_CHARS,
-    overlap_segments: int = DEFAULT_CHUNK_OVERLAP_SEGMENTS
+    overlap_segments: int = DEFAULT_CHUNK_OVERLAP_SEGMENTS,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: int = 0,
+    encoding_name: Optional[str] = None,
 ) -> Tuple[List[str], str]:
     """
     Divide texto largo en bloques manteniendo la coherencia entre párrafos.
+    
+    Con max_tokens se usa el modo por presupuesto de tokens (tokenizer local)
+    en lugar del límite por caracteres.
     """
+    if max_tokens:
+        return _split_text_into_token_chunks(text, max_tokens, overlap_tokens, encoding_name)
+
     faq_sections = split_text_into_faq_sections(text)
     if faq_sections:
         return _split_chunks_from_sections(faq_sections, max_chars, overlap_segments, True), FAQ_CHUNK_MODE
@@ -136,9 +229,17 @@ def split_text_into_chunks(
     if not normalized:
         return [], GENERIC_CHUNK_MODE
 
+    merged_paragraphs = _merge_heading_paragraphs(normalized, lambda paragraph: len(paragraph) <= max_chars)
+    return (
+        _split_chunks_from_sections(merged_paragraphs, max_chars, overlap_segments, False),
+        GENERIC_CHUNK_MODE,
+    )
+
+
+def _merge_heading_paragraphs(normalized: str, fits) -> List[str]:
+    """Separa párrafos y fusiona encabezados/preguntas con su siguiente párrafo para no separarlos."""
     raw_paragraphs = [p.strip() for p in re.split(r'\n\s*\n', normalized) if p.strip()]
 
-    # Fusionar encabezados/preguntas con su siguiente párrafo para no separarlos
     merged_paragraphs: List[str] = []
     i = 0
     while i < len(raw_paragraphs):
@@ -150,7 +251,7 @@ def split_text_into_chunks(
 
         if (
             next_paragraph
-            and len(paragraph) <= max_chars
+            and fits(paragraph)
             and paragraph.rstrip().endswith(("?", ":", "¿"))
         ):
             combined = f"{paragraph}\n\n{next_paragraph}"
@@ -159,11 +260,283 @@ def split_text_into_chunks(
         else:
             merged_paragraphs.append(paragraph)
             i += 1
+    return merged_paragraphs
+
+
+# Encoders cargados por proceso; un fallo transitorio (descarga del BPE) no se cachea
+_token_encoders: Dict[str, Any] = {}
+_token_encoder_retry_at: Dict[str, float] = {}
+_token_encoder_lock = threading.Lock()
+TOKEN_ENCODER_RETRY_SECONDS = 60
+
+
+def _get_token_encoder(encoding_name: str):
+    """
+    Encoder de tiktoken, cargado una vez por proceso (None si no está disponible).
+    
+    Solo se cachean los encoders cargados y la ausencia de tiktoken; tras un error al
+    cargar el encoding se reintenta pasados TOKEN_ENCODER_RETRY_SECONDS.
+    """
+    encoder = _token_encoders.get(encoding_name)
+    if encoder is not None or time.monotonic() < _token_encoder_retry_at.get(encoding_name, 0.0):
+        return encoder
+    with _token_encoder_lock:
+        encoder = _token_encoders.get(encoding_name)
+        if encoder is not None or time.monotonic() < _token_encoder_retry_at.get(encoding_name, 0.0):
+            return encoder
+        try:
+            import tiktoken  # type: ignore
+        except ImportError:
+            logger.warning("tiktoken no instalado; los tokens se estiman (~3 caracteres por token)")
+            _token_encoder_retry_at[encoding_name] = float('inf')
+            return None
+        try:
+            encoder = tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el encoder {encoding_name}; los tokens se estiman: {str(e)}")
+            _token_encoder_retry_at[encoding_name] = time.monotonic() + TOKEN_ENCODER_RETRY_SECONDS
+            return None
+        _token_encoders[encoding_name] = encoder
+        return encoder
 
-    return (
-        _split_chunks_from_sections(merged_paragraphs, max_chars, overlap_segments, False),
-        GENERIC_CHUNK_MODE,
-    )
+
+def _token_encoding_name(encoding_name: Optional[str] = None) -> str:
+    return encoding_name or getattr(settings, 'CHUNK_TOKEN_ENCODING', 'cl100k_base')
+
+
+def count_tokens(text: str, encoding_name: Optional[str] = None) -> int:
+    """
+    Cuenta tokens con el tokenizer local del modelo de embeddings
+    
+    Si tiktoken o el encoding no están disponibles usa _estimate_tokens (conservador).
+    """
+    if not text:
+        return 0
+    encoder = _get_token_encoder(_token_encoding_name(encoding_name))
+    if encoder is None:
+        return _estimate_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def _hard_split_by_tokens(text: str, max_tokens: int, encoding_name: Optional[str]) -> List[str]:
+    """Corta un texto sin espacios (p. ej. una 'palabra' OCR enorme) en ventanas de max_tokens."""
+    encoder = _get_token_encoder(_token_encoding_name(encoding_name))
+    if encoder is None:
+        step = max(1, max_tokens * 3 - 2)
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoder.encode(text, disallowed_special=())
+    pieces = [encoder.decode(tokens[i:i + max_tokens]).strip() for i in range(0, len(tokens), max_tokens)]
+    return [piece for piece in pieces if piece]
+
+
+def _pack_by_tokens(units: List[str], joiner: str, max_tokens: int, encoding_name: Optional[str]) -> List[str]:
+    """Agrupa unidades (oraciones o palabras) en piezas de hasta max_tokens."""
+    joiner_tokens = 1
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit in units:
+        unit_tokens = count_tokens(unit, encoding_name)
+        if current and current_tokens + joiner_tokens + unit_tokens > max_tokens:
+            pieces.append(joiner.join(current))
+            current, current_tokens = [], 0
+        current_tokens += unit_tokens if not current else unit_tokens + joiner_tokens
+        current.append(unit)
+    if current:
+        pieces.append(joiner.join(current))
+    return pieces
+
+
+def _split_section_by_tokens(section: str, max_tokens: int, encoding_name: Optional[str]) -> List[Tuple[str, int]]:
+    """Divide una sección que excede el presupuesto: oraciones, luego palabras, luego corte duro."""
+    segments: List[Tuple[str, int]] = []
+    sentences = [s.strip() for s in re.split(r'(?<=[\.\?\!])\s+(?=[A-ZÁÉÍÓÚÑ0-9])', section) if s.strip()]
+    for piece in _pack_by_tokens(sentences, " ", max_tokens, encoding_name):
+        piece_tokens = count_tokens(piece, encoding_name)
+        if piece_tokens <= max_tokens:
+            segments.append((piece, piece_tokens))
+            continue
+        # Una sola oración demasiado larga: por palabras
+        for words_piece in _pack_by_tokens(piece.split(), " ", max_tokens, encoding_name):
+            words_tokens = count_tokens(words_piece, encoding_name)
+            if words_tokens <= max_tokens:
+                segments.append((words_piece, words_tokens))
+            else:
+                segments.extend(
+                    (hard, count_tokens(hard, encoding_name))
+                    for hard in _hard_split_by_tokens(words_piece, max_tokens, encoding_name)
+                )
+    return segments
+
+
+def _split_text_into_token_chunks(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    encoding_name: Optional[str] = None,
+) -> Tuple[List[str], str]:
+    """
+    Chunking por presupuesto de tokens con solapamiento en tokens
+    
+    Conserva la estructura del modo por caracteres (secciones FAQ y párrafos con
+    su encabezado) pero mide con el tokenizer: ningún chunk supera max_tokens y
+    cada chunk repite al inicio hasta overlap_tokens del final del anterior.
+    """
+    max_tokens = max(1, int(max_tokens))
+    overlap_tokens = max(0, min(int(overlap_tokens or 0), max_tokens // 2))
+
+    faq_sections = split_text_into_faq_sections(text)
+    if faq_sections:
+        sections, mode = faq_sections, FAQ_CHUNK_MODE
+    else:
+        normalized = _normalize_text(text)
+        if not normalized:
+            return [], GENERIC_CHUNK_MODE
+        sections = _merge_heading_paragraphs(
+            normalized, lambda paragraph: count_tokens(paragraph, encoding_name) <= max_tokens
+        )
+        mode = GENERIC_CHUNK_MODE
+
+    separator_tokens = 1  # "\n\n"
+    # Las piezas de una sección partida dejan sitio al solapamiento; si no, cada
+    # pieza llenaría un chunk entero y el solapamiento se descartaría
+    split_tokens = max(1, max_tokens - overlap_tokens - separator_tokens) if overlap_tokens else max_tokens
+
+    segments: List[Tuple[str, int]] = []
+    for section in sections:
+        section = section.strip()
+        if not section:
+            continue
+        section_tokens = count_tokens(section, encoding_name)
+        if section_tokens <= max_tokens:
+            segments.append((section, section_tokens))
+        else:
+            segments.extend(_split_section_by_tokens(section, split_tokens, encoding_name))
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for segment, segment_tokens in segments:
+        if current and current_tokens + separator_tokens + segment_tokens > max_tokens:
+            chunks.append("\n\n".join(s for s, _ in current))
+            current = _token_overlap_tail(current, overlap_tokens, encoding_name)
+            current_tokens = sum(n for _, n in current) + separator_tokens * max(0, len(current) - 1)
+            # El solapamiento nunca impide que entre el siguiente segmento
+            while current and current_tokens + separator_tokens + segment_tokens > max_tokens:
+                current_tokens -= current[0][1] + (separator_tokens if len(current) > 1 else 0)
+                current.pop(0)
+        current_tokens += segment_tokens if not current else segment_tokens + separator_tokens
+        current.append((segment, segment_tokens))
+    if current:
+        chunks.append("\n\n".join(s for s, _ in current))
+
+    return chunks, mode
+
+
+def _token_overlap_tail(
+    segments: List[Tuple[str, int]],
+    overlap_tokens: int,
+    encoding_name: Optional[str],
+) -> List[Tuple[str, int]]:
+    """Segmentos finales (u oraciones finales del último) que caben en overlap_tokens."""
+    if overlap_tokens <= 0 or not segments:
+        return []
+    tail: List[Tuple[str, int]] = []
+    tail_tokens = 0
+    for segment, segment_tokens in reversed(segments):
+        added = segment_tokens if not tail else segment_tokens + 1
+        if tail_tokens + added > overlap_tokens:
+            break
+        tail.append((segment, segment_tokens))
+        tail_tokens += added
+    if tail:
+        return tail[::-1]
+
+    # El último segmento es más grande que el solapamiento: repetir sus oraciones
+    # finales o, si ni la última oración cabe, sus palabras finales
+    last_segment = segments[-1][0]
+    sentences = [s.strip() for s in re.split(r'(?<=[\.\?\!])\s+', last_segment) if s.strip()]
+    overlap_text = _tail_within_tokens(sentences[1:], overlap_tokens, encoding_name)
+    if not overlap_text:
+        overlap_text = _tail_within_tokens(last_segment.split()[1:], overlap_tokens, encoding_name)
+    if not overlap_text:
+        return []
+    return [(overlap_text, count_tokens(overlap_text, encoding_name))]
+
+
+def _tail_within_tokens(units: List[str], budget: int, encoding_name: Optional[str]) -> str:
+    """Unidades finales (unidas por espacio) que caben en budget tokens."""
+    kept: List[str] = []
+    kept_tokens = 0
+    for unit in reversed(units):
+        added = count_tokens(unit, encoding_name) + (1 if kept else 0)
+        if kept_tokens + added > budget:
+            break
+        kept.append(unit)
+        kept_tokens += added
+    return " ".join(reversed(kept))
+
+
+def get_chunking_config() -> Dict[str, Any]:
+    """
+    Configuración de chunking vigente, tal como se guarda en metadata['chunking']
+    
+    Permite detectar documentos indexados con otra configuración (chunking_is_current)
+    y migrarlos de forma incremental.
+    """
+    if getattr(settings, 'CHUNKING_STRATEGY', CHARS_CHUNK_STRATEGY) == TOKENS_CHUNK_STRATEGY:
+        encoding_name = _token_encoding_name()
+        return {
+            'strategy': TOKENS_CHUNK_STRATEGY,
+            'version': TOKEN_CHUNK_VERSION,
+            'max_tokens': int(getattr(settings, 'CHUNK_MAX_TOKENS', 512)),
+            'overlap_tokens': int(getattr(settings, 'CHUNK_OVERLAP_TOKENS', 64)),
+            'encoding': encoding_name,
+            # Si se estimó sin tokenizer, el documento se vuelve a migrar cuando esté disponible
+            'tokenizer': 'tiktoken' if _get_token_encoder(encoding_name) is not None else 'estimate',
+        }
+    return {
+        'strategy': CHARS_CHUNK_STRATEGY,
+        'version': CHUNK_VERSION,
+        'max_chars': DEFAULT_CHUNK_MAX_CHARS,
+        'overlap_segments': DEFAULT_CHUNK_OVERLAP_SEGMENTS,
+    }
+
+
+def chunk_document_text(text: str) -> Tuple[List[str], str, Dict[str, Any]]:
+    """
+    Divide un texto con la configuración de chunking vigente
+    
+    Returns:
+        Tuple: chunks (al menos uno si hay texto), modo (faq/generic) y la
+        configuración usada, para guardar en metadata['chunking']
+    """
+    config = get_chunking_config()
+    if config['strategy'] == TOKENS_CHUNK_STRATEGY:
+        chunks, mode = split_text_into_chunks(
+            text,
+            max_tokens=config['max_tokens'],
+            overlap_tokens=config['overlap_tokens'],
+            encoding_name=config['encoding'],
+        )
+    else:
+        chunks, mode = split_text_into_chunks(
+            text,
+            max_chars=config['max_chars'],
+            overlap_segments=config['overlap_segments'],
+        )
+    if not chunks:
+        chunks, mode = [text], GENERIC_CHUNK_MODE
+    return chunks, mode, config
+
+
+def chunking_is_current(metadata: Optional[Dict[str, Any]]) -> bool:
+    """Indica si el documento ya está chunked con la configuración vigente."""
+    chunk_info = (metadata or {}).get('chunking') if isinstance(metadata, dict) else None
+    if not isinstance(chunk_info, dict):
+        return False
+    stored = {'strategy': CHARS_CHUNK_STRATEGY, **chunk_info}  # documentos previos: por caracteres
+    return all(stored.get(key) == value for key, value in get_chunking_config().items())
 
 
 def _split_chunks_from_sections(
@@ -208,10 +581,9 @@ def _split_chunks_from_sections(
             if current_segments:
                 current_length += separator_len * (len(current_segments) - 1)
 
+        # Longitud incremental: no se vuelve a sumar el chunk en cada segmento
+        current_length += segment_length if not current_segments else segment_length + separator_len
         current_segments.append(segment)
-        current_length = sum(len(s) for s in current_segments)
-        if len(current_segments) > 1:
-            current_length += separator_len * (len(current_segments) - 1)
 
     if current_segments:
         chunk_text = "\n\n".join(current_segments).strip()
@@ -224,29 +596,27 @@ def _split_chunks_from_sections(
         chunks = [combined] if combined else []
 
     if respect_boundaries and len(chunks) > 1:
+        # Un chunk que termina en pregunta se une al siguiente; las partes se
+        # acumulan en lista para no recopiar cadenas largas de preguntas seguidas
         adjusted_chunks: List[str] = []
-        carry_over = None
+        carry_over: List[str] = []
         for i, chunk in enumerate(chunks):
             chunk = chunk.strip()
-            if carry_over:
-                if chunk:
-                    chunk = f"{carry_over}\n\n{chunk}"
-                else:
-                    chunk = carry_over
-                carry_over = None
+            pieces = carry_over + [chunk] if chunk else carry_over
+            carry_over = []
 
-            if chunk.rstrip().endswith('?') and i < len(chunks) - 1:
-                carry_over = chunk
+            if pieces and pieces[-1].rstrip().endswith('?') and i < len(chunks) - 1:
+                carry_over = pieces
                 continue
 
-            if chunk:
-                adjusted_chunks.append(chunk)
+            if pieces:
+                adjusted_chunks.append("\n\n".join(pieces))
 
         if carry_over:
             if adjusted_chunks:
-                adjusted_chunks[-1] = f"{adjusted_chunks[-1]}\n\n{carry_over}"
+                adjusted_chunks[-1] = "\n\n".join([adjusted_chunks[-1], *carry_over])
             else:
-                adjusted_chunks.append(carry_over)
+                adjusted_chunks.append("\n\n".join(carry_over))
         chunks = adjusted_chunks
 
     return chunks
@@ -270,6 +640,149 @@ def get_document_chunk_ids(document_id: int, metadata: Optional[Dict[str, Any]])
     return [source_id]
 
 
+def _chunk_index(index_document: Dict[str, Any]) -> int:
+    """chunk_index guardado en el JSON de metadata del chunk (0 si no está)."""
+    try:
+        return int(json.loads(index_document.get('metadata') or '{}').get('chunk_index', 0))
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+def chunk_document_hash(index_document: Dict[str, Any]) -> str:
+    """
+    Hash del contenido de un chunk: texto, posición y deployment de embeddings
+
+    Solo cubre lo que determina el embedding, así un cambio de título, descripción
+    o número de chunks no obliga a volver a embeber los chunks sin cambios.
+    Se guarda en metadata['chunking']['chunk_hashes'] truncado a 16 caracteres hex.
+    """
+    from apps.embeddings.embedding_store import get_embeddings_deployment
+
+    payload = f"{get_embeddings_deployment()}\n{_chunk_index(index_document)}\n{index_document.get('content') or ''}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def chunk_fields_hash(index_document: Dict[str, Any]) -> str:
+    """
+    Hash de los campos del chunk distintos del contenido y el embedding
+
+    Se guarda en metadata['chunking']['field_hashes']; si solo cambia este hash el
+    chunk se actualiza con merge_documents, sin embedding.
+    """
+    payload = json.dumps(
+        {k: v for k, v in index_document.items() if k not in ('content', 'embedding')},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def indexed_chunk_hashes(index_documents: List[Dict[str, Any]], index_status: Dict[str, bool]) -> Dict[str, List[str]]:
+    """
+    Hashes a guardar en metadata['chunking'] tras subir todos los chunks
+
+    '' marca un chunk que no quedó indexado con embedding (se reintenta en la próxima edición).
+    """
+    indexed = [bool(doc.get('embedding')) and index_status.get(doc['id'], False) for doc in index_documents]
+    return {
+        'chunk_hashes': [chunk_document_hash(doc) if ok else '' for doc, ok in zip(index_documents, indexed)],
+        'field_hashes': [chunk_fields_hash(doc) if ok else '' for doc, ok in zip(index_documents, indexed)],
+    }
+
+
+def reindex_document_chunks(
+    document_id: int,
+    index_documents: List[Dict[str, Any]],
+    metadata: Optional[Dict[str, Any]],
+) -> Tuple[Dict[str, List[str]], Dict[str, Any]]:
+    """
+    Reindexa un documento chunked enviando a Azure solo los chunks modificados
+
+    Compara el hash de contenido de cada chunk nuevo con el registrado en
+    metadata['chunking']: solo los chunks con otro contenido se embeben y se suben
+    completos. Los que solo cambian de campos (título, descripción, chunk_count...)
+    se actualizan con merge_documents sin embedding, y solo se borran los IDs que
+    ya no existen (chunks finales sobrantes). Sin hashes previos (documentos
+    indexados antes de este cambio) se reindexa todo y se limpian los IDs legacy.
+
+    Args:
+        document_id: ID del documento
+        index_documents: Documentos de los chunks en orden, sin embedding
+        metadata: Metadata actual del documento (antes de la edición)
+
+    Returns:
+        Tuple: hashes a guardar en metadata['chunking'] ('chunk_hashes' y
+        'field_hashes'; '' si el chunk no quedó indexado) y estadísticas de la operación
+    """
+    source_id = f"doc_{document_id}"
+    new_ids = [doc['id'] for doc in index_documents]
+    new_hashes = [chunk_document_hash(doc) for doc in index_documents]
+    new_field_hashes = [chunk_fields_hash(doc) for doc in index_documents]
+
+    chunk_info = (metadata or {}).get('chunking') if isinstance(metadata, dict) else None
+    old_hashes = (chunk_info or {}).get('chunk_hashes')
+    old_field_hashes = (chunk_info or {}).get('field_hashes')
+    incremental = isinstance(old_hashes, list) and bool(old_hashes)
+    if incremental:
+        old_ids = [source_id] if len(old_hashes) == 1 else [
+            f"{source_id}_chunk_{i:03d}" for i in range(len(old_hashes))
+        ]
+        previous = dict(zip(old_ids, old_hashes))
+        previous_fields = dict(zip(old_ids, old_field_hashes)) if isinstance(old_field_hashes, list) else {}
+    else:
+        old_ids = list(dict.fromkeys([source_id, *get_document_chunk_ids(document_id, metadata)]))
+        previous = {}
+        previous_fields = {}
+
+    changed = [i for i, (chunk_id, h) in enumerate(zip(new_ids, new_hashes)) if previous.get(chunk_id) != h]
+    changed_set = set(changed)
+    merged = [
+        i for i, (chunk_id, h) in enumerate(zip(new_ids, new_field_hashes))
+        if i not in changed_set and previous_fields.get(chunk_id) != h
+    ]
+    stale_ids = [chunk_id for chunk_id in old_ids if chunk_id not in new_ids]
+
+    recorded = list(new_hashes)
+    recorded_fields = list(new_field_hashes)
+    if changed:
+        vectors, _, _ = resolve_chunk_embeddings([index_documents[i]['content'] for i in changed])
+        upload = []
+        for i, vector in zip(changed, vectors):
+            if isinstance(vector, list) and vector:
+                upload.append({**index_documents[i], 'embedding': vector})
+            else:
+                # Sin embedding se indexa igual, pero se reintentará en la próxima edición
+                upload.append(index_documents[i])
+                recorded[i] = ''
+        status = search_index_service.upsert_documents(upload)
+        for i in changed:
+            if not status.get(new_ids[i], False):
+                recorded[i] = ''
+                recorded_fields[i] = ''
+
+    if merged:
+        # Mismo contenido: el embedding del índice sigue valiendo, solo se envían los campos
+        merge_status = search_index_service.merge_documents([
+            {k: v for k, v in index_documents[i].items() if k != 'content'} for i in merged
+        ])
+        for i in merged:
+            if not merge_status.get(new_ids[i], False):
+                recorded_fields[i] = ''
+
+    # Borrar después de subir: nunca queda el documento sin chunks en el índice
+    if stale_ids:
+        search_index_service.delete_documents(stale_ids)
+
+    stats = {
+        'incremental': incremental,
+        'chunks': len(index_documents),
+        'changed': len(changed),
+        'merged': len(merged),
+        'deleted': len(stale_ids),
+    }
+    logger.info(json.dumps({"stage": "incremental_reindex", "doc_id": str(document_id), **stats}))
+    return {'chunk_hashes': recorded, 'field_hashes': recorded_fields}, stats
+
+
 # @shared_task(bind=True, max_retries=3)
 def process_document_async(document_id: int) -> bool:
     """
@@ -384,11 +897,14 @@ def process_document_async(document_id: int) -> bool:
                             # Sin original ni convertido en Azure: abortar
                             raise
         
+        bytes_downloaded = os.path.getsize(temp_file) if temp_file and os.path.exists(temp_file) else 0
         logger.info(json.dumps({
             "stage": "download",
             "doc_id": str(document.id),
             "filename": document.file.name,
             "status": "success",
+            "bytes_downloaded": bytes_downloaded,
+            "rss_peak_mb": _peak_rss_mb(),
             "elapsed_ms": (datetime.now() - start_time).total_seconds() * 1000
         }))
         
@@ -398,12 +914,10 @@ def process_document_async(document_id: int) -> bool:
         document.save()
         
         if not used_converted_text:
-            # convert_document_to_text espera un ContentFile; temp_file es un path (str)
-            # Cargar el archivo temporal y envolverlo en ContentFile
+            # El archivo descargado se pasa por ruta a los extractores (sin copia en memoria ni segundo temporal)
             try:
                 assert temp_file is not None
-                with open(temp_file, 'rb') as _fh:
-                    content_file = ContentFile(_fh.read(), name=os.path.basename(document.file.name))
+                ocr_text = convert_file_to_text(temp_file, os.path.basename(document.file.name))
             finally:
                 # Limpiar el archivo temporal descargado
                 try:
@@ -412,8 +926,6 @@ def process_document_async(document_id: int) -> bool:
                 except Exception:
                     pass
 
-            ocr_text = convert_document_to_text(content_file)
-
         # Construir content con toda la información para búsquedas semánticas
         content = f"{document.title} {document.description} {document.category} {ocr_text or ''}".strip()
         
@@ -423,6 +935,8 @@ def process_document_async(document_id: int) -> bool:
             "filename": document.file.name,
             "status": "success",
             "content_length": len(content),
+            "bytes_read": 0 if used_converted_text else bytes_downloaded,
+            "rss_peak_mb": _peak_rss_mb(),
             "elapsed_ms": (datetime.now() - start_time).total_seconds() * 1000
         }))
         
@@ -453,43 +967,37 @@ def process_document_async(document_id: int) -> bool:
         document.processing_state = ProcessingState.INDEXING
         document.save()
         
-        chunk_texts, chunk_mode = split_text_into_chunks(
-            content,
-            max_chars=DEFAULT_CHUNK_MAX_CHARS,
-            overlap_segments=DEFAULT_CHUNK_OVERLAP_SEGMENTS
-        )
-        if not chunk_texts:
-            chunk_texts = [content]
-            chunk_mode = GENERIC_CHUNK_MODE
+        chunk_texts, chunk_mode, chunking_config = chunk_document_text(content)
 
         total_chunks = len(chunk_texts)
         source_id = f"doc_{document.id}"
 
-        # Intentar limpiar cualquier índice previo (legacy)
-        try:
-            search_index_service.delete_document(source_id)
-        except Exception:
-            pass
+        new_chunk_ids = [
+            source_id if total_chunks == 1 else f"{source_id}_chunk_{idx:03d}"
+            for idx in range(total_chunks)
+        ]
 
-        # También limpiar posibles chunks antiguos usando metadata existente
+        # Limpiar índice previo (legacy) y chunks antiguos en una sola operación por lotes.
+        # Los IDs que se vuelven a escribir no se borran: upload_documents reemplaza el documento.
         existing_chunk_ids = get_document_chunk_ids(document.id, document.metadata)
-        for old_chunk_id in existing_chunk_ids:
-            if old_chunk_id != source_id:  # ya se intentó eliminar arriba
-                try:
-                    search_index_service.delete_document(old_chunk_id)
-                except Exception:
-                    pass
+        stale_ids = [
+            chunk_id for chunk_id in dict.fromkeys([source_id, *existing_chunk_ids])
+            if chunk_id not in new_chunk_ids
+        ]
+        if stale_ids:
+            try:
+                search_index_service.delete_documents(stale_ids)
+            except Exception:
+                pass
 
         vector_lengths: List[int] = []
-        index_success = True
         
         logger.info(json.dumps({
             "stage": "chunking",
             "doc_id": str(document.id),
             "filename": document.file.name,
             "chunks": total_chunks,
-            "max_chars": DEFAULT_CHUNK_MAX_CHARS,
-            "overlap_segments": DEFAULT_CHUNK_OVERLAP_SEGMENTS
+            **chunking_config
         }))
         
         # Paso 5: Indexar en Azure Search con chunks
@@ -507,12 +1015,17 @@ def process_document_async(document_id: int) -> bool:
                 created_dt = timezone.now()
         created_at_iso = created_dt.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
         
+        # Embeddings: reutilizar el almacén por contenido y generar por lotes solo los nuevos
+        chunk_vectors, batch_stats, store_stats = resolve_chunk_embeddings(chunk_texts)
+
+        index_documents: List[Dict[str, Any]] = []
         for idx, chunk_text in enumerate(chunk_texts):
-            chunk_id = document_vector_id if total_chunks == 1 else f"{document_vector_id}_chunk_{idx:03d}"
+            chunk_id = new_chunk_ids[idx]
 
             chunk_metadata_payload = {
                 'title': document.title,
                 'created_at': created_at_iso,
+                'source_type': SOURCE_TYPE_DOCUMENT,
                 'metadata': json.dumps({
                     'category': document.category,
                     'description': document.description,
@@ -525,17 +1038,17 @@ def process_document_async(document_id: int) -> bool:
                 })
             }
 
-            vector = generate_embeddings(chunk_text)
+            vector = chunk_vectors[idx]
             vector_lengths.append(len(vector) if isinstance(vector, list) else 0)
             if isinstance(vector, list) and vector:
                 chunk_metadata_payload['embedding'] = vector
 
-            chunk_success = search_index_service.upsert_document(
-                chunk_id,
-                chunk_text,
-                chunk_metadata_payload
-            )
-            index_success = index_success and chunk_success
+            index_documents.append({'id': chunk_id, 'content': chunk_text, **chunk_metadata_payload})
+
+        # Indexación por lotes: pocas peticiones aunque el documento tenga muchos chunks
+        index_status = search_index_service.upsert_documents(index_documents)
+        index_success = bool(index_status) and all(index_status.values())
+        recorded_hashes = indexed_chunk_hashes(index_documents, index_status)
 
         logger.info(json.dumps({
             "stage": "embeddings",
@@ -544,6 +1057,8 @@ def process_document_async(document_id: int) -> bool:
             "status": "success" if index_success else "partial",
             "chunks": total_chunks,
             "vector_lengths": vector_lengths,
+            "batches": batch_stats,
+            "embedding_store": store_stats,
             "elapsed_ms": (datetime.now() - start_time).total_seconds() * 1000
         }))
         
@@ -554,11 +1069,10 @@ def process_document_async(document_id: int) -> bool:
             doc_metadata = document.metadata if isinstance(document.metadata, dict) else {}
             doc_metadata = doc_metadata or {}
             doc_metadata['chunking'] = {
-                'version': CHUNK_VERSION,
+                **chunking_config,
                 'chunk_count': total_chunks,
-                'max_chars': DEFAULT_CHUNK_MAX_CHARS,
-                'overlap_segments': DEFAULT_CHUNK_OVERLAP_SEGMENTS,
                 'mode': chunk_mode,
+                **recorded_hashes,
                 'last_indexed_at': timezone.now().isoformat()
             }
             document.metadata = doc_metadata
@@ -619,59 +1133,19 @@ def convert_document_to_text(file_content: ContentFile) -> str:
         str: Texto extraído del documento
     """
     try:
-        import tempfile
-        import os
-        from apps.vision.azure_vision_service import AzureVisionService
-        
         # Crear archivo temporal para procesar
         safe_name = getattr(file_content, 'name', None)
         # Crear archivo temporal para procesar (usar extensión si está disponible)
         with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(safe_name or '')[1]) as temp_file:
-            temp_file.write(file_content.read())
+            if hasattr(file_content, 'chunks'):
+                for chunk in file_content.chunks():
+                    temp_file.write(chunk)
+            else:
+                temp_file.write(file_content.read())
             temp_file_path = temp_file.name
         
         try:
-            # Inicializar servicio de Azure Vision
-            vision_service = AzureVisionService()
-            
-            # Determinar extensión real (preferir la del nombre, si no la del temp)
-            ext = os.path.splitext(safe_name or '')[1].lower() or os.path.splitext(temp_file_path)[1].lower()
-            filename = (safe_name or os.path.basename(temp_file_path)).lower()
-            
-            # Extraer texto según el tipo de archivo
-            if ext == '.txt':
-                with open(temp_file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            elif ext == '.pdf':
-                content = vision_service.extract_text_from_pdf(temp_file_path)
-                try:
-                    import fitz  # type: ignore
-                    with fitz.open(temp_file_path) as pdf_doc:
-                        fallback_text = [page.get_text("text") for page in pdf_doc]
-                    fallback_combined = "\n".join(fallback_text).strip()
-                    if fallback_combined and len(fallback_combined) > len(content or ""):
-                        logger.info(
-                            "Fallback PyMuPDF used for PDF %s (length %s -> %s)",
-                            filename,
-                            len(content or ""),
-                            len(fallback_combined),
-                        )
-                        content = fallback_combined
-                except ImportError:
-                    logger.warning("PyMuPDF not installed; cannot apply PDF fallback for %s", filename)
-                except Exception as fallback_exc:
-                    logger.warning("PyMuPDF fallback failed for %s: %s", filename, fallback_exc)
-            elif ext in ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.tif'):
-                content = vision_service.extract_text_from_image(temp_file_path)
-            elif ext in ('.doc', '.docx'):
-                # Por ahora, placeholder para documentos de Word
-                content = f"Contenido extraído de Word: {filename}"
-            else:
-                content = f"Contenido del archivo: {filename}"
-            
-            logger.info(f"Texto extraído exitosamente de {filename}, longitud: {len(content)}")
-            return content
-            
+            return convert_file_to_text(temp_file_path, safe_name)
         finally:
             # Limpiar archivo temporal
             if os.path.exists(temp_file_path):
@@ -682,6 +1156,176 @@ def convert_document_to_text(file_content: ContentFile) -> str:
         return f"Error al extraer contenido: {str(e)}"
 
 
+def _extractor_version(ext: str) -> str:
+    """Versión del extractor para la caché de conversión (incluye la estrategia de PDF)."""
+    if ext == '.pdf':
+        strategy = getattr(settings, 'PDF_EXTRACTION_STRATEGY', 'local_first')
+        min_chars = getattr(settings, 'PDF_LOCAL_MIN_CHARS_PER_PAGE', 100)
+        return f"v{EXTRACTOR_VERSION}:pdf:{strategy}:{min_chars}"
+    return f"v{EXTRACTOR_VERSION}:image"
+
+
+def convert_file_to_text(file_path: str, original_name: Optional[str] = None) -> str:
+    """
+    Extrae el texto de un archivo en disco (los extractores lo leen por ruta)
+    
+    Para PDF e imágenes se consulta antes la caché de conversión por SHA-256 del
+    archivo, de modo que el mismo archivo no vuelve a pasar por Vision/Form Recognizer.
+    
+    Args:
+        file_path: Ruta del archivo
+        original_name: Nombre original (determina la extensión si el archivo no la tiene)
+        
+    Returns:
+        str: Texto extraído del documento
+    """
+    try:
+        from apps.vision.azure_vision_service import AzureVisionService
+        from apps.documents import conversion_cache
+        
+        # Determinar extensión real (preferir la del nombre, si no la del archivo)
+        ext = os.path.splitext(original_name or '')[1].lower() or os.path.splitext(file_path)[1].lower()
+        filename = (original_name or os.path.basename(file_path)).lower()
+        
+        content_sha256 = None
+        extractor_version = None
+        if ext in CONVERSION_CACHE_EXTENSIONS and conversion_cache.is_cache_enabled():
+            content_sha256 = conversion_cache.file_sha256(file_path)
+            extractor_version = _extractor_version(ext)
+            cached = conversion_cache.get_cached_text(content_sha256, extractor_version)
+            if cached is not None:
+                logger.info(
+                    f"Texto recuperado de la caché de conversión para {filename} "
+                    f"(sha256={content_sha256[:12]}), longitud: {len(cached)}"
+                )
+                return cached
+        
+        # Extraer texto según el tipo de archivo
+        outcome: Dict[str, Any] = {}
+        if ext == '.txt':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        elif ext == '.pdf':
+            strategy = getattr(settings, 'PDF_EXTRACTION_STRATEGY', 'local_first')
+            content = extract_pdf_text_local_first(file_path, filename, outcome) if strategy == 'local_first' else None
+            if content is None:
+                content = _extract_pdf_text_remote_first(file_path, filename)
+        elif ext in ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.tif'):
+            content = AzureVisionService().extract_text_from_image(file_path)
+        elif ext in ('.doc', '.docx'):
+            # Por ahora, placeholder para documentos de Word
+            content = f"Contenido extraído de Word: {filename}"
+        else:
+            content = f"Contenido del archivo: {filename}"
+        
+        # No cachear resultados vacíos ni parciales (OCR caído): se reintentarán en la próxima subida
+        if content_sha256 and content and content.strip() and not outcome.get('degraded'):
+            conversion_cache.store_text(content_sha256, extractor_version, content, filename)
+        
+        logger.info(f"Texto extraído exitosamente de {filename}, longitud: {len(content)}")
+        return content
+            
+    except Exception as e:
+        logger.error(f"Error convirtiendo documento {original_name or file_path}: {str(e)}")
+        return f"Error al extraer contenido: {str(e)}"
+
+
+def _extract_pdf_text_remote_first(file_path: str, filename: str) -> str:
+    """Form Recognizer sobre todo el PDF y PyMuPDF como respaldo (comportamiento anterior)."""
+    from apps.vision.azure_vision_service import AzureVisionService
+
+    content = AzureVisionService().extract_text_from_pdf(file_path)
+    try:
+        import fitz  # type: ignore
+        with fitz.open(file_path) as pdf_doc:
+            fallback_text = [page.get_text("text") for page in pdf_doc]
+        fallback_combined = "\n".join(fallback_text).strip()
+        if fallback_combined and len(fallback_combined) > len(content or ""):
+            logger.info(
+                "Fallback PyMuPDF used for PDF %s (length %s -> %s)",
+                filename,
+                len(content or ""),
+                len(fallback_combined),
+            )
+            content = fallback_combined
+    except ImportError:
+        logger.warning("PyMuPDF not installed; cannot apply PDF fallback for %s", filename)
+    except Exception as fallback_exc:
+        logger.warning("PyMuPDF fallback failed for %s: %s", filename, fallback_exc)
+    return content
+
+
+def _page_text_density(text: str) -> int:
+    """Densidad de texto de una página: caracteres alfanuméricos extraídos."""
+    return sum(1 for ch in text if ch.isalnum())
+
+
+def extract_pdf_text_local_first(
+    file_path: str,
+    filename: str,
+    outcome: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """
+    Extrae el texto de un PDF con PyMuPDF y envía a Form Recognizer solo las páginas escaneadas
+    
+    Una página se considera escaneada cuando su densidad de texto embebido está por
+    debajo de PDF_LOCAL_MIN_CHARS_PER_PAGE. Si Form Recognizer falla o no devuelve
+    texto para una página, se conserva el texto local.
+    
+    Args:
+        file_path: Ruta del PDF
+        filename: Nombre para logs
+        outcome: Si se pasa, recibe degraded=True cuando Form Recognizer falló
+        
+    Returns:
+        Optional[str]: Texto del documento, o None si PyMuPDF no está disponible
+        o no puede abrir el archivo (se usa entonces la estrategia remota)
+    """
+    start = time.perf_counter()
+    try:
+        import fitz  # type: ignore
+        with fitz.open(file_path) as pdf_doc:
+            local_pages = [page.get_text("text") for page in pdf_doc]
+    except ImportError:
+        logger.warning("PyMuPDF not installed; using Form Recognizer for the whole PDF %s", filename)
+        return None
+    except Exception as e:
+        logger.warning("PyMuPDF could not open %s, using Form Recognizer: %s", filename, e)
+        return None
+
+    min_chars = getattr(settings, 'PDF_LOCAL_MIN_CHARS_PER_PAGE', 100)
+    remote_pages = [
+        number for number, text in enumerate(local_pages, start=1)
+        if _page_text_density(text) < min_chars
+    ]
+
+    remote_texts: Dict[int, str] = {}
+    if remote_pages:
+        try:
+            from apps.vision.azure_vision_service import AzureVisionService
+            remote_texts = AzureVisionService().extract_pages_from_pdf(file_path, remote_pages)
+        except Exception as e:
+            logger.warning("Form Recognizer failed for scanned pages of %s, keeping local text: %s", filename, e)
+            if outcome is not None:
+                outcome['degraded'] = True
+
+    pages = []
+    for number, local_text in enumerate(local_pages, start=1):
+        remote_text = remote_texts.get(number) or ""
+        pages.append(remote_text if len(remote_text.strip()) > len(local_text.strip()) else local_text)
+
+    logger.info(json.dumps({
+        "stage": "pdf_extraction",
+        "filename": filename,
+        "strategy": "local_first",
+        "pages": len(local_pages),
+        "remote_pages": remote_pages,
+        "remote_pages_count": len(remote_pages),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }))
+    return "\n".join(pages).strip()
+
+
 def generate_embeddings(text: str) -> List[float]:
     """
     Genera embeddings para el texto
@@ -706,6 +1350,183 @@ def generate_embeddings(text: str) -> List[float]:
         return []
 
 
+def _estimate_tokens(text: str) -> int:
+    """Estimación conservadora de tokens (~3 caracteres por token en español)."""
+    return max(1, (len(text) + 2) // 3)
+
+
+def _build_embedding_batches(
+    texts: List[str],
+    indices: List[int],
+    max_inputs: int,
+    max_tokens: int
+) -> List[List[int]]:
+    """
+    Agrupa índices de textos en lotes respetando el máximo de entradas
+    y el presupuesto de tokens por petición.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for idx in indices:
+        tokens = _estimate_tokens(texts[idx])
+        if current and (len(current) >= max_inputs or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(idx)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def generate_embeddings_batch(
+    texts: List[str],
+    max_inputs: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> Tuple[List[List[float]], List[Dict[str, Any]]]:
+    """
+    Genera embeddings para varios textos con peticiones multi-input concurrentes.
+
+    Si un lote falla, sus textos se procesan uno a uno con generate_embeddings
+    (mismo comportamiento que el flujo por chunk).
+
+    Args:
+        texts: Textos a procesar, en orden
+        max_inputs: Máximo de textos por petición
+        max_tokens: Presupuesto aproximado de tokens por petición
+        max_workers: Máximo de peticiones simultáneas
+
+    Returns:
+        Tuple[List[List[float]], List[Dict]]: Vectores alineados con texts
+        ([] si no se pudo generar) y estadísticas por lote
+    """
+    vectors, stats, _ = _generate_embeddings_batches(texts, max_inputs, max_tokens, max_workers)
+    return vectors, stats
+
+
+def _generate_embeddings_batches(
+    texts: List[str],
+    max_inputs: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> Tuple[List[List[float]], List[Dict[str, Any]], List[List[int]]]:
+    """generate_embeddings_batch que además devuelve los índices de cada lote (alineados con las estadísticas)."""
+    vectors: List[List[float]] = [[] for _ in texts]
+    pending = [i for i, t in enumerate(texts) if t and t.strip()]
+    if not pending:
+        return vectors, [], []
+
+    max_inputs = max(1, max_inputs or getattr(settings, 'EMBEDDINGS_BATCH_MAX_INPUTS', 16))
+    max_tokens = max(1, max_tokens or getattr(settings, 'EMBEDDINGS_BATCH_MAX_TOKENS', 8000))
+    max_workers = max(1, max_workers or getattr(settings, 'EMBEDDINGS_MAX_WORKERS', 4))
+
+    try:
+        from apps.embeddings.openai_service import OpenAIService
+        svc = OpenAIService()
+    except Exception as e:
+        logger.warning(f"OpenAIService no disponible para lotes: {str(e)}")
+        svc = None
+
+    batches = _build_embedding_batches(texts, pending, max_inputs, max_tokens)
+
+    def _run_batch(batch_no: int, indices: List[int]):
+        batch_start = time.perf_counter()
+        batch_texts = [texts[i] for i in indices]
+        # "dummy": el servicio no está configurado y devuelve vectores de prueba
+        mode = "batch" if getattr(svc, 'is_configured', False) else "dummy"
+        try:
+            if svc is None:
+                raise RuntimeError("OpenAIService no inicializado")
+            result = svc.generate_embeddings(batch_texts)
+        except Exception as e:
+            logger.warning(f"Lote de embeddings {batch_no} falló, fallback por chunk: {str(e)}")
+            result = [generate_embeddings(t) for t in batch_texts]
+            mode = "per_chunk"
+        stat = {
+            "batch": batch_no,
+            "size": len(indices),
+            "mode": mode,
+            "elapsed_ms": round((time.perf_counter() - batch_start) * 1000, 2),
+        }
+        return indices, result, stat
+
+    stats: List[Dict[str, Any]] = []
+    batch_indices: List[List[int]] = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+        futures = [executor.submit(_run_batch, n, b) for n, b in enumerate(batches)]
+        for future in futures:
+            indices, result, stat = future.result()
+            for i, vec in zip(indices, result):
+                vectors[i] = vec if isinstance(vec, list) and vec else []
+            stats.append(stat)
+            batch_indices.append(indices)
+
+    return vectors, stats, batch_indices
+
+
+def resolve_chunk_embeddings(
+    texts: List[str]
+) -> Tuple[List[List[float]], List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Obtiene los embeddings de los chunks reutilizando el almacén por contenido.
+
+    Solo se envían a Azure OpenAI los chunks cuyo hash (texto normalizado +
+    deployment) no está almacenado; se persisten los vectores nuevos de cada lote
+    generado con el servicio real (nunca dummies ni lotes con fallback por chunk).
+
+    Args:
+        texts: Textos de los chunks, en orden
+
+    Returns:
+        Tuple: vectores alineados con texts, estadísticas por lote y
+        estadísticas del almacén (hits, misses, hit_ratio)
+    """
+    from apps.embeddings import embedding_store
+
+    deployment = embedding_store.get_embeddings_deployment()
+    if not embedding_store.is_store_enabled() or not deployment:
+        vectors, batch_stats = generate_embeddings_batch(texts)
+        return vectors, batch_stats, {"enabled": False}
+
+    hashes = [embedding_store.chunk_content_hash(t, deployment) if t and t.strip() else '' for t in texts]
+    stored = embedding_store.get_stored_embeddings(hashes, deployment)
+
+    vectors: List[List[float]] = [stored.get(h, []) if h else [] for h in hashes]
+    miss_indices = [i for i, h in enumerate(hashes) if h and h not in stored]
+
+    batch_stats: List[Dict[str, Any]] = []
+    if miss_indices:
+        new_vectors, batch_stats, batch_indices = _generate_embeddings_batches([texts[i] for i in miss_indices])
+        for i, vec in zip(miss_indices, new_vectors):
+            vectors[i] = vec
+        # Por lote: un lote con fallback no impide guardar los vectores de los demás
+        to_store = {}
+        for stat, indices in zip(batch_stats, batch_indices):
+            if stat.get("mode") != "batch":
+                continue
+            for j in indices:
+                i = miss_indices[j]
+                if vectors[i]:
+                    to_store[hashes[i]] = vectors[i]
+        if to_store:
+            embedding_store.store_embeddings(to_store, deployment)
+
+    lookups = sum(1 for h in hashes if h)
+    hits = lookups - len(miss_indices)
+    store_stats = {
+        "enabled": True,
+        "hits": hits,
+        "misses": len(miss_indices),
+        "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+    }
+    return vectors, batch_stats, store_stats
+
+
 # @shared_task
 def reprocess_document(document_id: int) -> bool:
     """
@@ -728,8 +1549,7 @@ def reprocess_document(document_id: int) -> bool:
         
         # Eliminar del índice de búsqueda
         chunk_ids = get_document_chunk_ids(document.id, document.metadata)
-        for chunk_id in chunk_ids:
-            search_index_service.delete_document(chunk_id)
+        search_index_service.delete_documents(chunk_ids)
         
         # Reprocesar (comentado ya que no es una tarea de Celery)
         # return process_document_async.delay(document_id)
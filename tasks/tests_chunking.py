@@ -0,0 +1,164 @@
+"""
+Golden tests for split_text_into_chunks.
+
+The expected chunks in fixtures/chunking_golden.json were produced by the
+original (quadratic) chunker; the linear implementation must reproduce them
+byte for byte. Regenerate only when the chunking output is meant to change
+(and bump CHUNK_VERSION):
+
+    python tasks/tests_chunking.py --regenerate
+"""
+
+import hashlib
+import json
+import random
+import sys
+import unittest
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+if __name__ == '__main__':
+    import os
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.test')
+    django.setup()
+
+from tasks.document_pipeline import split_text_into_chunks  # noqa: E402
+
+GOLDEN_PATH = Path(__file__).resolve().parent / 'fixtures' / 'chunking_golden.json'
+
+WORDS = [
+    'iglesia', 'culto', 'jóvenes', 'oración', 'ministerio', 'donación', 'evento', 'Dios',
+    'comunidad', 'alabanza', 'estudio', 'bíblico', 'domingo', 'reunión', 'servicio', 'a',
+    'de', 'la', 'el', 'en', 'y', 'con', 'para', 'Ñandú', 'ÁREA', '2025', '10:30',
+]
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    words[0] = words[0].capitalize()
+    return ' '.join(words) + rng.choice(['.', '.', '.', '?', '!', ':', ''])
+
+
+def _faq_text(rng: random.Random) -> str:
+    """Documento FAQ: cada bloque empieza con numeración o pregunta."""
+    sections = []
+    for n in range(rng.randint(1, 15)):
+        header = f"{n + 1}. {_sentence(rng, 2, 6)}" if rng.random() < 0.5 else f"¿{_sentence(rng, 2, 6).rstrip('.?!:')}?"
+        answer = [_sentence(rng, 3, 40) for _ in range(rng.randint(0, 4))]
+        sections.append('\n'.join([header, *answer]))
+    return rng.choice(['\n', '\n\n', '\n \n']).join(sections)
+
+
+def _fuzz_text(rng: random.Random) -> str:
+    """Texto sintético con párrafos, encabezados, FAQ y espacios raros de OCR."""
+    if rng.random() < 0.25:
+        return _faq_text(rng)
+    blocks = []
+    for _ in range(rng.randint(1, 12)):
+        kind = rng.random()
+        if kind < 0.15:
+            blocks.append(f"{rng.randint(1, 9)}. {_sentence(rng, 2, 8)}")
+        elif kind < 0.3:
+            blocks.append(f"¿{_sentence(rng, 2, 8).rstrip('.?!:')}?")
+        elif kind < 0.4:
+            # Oración larga sin puntos (ruta de corte por palabras)
+            blocks.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(50, 400))))
+        elif kind < 0.45:
+            blocks.append('x' * rng.randint(100, 1500))
+        else:
+            sentences = [_sentence(rng, 3, 30) for _ in range(rng.randint(1, 8))]
+            blocks.append(' '.join(sentences))
+    separators = ['\n\n', '\n', '\n\n\n', ' \n ', '\r\n\r\n', '\n \n', '\t\n\n', ' \x0c ', '\xa0\n\n']
+    text = ''
+    for block in blocks:
+        text += block + rng.choice(separators)
+    return text
+
+
+def _handwritten_cases():
+    return [
+        ('empty', '', 1000, 1),
+        ('whitespace', ' \n\t \r\n ', 1000, 1),
+        ('short', 'Hola mundo.', 1000, 1),
+        ('faq_numbered', '1. ¿Qué es VEA?\nUna comunidad.\n2. ¿Dónde?\nEn el templo principal.\n3. Horarios\nDomingo 10:00.', 1000, 1),
+        ('faq_questions', '¿Hay culto hoy?\nSí, a las 18:00.\n¿Y mañana?\n¿Quién predica?\nEl pastor.', 40, 1),
+        ('faq_not_faq', 'Introducción\n1. Primer punto\ntexto', 1000, 1),
+        ('generic_headers', 'Horarios:\n\nDomingo 10:00 y 18:00.\n\n¿Dónde?\n\nTemplo principal.\n\nFin.', 30, 1),
+        ('long_sentence', ' '.join(['palabra'] * 300), 100, 1),
+        ('long_word', 'Inicio. ' + 'a' * 250 + ' fin de texto.', 100, 0),
+        ('ocr_whitespace', 'Primera línea \n segunda línea \n \n tercera\x0c cuarta \xa0 quinta. ' * 20, 80, 2),
+        ('sentences', ' '.join(f'Oración número {i} del párrafo.' for i in range(200)), 250, 1),
+        ('overlap_zero', '\n\n'.join(f'Párrafo {i} con algo de texto.' for i in range(50)), 120, 0),
+        ('overlap_three', '\n\n'.join(f'Párrafo {i} con algo de texto.' for i in range(50)), 120, 3),
+    ]
+
+
+def _fuzz_cases(count: int = 300):
+    rng = random.Random(20250810)
+    cases = []
+    for n in range(count):
+        text = _fuzz_text(rng)
+        max_chars = rng.choice([40, 80, 200, 500, 1000])
+        overlap = rng.choice([0, 1, 1, 2])
+        cases.append((f'fuzz_{n:03d}', text, max_chars, overlap))
+    return cases
+
+
+def _digest(chunks) -> str:
+    return hashlib.sha256(json.dumps(chunks, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def build_golden():
+    golden = {'handwritten': {}, 'fuzz': {}}
+    for name, text, max_chars, overlap in _handwritten_cases():
+        chunks, mode = split_text_into_chunks(text, max_chars=max_chars, overlap_segments=overlap)
+        golden['handwritten'][name] = {'mode': mode, 'chunks': chunks}
+    for name, text, max_chars, overlap in _fuzz_cases():
+        chunks, mode = split_text_into_chunks(text, max_chars=max_chars, overlap_segments=overlap)
+        golden['fuzz'][name] = {'mode': mode, 'count': len(chunks), 'sha256': _digest(chunks)}
+    return golden
+
+
+class ChunkingGoldenTest(unittest.TestCase):
+    """The chunker output must not change for FAQ and generic inputs."""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(GOLDEN_PATH, 'r', encoding='utf-8') as f:
+            cls.golden = json.load(f)
+
+    def test_handwritten_cases(self):
+        for name, text, max_chars, overlap in _handwritten_cases():
+            with self.subTest(case=name):
+                chunks, mode = split_text_into_chunks(text, max_chars=max_chars, overlap_segments=overlap)
+                expected = self.golden['handwritten'][name]
+                self.assertEqual(mode, expected['mode'])
+                self.assertEqual(chunks, expected['chunks'])
+
+    def test_fuzz_cases(self):
+        modes = set()
+        for name, text, max_chars, overlap in _fuzz_cases():
+            with self.subTest(case=name):
+                chunks, mode = split_text_into_chunks(text, max_chars=max_chars, overlap_segments=overlap)
+                expected = self.golden['fuzz'][name]
+                modes.add(mode)
+                self.assertEqual(mode, expected['mode'])
+                self.assertEqual(len(chunks), expected['count'])
+                self.assertEqual(_digest(chunks), expected['sha256'])
+        # El corpus cubre ambos modos
+        self.assertEqual(modes, {'faq', 'generic'})
+
+
+if __name__ == '__main__':
+    if '--regenerate' in sys.argv:
+        GOLDEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(build_golden(), f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"Golden file written: {GOLDEN_PATH}")
+    else:
+        unittest.main()
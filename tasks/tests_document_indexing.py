@@ -0,0 +1,216 @@
+"""
+End-to-end tests for the document indexing paths (upload, edit and the async
+pipeline) with Azure Search, Blob Storage and the embeddings service mocked.
+
+The chunking tests only exercise the chunker itself; these go through the
+views and process_document_async so that a broken call site (for example a
+local name shadowing a helper) fails here instead of in production.
+
+    python manage.py test tasks.tests_document_indexing --settings=config.settings.test
+"""
+
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.documents.models import Document, ProcessingState
+from tasks import document_pipeline
+from tasks.document_pipeline import process_document_async, reindex_document_chunks
+
+EXTRACTED_TEXT = 'Horario de servicios: domingo a las 10:00.'
+
+
+def _fake_embeddings(texts):
+    return [[0.1, 0.2, 0.3] for _ in texts], [{'size': len(texts), 'status': 'success'}]
+
+
+def _fake_search_service():
+    search = mock.Mock()
+    search.client = object()
+    search.upsert_documents.side_effect = lambda docs: {doc['id']: True for doc in docs}
+    search.merge_documents.side_effect = lambda docs: {doc['id']: True for doc in docs}
+    search.delete_documents.side_effect = lambda ids: {doc_id: True for doc_id in ids}
+    return search
+
+
+class DocumentIndexingTest(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.search = _fake_search_service()
+        self.embeddings = mock.Mock(side_effect=_fake_embeddings)
+        self.storage = mock.Mock()
+        patches = [
+            mock.patch('apps.documents.views.search_index_service', self.search),
+            mock.patch.object(document_pipeline, 'search_index_service', self.search),
+            mock.patch('apps.documents.views.azure_storage', self.storage),
+            mock.patch.object(document_pipeline, 'azure_storage', self.storage),
+            mock.patch('apps.documents.views.convert_document_to_text', return_value=EXTRACTED_TEXT),
+            mock.patch.object(document_pipeline, 'convert_file_to_text', return_value=EXTRACTED_TEXT),
+            mock.patch.object(document_pipeline, 'generate_embeddings_batch', self.embeddings),
+            mock.patch('apps.embeddings.embedding_store.is_store_enabled', return_value=False),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = get_user_model().objects.create_user(email='tester@example.com', password='x')
+        self.client.force_login(self.user)
+
+    def _indexed_documents(self):
+        return [doc for call in self.search.upsert_documents.call_args_list for doc in call.args[0]]
+
+    def test_upload_document_indexes_chunks(self):
+        response = self.client.post(reverse('documents:create'), {
+            'title': 'Horarios',
+            'description': 'Servicios dominicales',
+            'category': Document.CATEGORY_CHOICES[0][0],
+            'file': SimpleUploadedFile('horarios.txt', b'contenido', content_type='text/plain'),
+        })
+
+        self.assertEqual(response.status_code, 302)
+        document = Document.objects.get()
+        self.assertEqual(document.processing_state, ProcessingState.READY)
+        indexed = self._indexed_documents()
+        self.assertTrue(indexed)
+        self.assertIn(EXTRACTED_TEXT, indexed[0]['content'])
+        self.assertEqual(indexed[0]['embedding'], [0.1, 0.2, 0.3])
+        self.assertEqual(document.metadata['chunking']['chunk_count'], len(indexed))
+
+    def test_edit_document_reindexes_chunks(self):
+        document = Document.objects.create(
+            title='Horarios',
+            description='Servicios dominicales',
+            category=Document.CATEGORY_CHOICES[0][0],
+            file='documents/1.txt',
+            user=self.user,
+        )
+
+        response = self.client.post(reverse('documents:edit', args=[document.pk]), {
+            'title': 'Horarios actualizados',
+            'description': 'Servicios dominicales',
+            'category': document.category,
+            'file': SimpleUploadedFile('horarios.txt', b'contenido', content_type='text/plain'),
+        })
+
+        self.assertEqual(response.status_code, 302)
+        document.refresh_from_db()
+        self.assertEqual(document.processing_state, ProcessingState.READY)
+        indexed = self._indexed_documents()
+        self.assertTrue(indexed)
+        self.assertTrue(indexed[0]['content'].startswith('Horarios actualizados'))
+        self.assertEqual(document.metadata['chunking']['chunk_count'], len(indexed))
+
+    def test_process_document_async_indexes_chunks(self):
+        document = Document.objects.create(
+            title='Horarios',
+            description='Servicios dominicales',
+            category=Document.CATEGORY_CHOICES[0][0],
+            file='documents/horarios.txt',
+        )
+        downloaded = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
+        downloaded.write(b'contenido')
+        downloaded.close()
+        self.storage.resolve_blob_name.return_value = 'documents/horarios.txt'
+        self.storage.download_to_tempfile.return_value = downloaded.name
+
+        self.assertTrue(process_document_async(document.id))
+
+        document.refresh_from_db()
+        self.assertEqual(document.processing_state, ProcessingState.READY)
+        indexed = self._indexed_documents()
+        self.assertTrue(indexed)
+        self.assertIn(EXTRACTED_TEXT, indexed[0]['content'])
+        self.assertEqual(document.metadata['chunking']['chunk_count'], len(indexed))
+
+
+def _chunk_documents(contents, title='Horarios', description='Servicios dominicales'):
+    """Documentos de chunks con la misma forma que arma edit_document."""
+    source_id = 'doc_7'
+    return [
+        {
+            'id': source_id if len(contents) == 1 else f"{source_id}_chunk_{idx:03d}",
+            'content': content,
+            'title': title,
+            'source_type': 'document',
+            'metadata': json.dumps({
+                'description': description,
+                'source_id': source_id,
+                'chunk_index': idx,
+                'chunk_count': len(contents),
+            }),
+        }
+        for idx, content in enumerate(contents)
+    ]
+
+
+class IncrementalReindexTest(SimpleTestCase):
+
+    CONTENTS = ['Domingo 10:00 culto.', 'Miércoles 19:00 oración.', 'Viernes 20:00 jóvenes.', 'Sábado 18:00 célula.']
+
+    def setUp(self):
+        self.search = _fake_search_service()
+        self.embeddings = mock.Mock(side_effect=_fake_embeddings)
+        patches = [
+            mock.patch.object(document_pipeline, 'search_index_service', self.search),
+            mock.patch.object(document_pipeline, 'generate_embeddings_batch', self.embeddings),
+            mock.patch('apps.embeddings.embedding_store.is_store_enabled', return_value=False),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        hashes, _ = reindex_document_chunks(7, _chunk_documents(self.CONTENTS), None)
+        self.metadata = {'chunking': {'chunk_count': len(self.CONTENTS), **hashes}}
+        self.search.reset_mock()
+        self.embeddings.reset_mock()
+
+    def _upserted_ids(self):
+        return [doc['id'] for call in self.search.upsert_documents.call_args_list for doc in call.args[0]]
+
+    def test_editing_one_chunk_upserts_only_that_chunk(self):
+        contents = list(self.CONTENTS)
+        contents[2] = 'Viernes 20:30 jóvenes.'
+
+        _, stats = reindex_document_chunks(7, _chunk_documents(contents), self.metadata)
+
+        self.assertEqual(self._upserted_ids(), ['doc_7_chunk_002'])
+        self.assertEqual(self.embeddings.call_args.args[0], ['Viernes 20:30 jóvenes.'])
+        self.search.merge_documents.assert_not_called()
+        self.search.delete_documents.assert_not_called()
+        self.assertEqual(stats['changed'], 1)
+
+    def test_removing_trailing_chunk_deletes_only_its_id(self):
+        _, stats = reindex_document_chunks(7, _chunk_documents(self.CONTENTS[:3]), self.metadata)
+
+        self.assertEqual(self._upserted_ids(), [])
+        self.embeddings.assert_not_called()
+        self.search.delete_documents.assert_called_once_with(['doc_7_chunk_003'])
+        # chunk_count cambió en los chunks restantes: solo se actualizan sus campos
+        merged = self.search.merge_documents.call_args.args[0]
+        self.assertEqual([doc['id'] for doc in merged], ['doc_7_chunk_000', 'doc_7_chunk_001', 'doc_7_chunk_002'])
+        self.assertTrue(all('embedding' not in doc and 'content' not in doc for doc in merged))
+        self.assertEqual(stats['merged'], 3)
+
+    def test_title_change_merges_fields_without_embedding(self):
+        hashes, stats = reindex_document_chunks(
+            7, _chunk_documents(self.CONTENTS, title='Horarios 2026'), self.metadata
+        )
+
+        self.assertEqual(self._upserted_ids(), [])
+        self.embeddings.assert_not_called()
+        merged = self.search.merge_documents.call_args.args[0]
+        self.assertEqual({doc['title'] for doc in merged}, {'Horarios 2026'})
+        self.assertEqual(hashes['chunk_hashes'], self.metadata['chunking']['chunk_hashes'])
+        self.assertEqual(stats['merged'], len(self.CONTENTS))
@@ -0,0 +1,149 @@
+"""
+Tests for the token budget chunker (CHUNKING_STRATEGY=tokens).
+
+Unlike the chars mode there is no golden file: the output depends on whether
+tiktoken is installed, so these tests check the invariants instead (no chunk
+over max_tokens, bounded overlap, FAQ sections and headings kept whole) and
+hold both with the tokenizer and with the ~3 chars/token estimate.
+
+    python tasks/tests_token_chunking.py
+"""
+
+import sys
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+if __name__ == '__main__':
+    import os
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.test')
+    django.setup()
+
+from django.test import override_settings  # noqa: E402
+
+from tasks import document_pipeline  # noqa: E402
+from tasks.document_pipeline import (  # noqa: E402
+    chunk_document_text,
+    chunking_is_current,
+    count_tokens,
+    split_text_into_chunks,
+)
+from tasks.tests_chunking import _fuzz_cases, _handwritten_cases  # noqa: E402
+
+
+def _shared_overlap(previous: str, current: str) -> str:
+    """Texto más largo que termina el chunk anterior y abre el siguiente."""
+    for size in range(min(len(previous), len(current)), 0, -1):
+        if previous.endswith(current[:size]):
+            return current[:size]
+    return ''
+
+
+class TokenChunkingTest(unittest.TestCase):
+
+    def test_no_chunk_exceeds_max_tokens(self):
+        cases = _handwritten_cases() + _fuzz_cases(100)
+        for max_tokens, overlap_tokens in [(16, 0), (16, 8), (64, 16), (256, 64)]:
+            for name, text, _, _ in cases:
+                with self.subTest(case=name, max_tokens=max_tokens, overlap_tokens=overlap_tokens):
+                    chunks, _ = split_text_into_chunks(text, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+                    for chunk in chunks:
+                        self.assertLessEqual(count_tokens(chunk), max_tokens)
+                        self.assertTrue(chunk.strip())
+
+    def test_overlap_is_bounded(self):
+        paragraphs = '\n\n'.join(f'Párrafo {i} con algo de texto.' for i in range(60))
+        sentences = ' '.join(f'Oración número {i} del párrafo largo.' for i in range(120))
+        for text in (paragraphs, sentences):
+            for overlap_tokens in (8, 24):
+                with self.subTest(text=text[:20], overlap_tokens=overlap_tokens):
+                    chunks, _ = split_text_into_chunks(text, max_tokens=64, overlap_tokens=overlap_tokens)
+                    self.assertGreater(len(chunks), 2)
+                    for previous, current in zip(chunks, chunks[1:]):
+                        shared = _shared_overlap(previous, current)
+                        self.assertTrue(shared)
+                        self.assertLessEqual(count_tokens(shared), overlap_tokens)
+
+    def test_no_overlap_when_disabled(self):
+        text = '\n\n'.join(f'Párrafo {i} con algo de texto.' for i in range(60))
+        chunks, _ = split_text_into_chunks(text, max_tokens=64, overlap_tokens=0)
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual('\n\n'.join(chunks), text)
+
+    def test_faq_sections_are_kept_whole(self):
+        sections = [f'{n}. ¿Pregunta número {n}?\nRespuesta corta a la pregunta {n}.' for n in range(1, 21)]
+        chunks, mode = split_text_into_chunks('\n'.join(sections), max_tokens=64, overlap_tokens=0)
+        self.assertEqual(mode, 'faq')
+        self.assertGreater(len(chunks), 1)
+        for section in sections:
+            self.assertTrue(any(section in chunk for chunk in chunks), section)
+
+    def test_heading_stays_with_its_paragraph(self):
+        filler = '\n\n'.join(f'Párrafo {i} con algo de texto.' for i in range(10))
+        text = f'{filler}\n\nHorarios:\n\nDomingo 10:00 y 18:00.\n\n{filler}'
+        chunks, mode = split_text_into_chunks(text, max_tokens=32, overlap_tokens=0)
+        self.assertEqual(mode, 'generic')
+        self.assertTrue(any('Horarios:\n\nDomingo 10:00 y 18:00.' in chunk for chunk in chunks))
+
+
+class ChunkingIsCurrentTest(unittest.TestCase):
+
+    @override_settings(CHUNKING_STRATEGY='tokens', CHUNK_MAX_TOKENS=512, CHUNK_OVERLAP_TOKENS=64)
+    def test_token_strategy(self):
+        _, _, config = chunk_document_text('Hola mundo.')
+        self.assertEqual(config['strategy'], 'tokens')
+        self.assertTrue(chunking_is_current({'chunking': config}))
+
+        self.assertFalse(chunking_is_current(None))
+        self.assertFalse(chunking_is_current({}))
+        self.assertFalse(chunking_is_current({'chunking': {**config, 'max_tokens': 256}}))
+        self.assertFalse(chunking_is_current({'chunking': {**config, 'version': 'old'}}))
+
+        with override_settings(CHUNKING_STRATEGY='chars'):
+            _, _, chars_config = chunk_document_text('Hola mundo.')
+        # Documentos chunked por caracteres (o sin 'strategy', previos al modo tokens) se migran
+        self.assertFalse(chunking_is_current({'chunking': chars_config}))
+        legacy = {k: v for k, v in chars_config.items() if k != 'strategy'}
+        self.assertFalse(chunking_is_current({'chunking': legacy}))
+        with override_settings(CHUNKING_STRATEGY='chars'):
+            self.assertTrue(chunking_is_current({'chunking': legacy}))
+
+
+class TokenEncoderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        patchers = [
+            mock.patch.dict(document_pipeline._token_encoders, clear=True),
+            mock.patch.dict(document_pipeline._token_encoder_retry_at, clear=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_transient_failure_is_retried_after_backoff(self):
+        encoder = mock.Mock()
+        encoder.encode.return_value = [1, 2, 3, 4, 5]
+        tiktoken = types.ModuleType('tiktoken')
+        tiktoken.get_encoding = mock.Mock(side_effect=[OSError('download failed'), encoder])
+
+        with mock.patch.dict(sys.modules, {'tiktoken': tiktoken}), \
+                mock.patch.object(document_pipeline.time, 'monotonic', return_value=1000.0) as monotonic:
+            self.assertIsNone(document_pipeline._get_token_encoder('test_encoding'))
+            # Dentro del backoff no se reintenta la descarga
+            self.assertEqual(count_tokens('abcdef', 'test_encoding'), 2)
+            self.assertEqual(tiktoken.get_encoding.call_count, 1)
+
+            monotonic.return_value = 1000.0 + document_pipeline.TOKEN_ENCODER_RETRY_SECONDS
+            self.assertIs(document_pipeline._get_token_encoder('test_encoding'), encoder)
+            self.assertEqual(count_tokens('abcdef', 'test_encoding'), 5)
+            self.assertEqual(tiktoken.get_encoding.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
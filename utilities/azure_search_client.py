@@ -11,9 +11,22 @@ import json
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 
+from utilities.hybrid_search import run_hybrid_search
+from utilities.search_filters import source_type_for_id
+from utilities.search_projection import get_select_fields
+
 logger = logging.getLogger(__name__)
 
 
+def _bump_index_generation() -> None:
+    """Invalida las respuestas RAG cacheadas tras escribir en el índice (utils.cache_layer)."""
+    try:
+        from utils.cache_layer import bump_index_generation
+        bump_index_generation()
+    except Exception as e:
+        logger.debug(f"Index generation not bumped: {e}")
+
+
 class AzureSearchClient:
     """
     Client for Azure AI Search operations.
@@ -102,7 +115,7 @@ class AzureSearchClient:
                     SimpleField(name="metadata", type="Edm.String"),
                     SimpleField(name="created_at", type="Edm.DateTimeOffset"),
                     SimpleField(name="updated_at", type="Edm.DateTimeOffset"),
-                    SimpleField(name="source_type", type="Edm.String"),
+                    SimpleField(name="source_type", type="Edm.String", filterable=True),
                     SimpleField(name="filename", type="Edm.String"),
                 ],
                 vector_search=VectorSearch(
@@ -136,6 +149,37 @@ class AzureSearchClient:
             logger.error(f"Failed to create search index: {e}")
             return False
     
+    def ensure_source_type_field(self) -> bool:
+        """
+        Add the filterable ``source_type`` field to an existing index.
+
+        Azure Search allows adding fields to an index but not changing the
+        attributes of an existing one: if ``source_type`` exists without
+        ``filterable`` the index has to be rebuilt.
+
+        Returns:
+            bool: True if the field is present and filterable, False otherwise
+        """
+        try:
+            from azure.search.documents.indexes.models import SimpleField
+            index = self.index_client.get_index(self.index_name)
+            field = next((f for f in index.fields if f.name == "source_type"), None)
+            if field is None:
+                index.fields.append(SimpleField(name="source_type", type="Edm.String", filterable=True))
+                self.index_client.create_or_update_index(index)
+                logger.info(f"Campo source_type agregado al índice {self.index_name}")
+                return True
+            if not getattr(field, "filterable", False):
+                logger.error(
+                    f"El campo source_type del índice {self.index_name} no es filtrable; "
+                    "hay que recrear el índice para usar filtros por tipo"
+                )
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Failed to ensure source_type field: {e}")
+            return False
+
     def upload_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """
         Upload documents to Azure Search index.
@@ -159,6 +203,7 @@ class AzureSearchClient:
                     "content": doc.get("content", ""),
                     "embedding": doc.get("embedding", []),
                     "created_at": doc.get("created_at", datetime.utcnow().isoformat()),
+                    "source_type": doc.get("source_type") or source_type_for_id(doc.get("id")),
                 }
                 search_documents.append(search_doc)
             
@@ -172,6 +217,7 @@ class AzureSearchClient:
                 return False
             
             logger.info(f"Successfully uploaded {len(search_documents)} documents")
+            _bump_index_generation()
             return True
             
         except Exception as e:
@@ -181,7 +227,8 @@ class AzureSearchClient:
     def search_vector(self, 
                      query_vector: List[float],
                      top_k: int = 10,
-                     filter_query: Optional[str] = None) -> List[Dict[str, Any]]:
+                     filter_query: Optional[str] = None,
+                     profile: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Perform vector search using Azure Search.
         
@@ -189,6 +236,7 @@ class AzureSearchClient:
             query_vector: Vector representation of the query
             top_k: Number of results to return
             filter_query: Optional filter query string
+            profile: Result projection profile ("rag" by default, see utilities.search_projection)
             
         Returns:
             List[Dict[str, Any]]: Search results with similarity scores
@@ -202,7 +250,7 @@ class AzureSearchClient:
                     "k": top_k,
                     "kind": "vector"
                 }],
-                "select": ["id", "content", "embedding", "created_at"],
+                "select": get_select_fields(profile),
                 "top": top_k
             }
             
@@ -210,32 +258,91 @@ class AzureSearchClient:
                 search_options["filter"] = filter_query
             
             # Perform search
-            results = self.search_client.search(search_text="", **search_options)
+            try:
+                results = list(self.search_client.search(search_text="", **search_options))
+            except Exception as filter_error:
+                if not filter_query:
+                    raise
+                # Índice sin source_type filtrable: repetir sin filtro
+                logger.warning(f"Filtro rechazado por Azure Search, reintentando sin filtro: {filter_error}")
+                search_options.pop("filter")
+                results = list(self.search_client.search(search_text="", **search_options))
+            
+            search_results = [self._format_search_result(result) for result in results]
+            
+            logger.info(f"Vector search returned {len(search_results)} results")
+            return search_results
+            
+        except Exception as e:
+            logger.error(f"Vector search failed: {e}")
+            return []
+    
+    def search_hybrid(self,
+                      query_text: str,
+                      query_vector: List[float],
+                      top_k: int = 10,
+                      filter_query: Optional[str] = None,
+                      profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Perform hybrid (BM25 + vector) search in a single request.
+        
+        The service fuses both rankings with RRF (see utilities.hybrid_search), so
+        ``score`` is the fused RRF score, not a cosine similarity.
+        
+        Args:
+            query_text: Query text for the BM25 leg
+            query_vector: Query embedding for the vector leg
+            top_k: Number of results to return
+            filter_query: Optional filter query string
+            profile: Result projection profile ("rag" by default, see utilities.search_projection)
+            
+        Returns:
+            List[Dict[str, Any]]: Search results with fused scores
+        """
+        select = get_select_fields(profile)
+        try:
+            try:
+                results = run_hybrid_search(self.search_client, query_text, query_vector, top_k, select, filter_query)
+            except Exception as filter_error:
+                if not filter_query:
+                    raise
+                # Índice sin source_type filtrable: repetir sin filtro
+                logger.warning(f"Filtro rechazado por Azure Search, reintentando sin filtro: {filter_error}")
+                results = run_hybrid_search(self.search_client, query_text, query_vector, top_k, select)
             
-            # Process results
             search_results = []
             for result in results:
-                search_result = {
-                    "id": result.get("id"),
-                    "document_id": result.get("document_id"),
-                    "text": result.get("text"),
-                    "title": result.get("title"),
-                    "content": result.get("content"),
-                    "metadata": json.loads(result.get("metadata", "{}")),
-                    "created_at": result.get("created_at"),
-                    "source_type": result.get("source_type"),
-                    "filename": result.get("filename"),
-                    "score": result.get("@search.score", 0.0)
-                }
+                search_result = self._format_search_result(result)
+                if "@search.reranker_score" in result:
+                    search_result["reranker_score"] = result.get("@search.reranker_score")
                 search_results.append(search_result)
             
-            logger.info(f"Vector search returned {len(search_results)} results")
+            logger.info(f"Hybrid search returned {len(search_results)} results")
             return search_results
             
         except Exception as e:
-            logger.error(f"Vector search failed: {e}")
+            logger.error(f"Hybrid search failed: {e}")
             return []
     
+    @staticmethod
+    def _format_search_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize a raw search hit (fields outside the projection come back as None)."""
+        search_result = {
+            "id": result.get("id"),
+            "document_id": result.get("document_id"),
+            "text": result.get("text"),
+            "title": result.get("title"),
+            "content": result.get("content"),
+            "metadata": json.loads(result.get("metadata") or "{}"),
+            "created_at": result.get("created_at"),
+            "source_type": result.get("source_type"),
+            "filename": result.get("filename"),
+            "score": result.get("@search.score", 0.0)
+        }
+        if "embedding" in result:
+            search_result["embedding"] = result.get("embedding")
+        return search_result
+    
     def has_semantic_config(self):
         # Devuelve True si el índice tiene sección semantic configurada
         try:
@@ -245,15 +352,18 @@ class AzureSearchClient:
             logger.warning(f"No se pudo verificar configuración semántica: {e}")
             return False
 
-    def search_semantic(self, query_text: str, top_k: int = 10, filter_query: Optional[str] = None) -> List[Dict[str, Any]]:
+    def search_semantic(self, query_text: str, top_k: int = 10, filter_query: Optional[str] = None,
+                        profile: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Perform semantic search using Azure Search.
+        
+        The projection profile defaults to "rag" (no embedding vector in the results).
         """
         try:
             # Build search options
             search_options = {
                 "search_text": query_text,
-                "select": ["id", "content", "embedding", "created_at"],
+                "select": get_select_fields(profile),
                 "top": top_k,
                 "query_type": "semantic"
             }
@@ -296,6 +406,7 @@ class AzureSearchClient:
             
             if result[0].succeeded:
                 logger.info(f"Successfully deleted document: {document_id}")
+                _bump_index_generation()
                 return True
             else:
                 logger.error(f"Failed to delete document: {document_id}")
@@ -368,6 +479,7 @@ class AzureSearchClient:
             
             if result[0].succeeded:
                 logger.info(f"Successfully updated document: {document.get('id')}")
+                _bump_index_generation()
                 return True
             else:
                 logger.error(f"Failed to update document: {document.get('id')}")
@@ -140,10 +140,11 @@ def upsert_blob_metadata(file_name, metadata):
         print(f"Error al actualizar metadatos de {file_name}: {str(e)}")
         raise
 
-def upload_to_blob(file_or_buffer, blob_name):
+def upload_to_blob(file_or_buffer, blob_name, content_type=None):
     """
     Sube un archivo a Azure Blob Storage.
-    file_or_buffer puede ser una ruta (str/Path) o un buffer (BytesIO).
+    file_or_buffer puede ser una ruta (str/Path), bytes o un buffer (BytesIO).
+    content_type es opcional (p. ej. 'application/json').
     """
     try:
         # Verificar si los signals de Azure están deshabilitados
@@ -167,14 +168,20 @@ def upload_to_blob(file_or_buffer, blob_name):
             blob=blob_name
         )
 
-        # Si es ruta, abrir el archivo; si es buffer, usarlo directamente
-        if isinstance(file_or_buffer, (str, bytes, os.PathLike)):
+        upload_kwargs = {'overwrite': True}
+        if content_type:
+            upload_kwargs['content_settings'] = ContentSettings(content_type=content_type)
+
+        # Ruta: abrir el archivo; bytes: subir directo; buffer: rebobinar y subir
+        if isinstance(file_or_buffer, (str, os.PathLike)):
             with open(file_or_buffer, "rb") as data:
-                blob_client.upload_blob(data, overwrite=True)
+                blob_client.upload_blob(data, **upload_kwargs)
+        elif isinstance(file_or_buffer, (bytes, bytearray, memoryview)):
+            blob_client.upload_blob(bytes(file_or_buffer), **upload_kwargs)
         else:
             # Asumimos que es un buffer tipo BytesIO
             file_or_buffer.seek(0)
-            blob_client.upload_blob(file_or_buffer, overwrite=True)
+            blob_client.upload_blob(file_or_buffer, **upload_kwargs)
 
         print("Subida exitosa.")
         return blob_client.url
@@ -183,6 +190,41 @@ def upload_to_blob(file_or_buffer, blob_name):
         print(f"Error en upload_to_blob: {str(e)}")
         raise
 
+def serialize_json_with_legacy_zip(data, json_blob_name, default=None):
+    """
+    Serializa data a JSON en memoria y construye el ZIP legado a partir de los mismos bytes.
+
+    Args:
+        data: Objeto serializable a JSON
+        json_blob_name: Nombre del JSON (también es el nombre dentro del ZIP)
+        default: Serializador para tipos no JSON (fechas, Decimal, Enum)
+
+    Returns:
+        tuple: (bytes del JSON, bytes del ZIP)
+    """
+    json_bytes = json.dumps(data, ensure_ascii=False, indent=2, default=default).encode('utf-8')
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
+        zip_file.writestr(json_blob_name, json_bytes)
+    return json_bytes, zip_buffer.getvalue()
+
+def upload_json_with_legacy_zip(data, json_blob_name, default=None):
+    """
+    Sube data como JSON y como converted/<json_blob_name>.zip sin archivos temporales.
+
+    Args:
+        data: Objeto serializable a JSON
+        json_blob_name: Ruta del JSON en el contenedor (p. ej. events/event_1.json)
+        default: Serializador para tipos no JSON
+
+    Returns:
+        tuple: (URL del JSON, URL del ZIP), o (None, None) si Azure está deshabilitado
+    """
+    json_bytes, zip_bytes = serialize_json_with_legacy_zip(data, json_blob_name, default=default)
+    json_url = upload_to_blob(json_bytes, json_blob_name, content_type='application/json')
+    zip_url = upload_to_blob(zip_bytes, f"converted/{json_blob_name}.zip", content_type='application/zip')
+    return json_url, zip_url
+
 def save_extracted_text_to_blob(original_blob_name, extracted_text, metadata=None):
     """
     Save extracted text from Azure Computer Vision to the converted/ folder in Azure Blob Storage.
@@ -10,6 +10,8 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 from utilities.azure_search_client import get_azure_search_client
+from utilities.hybrid_search import HybridSearchConfig
+from utilities.search_filters import source_type_for_id
 from apps.embeddings.openai_service import OpenAIService
 
 # Import Redis cache layer
@@ -97,6 +99,11 @@ class EmbeddingManager:
         - No escribe ni modifica el índice; solo lectura
         - Umbral opcional por parámetro (no global); si no se pasa, no filtra
         - Soporta `limit=` como alias de `top_k` para compatibilidad con llamadas existentes
+        - `filter_query=` (OData, p. ej. utilities.search_filters) se aplica en el servicio
+        - Con texto y sin umbral usa búsqueda híbrida BM25 + vector (utilities.hybrid_search);
+          el score híbrido es RRF, por eso con umbral se mantiene la búsqueda solo vectorial
+        - Con rerank semántico (AZURE_SEARCH_HYBRID_SEMANTIC_RERANK) se conserva `reranker_score`
+          y se ordena por él, no por el RRF, para no deshacer el rerank del servicio
         """
         try:
             # Compatibilidad con firmas distintas (handlers usan limit=...)
@@ -116,8 +123,20 @@ class EmbeddingManager:
                 logger.info("find_similar: vector vacío; retornando []")
                 return []
 
-            # Búsqueda vectorial usando el cliente existente (solo lectura)
-            results = self.search_client.search_vector(query_vector=vector, top_k=top_k)
+            use_hybrid = (
+                isinstance(query, str) and query.strip()
+                and not (isinstance(threshold, (int, float)) and threshold > 0)
+                and HybridSearchConfig.from_env().enabled
+            )
+            if use_hybrid:
+                results = self.search_client.search_hybrid(
+                    query_text=query, query_vector=vector, top_k=top_k, filter_query=kwargs.get('filter_query')
+                )
+            else:
+                # Búsqueda vectorial usando el cliente existente (solo lectura)
+                results = self.search_client.search_vector(
+                    query_vector=vector, top_k=top_k, filter_query=kwargs.get('filter_query')
+                )
             normalized: List[Dict[str, Any]] = []
             for item in results or []:
                 score = float(item.get('score', item.get('@search.score', 0.0)) or 0.0)
@@ -130,14 +149,17 @@ class EmbeddingManager:
                     'source_type': item.get('source_type'),
                     'filename': item.get('filename'),
                 }
+                if item.get('reranker_score') is not None:
+                    record['reranker_score'] = float(item['reranker_score'])
                 normalized.append(record)
 
             # Filtro opcional por threshold (no modifica ninguna config global)
             if isinstance(threshold, (int, float)) and threshold > 0:
                 normalized = [r for r in normalized if float(r.get('score', 0.0)) >= float(threshold)]
 
-            # Ordenar descendente por score para consistencia
-            normalized.sort(key=lambda r: float(r.get('score', 0.0)), reverse=True)
+            # Ordenar descendente para consistencia: por reranker_score si el servicio reordenó
+            sort_field = 'reranker_score' if any('reranker_score' in r for r in normalized) else 'score'
+            normalized.sort(key=lambda r: float(r.get(sort_field, 0.0)), reverse=True)
             return normalized[: max(0, int(top_k))]
         except Exception as e:
             logger.warning("find_similar: error en búsqueda vectorial: %s", e)
@@ -165,6 +187,7 @@ class EmbeddingManager:
             "content": content,
             "embedding": embedding,
             "created_at": datetime.utcnow().isoformat(),
+            "source_type": source_type_for_id(document_id),
         }
         result = self.search_client.upload_documents([doc])
         logger.info(f"Embedding creado en AI Search: {document_id}")
@@ -173,7 +196,8 @@ class EmbeddingManager:
     def list_embeddings(self, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         # Usar búsqueda semántica para listar embeddings, pero si falla, fallback a búsqueda simple
         try:
-            results = self.search_client.search_semantic(query_text="*", top_k=limit)
+            # Listado de embeddings: el perfil "debug" incluye el vector
+            results = self.search_client.search_semantic(query_text="*", top_k=limit, profile="debug")
         except Exception as e:
             logger.warning(f"Fallo búsqueda semántica, usando búsqueda simple: {e}")
             results = self.search_client.search_client.search("*", top=limit, query_type="simple")
@@ -0,0 +1,138 @@
+"""
+Búsqueda híbrida (BM25 + vector) para Azure AI Search.
+
+Una sola petición lleva ``search_text`` y ``vector_queries``: el servicio
+ejecuta ambas consultas y fusiona los rankings con Reciprocal Rank Fusion
+(RRF), así las consultas de coincidencia exacta (CLABE, nombres, fechas) que
+el vector solo no encuentra suben sin una segunda llamada. Opcionalmente se
+reordena con el ranker semántico.
+
+``@search.score`` de un resultado híbrido es el score RRF (del orden de 0.01-0.03),
+no una similitud coseno: los umbrales pensados para búsqueda vectorial no aplican.
+
+Environment:
+    AZURE_SEARCH_HYBRID_ENABLED (default "true")
+    AZURE_SEARCH_HYBRID_VECTOR_WEIGHT (default 1.0, peso del vector en RRF frente a BM25=1.0;
+        requiere azure-search-documents>=11.6, con versiones anteriores se ignora)
+    AZURE_SEARCH_HYBRID_SEMANTIC_RERANK (default "false")
+    AZURE_SEARCH_SEMANTIC_CONFIG (default "default")
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Constante k de RRF que usa Azure AI Search: score = sum(weight / (k + rank))
+RRF_K = 60
+
+
+@dataclass
+class HybridSearchConfig:
+    """Parámetros de la búsqueda híbrida."""
+    enabled: bool = True
+    vector_weight: float = 1.0
+    semantic_rerank: bool = False
+    semantic_config: str = "default"
+
+    @classmethod
+    def from_env(cls) -> "HybridSearchConfig":
+        try:
+            vector_weight = float(os.getenv('AZURE_SEARCH_HYBRID_VECTOR_WEIGHT', '1.0'))
+        except ValueError:
+            vector_weight = 1.0
+        return cls(
+            enabled=os.getenv('AZURE_SEARCH_HYBRID_ENABLED', 'true').lower() == 'true',
+            vector_weight=vector_weight if vector_weight > 0 else 1.0,
+            semantic_rerank=os.getenv('AZURE_SEARCH_HYBRID_SEMANTIC_RERANK', 'false').lower() == 'true',
+            semantic_config=os.getenv('AZURE_SEARCH_SEMANTIC_CONFIG', 'default'),
+        )
+
+
+def _sdk_supports_vector_weight() -> bool:
+    """True si el SDK instalado serializa ``weight`` en las consultas vectoriales."""
+    try:
+        from azure.search.documents._generated.models import VectorQuery
+        return 'weight' in getattr(VectorQuery, '_attribute_map', {})
+    except Exception:
+        return False
+
+
+def build_hybrid_search_options(query_text: str,
+                                query_vector: List[float],
+                                top_k: int,
+                                select: List[str],
+                                filter_query: Optional[str] = None,
+                                config: Optional[HybridSearchConfig] = None) -> Dict[str, Any]:
+    """
+    Opciones de ``SearchClient.search`` para una consulta híbrida.
+
+    Args:
+        query_text: Texto de la pregunta (rama BM25)
+        query_vector: Embedding de la pregunta (rama vectorial)
+        top_k: Resultados a devolver (y vecinos de la rama vectorial)
+        select: Campos a proyectar (ver utilities.search_projection)
+        filter_query: Filtro OData aplicado a ambas ramas
+        config: Configuración (por defecto desde el entorno)
+
+    Returns:
+        Dict[str, Any]: kwargs para ``search_client.search(**options)``
+    """
+    config = config or HybridSearchConfig.from_env()
+    vector_query: Dict[str, Any] = {
+        "vector": query_vector,
+        "fields": "embedding",
+        "k": top_k,
+        "kind": "vector",
+    }
+    if config.vector_weight != 1.0:
+        if not _sdk_supports_vector_weight():
+            logger.warning("El SDK de Azure Search no soporta peso por consulta vectorial; se usa RRF sin pesos")
+        vector_query["weight"] = config.vector_weight
+
+    options: Dict[str, Any] = {
+        "search_text": query_text,
+        "vector_queries": [vector_query],
+        "select": select,
+        "top": top_k,
+    }
+    if filter_query:
+        options["filter"] = filter_query
+    if config.semantic_rerank and config.semantic_config:
+        options["query_type"] = "semantic"
+        options["semantic_configuration_name"] = config.semantic_config
+    return options
+
+
+def run_hybrid_search(search_client,
+                      query_text: str,
+                      query_vector: List[float],
+                      top_k: int,
+                      select: List[str],
+                      filter_query: Optional[str] = None,
+                      config: Optional[HybridSearchConfig] = None) -> List[Dict[str, Any]]:
+    """
+    Ejecuta la búsqueda híbrida con degradación: sin rerank semántico si el
+    índice no lo soporta y, si la consulta híbrida falla, solo vectorial.
+
+    Returns:
+        List[Dict[str, Any]]: Resultados crudos del SDK (dicts)
+    """
+    config = config or HybridSearchConfig.from_env()
+    options = build_hybrid_search_options(query_text, query_vector, top_k, select, filter_query, config)
+    try:
+        return list(search_client.search(**options))
+    except Exception as e:
+        if options.get("query_type") == "semantic":
+            logger.warning(f"Rerank semántico no disponible, reintentando híbrida sin él: {e}")
+            options.pop("query_type")
+            options.pop("semantic_configuration_name", None)
+            try:
+                return list(search_client.search(**options))
+            except Exception as e_hybrid:
+                e = e_hybrid
+        logger.warning(f"Búsqueda híbrida falló, usando solo vectorial: {e}")
+        options["search_text"] = ""
+        return list(search_client.search(**options))
@@ -0,0 +1,94 @@
+"""
+Filtros OData por tipo de origen para Azure AI Search.
+
+Cada documento del índice lleva ``source_type`` (campo filtrable) que escriben
+todos los indexadores: pipeline de documentos, vistas y señales de Eventos,
+Directorio y Donaciones. Las búsquedas del bot envían el filtro por intención
+al servicio, así los k vecinos que regresa Search ya son relevantes en lugar de
+descartar contactos/donaciones en Python después de traerlos.
+
+Los documentos anteriores sin ``source_type`` (null) pasan los filtros de
+exclusión; ``python manage.py backfill_source_type`` los completa a partir del
+prefijo del ID.
+"""
+
+from typing import Iterable, Optional
+
+SOURCE_TYPE_DOCUMENT = "document"
+SOURCE_TYPE_EVENT = "event"
+SOURCE_TYPE_CONTACT = "contact"
+SOURCE_TYPE_DONATION = "donation"
+
+SOURCE_TYPES = (SOURCE_TYPE_DOCUMENT, SOURCE_TYPE_EVENT, SOURCE_TYPE_CONTACT, SOURCE_TYPE_DONATION)
+
+# Prefijos de ID estables de las señales (event_<pk>, contact_<pk>, donation_<pk>)
+_ID_PREFIXES = {
+    "event_": SOURCE_TYPE_EVENT,
+    "contact_": SOURCE_TYPE_CONTACT,
+    "donation_": SOURCE_TYPE_DONATION,
+}
+
+# Palabras clave de intención (mismas reglas que el filtrado del bot)
+CONTACT_KEYWORDS = ['contacto', 'teléfono', 'telefono', 'número', 'numero', 'llamar', 'comunicar', 'hablar', 'whatsapp']
+MINISTRY_KEYWORDS = ['ministerio', 'ministerios', 'qué ministerios', 'cuáles ministerios', 'quién trabaja', 'quien trabaja', 'quién es', 'quien es']
+DONATION_KEYWORDS = ['donación', 'donaciones', 'donar', 'diezmo', 'diezmos', 'ofrenda', 'ofrendas', 'dar', 'apoyo', 'apoyar']
+DONATION_EXTRA_KEYWORDS = ['cuenta', 'clabe', 'transferencia', 'bancario']
+
+
+def source_type_for_id(document_id: Optional[str]) -> str:
+    """Tipo de origen deducido del ID (documentos sin prefijo conocido son "document")."""
+    doc_id = document_id or ""
+    for prefix, source_type in _ID_PREFIXES.items():
+        if doc_id.startswith(prefix):
+            return source_type
+    return SOURCE_TYPE_DOCUMENT
+
+
+def _odata_list(values: Iterable[str]) -> str:
+    return ",".join(sorted({v.replace("'", "''") for v in values}))
+
+
+def build_source_type_filter(include: Optional[Iterable[str]] = None,
+                             exclude: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Expresión OData sobre ``source_type``.
+
+    Args:
+        include: Tipos permitidos (None = todos)
+        exclude: Tipos a excluir; los documentos sin source_type no se excluyen
+
+    Returns:
+        Optional[str]: Filtro para ``filter`` o None si no hay restricción
+    """
+    clauses = []
+    if include:
+        clauses.append(f"search.in(source_type, '{_odata_list(include)}', ',')")
+    if exclude:
+        clauses.append(f"not search.in(source_type, '{_odata_list(exclude)}', ',')")
+    return " and ".join(clauses) or None
+
+
+def excluded_source_types_for_query(query: str) -> set:
+    """
+    Tipos a excluir según la intención de la pregunta.
+
+    - Contactos: solo en preguntas de contacto/ministerio y nunca en preguntas de donación.
+    - Donaciones: solo en preguntas de donación, diezmo o datos bancarios.
+    """
+    text = (query or "").lower()
+    is_contact = any(word in text for word in CONTACT_KEYWORDS)
+    is_ministry = any(word in text for word in MINISTRY_KEYWORDS)
+    is_donation = any(word in text for word in DONATION_KEYWORDS)
+    is_donation_full = is_donation or any(word in text for word in DONATION_EXTRA_KEYWORDS)
+
+    excluded = set()
+    if is_donation or not (is_contact or is_ministry):
+        excluded.add(SOURCE_TYPE_CONTACT)
+    if not is_donation_full:
+        excluded.add(SOURCE_TYPE_DONATION)
+    return excluded
+
+
+def source_type_filter_for_query(query: str) -> Optional[str]:
+    """Filtro OData por intención para las búsquedas RAG."""
+    return build_source_type_filter(exclude=excluded_source_types_for_query(query))
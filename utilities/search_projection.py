@@ -0,0 +1,50 @@
+"""
+Perfiles de proyección para resultados de Azure AI Search.
+
+Cada perfil define qué campos pide ``select``: el vector ``embedding`` (1536
+floats) solo se devuelve en el perfil "debug", así las búsquedas del bot no
+transfieren ni parsean un vector por resultado que nadie lee.
+
+Perfiles:
+    rag   - campos que usa el contexto RAG del bot (por defecto)
+    admin - todos los campos que escriben los indexadores, sin vector
+    debug - admin más el vector, para inspección
+
+Environment:
+    AZURE_SEARCH_SELECT_PROFILE (default "rag")
+"""
+
+import os
+from typing import Dict, List, Optional
+
+SEARCH_PROFILES: Dict[str, List[str]] = {
+    "rag": ["id", "content", "created_at"],
+    "admin": ["id", "title", "content", "metadata", "created_at"],
+    "debug": ["id", "title", "content", "metadata", "created_at", "embedding"],
+}
+DEFAULT_SEARCH_PROFILE = "rag"
+
+
+def get_default_profile() -> str:
+    """Perfil por defecto para las rutas del bot."""
+    profile = os.getenv('AZURE_SEARCH_SELECT_PROFILE', DEFAULT_SEARCH_PROFILE)
+    return profile if profile in SEARCH_PROFILES else DEFAULT_SEARCH_PROFILE
+
+
+def get_select_fields(profile: Optional[str] = None) -> List[str]:
+    """
+    Campos de ``select`` para un perfil.
+
+    Args:
+        profile: "rag", "admin" o "debug" (None usa el perfil por defecto)
+
+    Returns:
+        List[str]: Campos a proyectar
+
+    Raises:
+        ValueError: Si el perfil no existe
+    """
+    name = profile or get_default_profile()
+    if name not in SEARCH_PROFILES:
+        raise ValueError(f"Unknown search profile: {name}")
+    return list(SEARCH_PROFILES[name])
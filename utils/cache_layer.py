@@ -5,20 +5,46 @@ Este módulo proporciona una capa de abstracción optimizada para cache Redis
 con graceful degradation, namespacing y TTLs específicos por tipo de dato.
 
 Namespacing: vea:emb:*, vea:ans:*, vea:sas:*
+Claves versionadas: vea:<ns>:v2[:<scope>]:<sha256>; en embeddings el scope es
+<deployment>:<dimensión>, así que un cambio de modelo invalida el cache en O(1).
+Las claves del esquema anterior se migran de forma perezosa al leerlas, solo hasta
+CACHE_LEGACY_MIGRATION_UNTIL (por defecto LEGACY_MIGRATION_DEFAULT_UNTIL, fija);
+después un miss cuesta un único GET. Los embeddings no se migran: las claves v1 no
+guardan el deployment y un vector de otro modelo con la misma dimensión se serviría
+como actual, así que se vuelven a generar.
 TTL por defecto: emb=3600, ans=1800, sas=300
 Graceful degradation: si no hay Redis/timeout → None sin excepción
 
+Embeddings en formato binario compacto (float32/float16 con cabecera de versión),
+leídos con un cliente sin decode_responses. Las entradas JSON previas se siguen leyendo.
+
+Cache L1 en proceso (LRU/TTL acotado) delante de Redis para embeddings y respuestas;
+se invalida entre procesos incrementando la generación vea:l1:gen.
+
+Respuestas RAG completas (get_rag_answer/set_rag_answer) con la generación del
+índice vea:index:gen en la clave; cada escritura a Azure AI Search la incrementa
+(bump_index_generation), así nunca se sirve una respuesta anterior a una edición.
+
 Feature flag: CACHE_LAYER_ENABLED (por defecto False)
+Codificación: CACHE_EMB_ENCODING = float32 | float16 | json (por defecto float32)
 """
 
 import json
 import hashlib
 import logging
+import os
+import re
+import struct
+import threading
 import time
-from typing import Optional, Any, Dict, Union
+import unicodedata
+from datetime import datetime, timezone
+from typing import Optional, Any, Dict, List, Tuple, Union
 from urllib.parse import urlparse
 from django.conf import settings
 
+from utils.l1_cache import L1Cache
+
 # Configurar logger
 logger = logging.getLogger(__name__)
 
@@ -39,8 +65,56 @@ NAMESPACES = {
     'sas': 'vea:sas',
 }
 
+# Versión del esquema de claves (v1: identificador crudo o sha256[:16] si > 50 chars)
+KEY_SCHEME_VERSION = 'v2'
+
+# Migración perezosa de claves v1: fecha ISO-8601 de corte, "off" para desactivarla o
+# vacío para usar el corte por defecto. Es una fecha fija (despliegue de v2 + margen
+# de rollout) y no relativa al arranque, para que un reinicio no reactive las lecturas v1
+LEGACY_MIGRATION_DEFAULT_UNTIL = '2026-10-23T00:00:00+00:00'
+LEGACY_MIGRATION_UNTIL = getattr(settings, 'CACHE_LEGACY_MIGRATION_UNTIL', '')
+
+# Codificación binaria de embeddings: magic + versión + dtype + dimensión
+EMB_MAGIC = b'\xabVE'
+EMB_FORMAT_VERSION = 1
+EMB_DTYPES = {
+    'float32': (1, 'f'),
+    'float16': (2, 'e'),
+}
+_EMB_DTYPE_BY_CODE = {code: fmt for code, fmt in EMB_DTYPES.values()}
+_EMB_HEADER = struct.Struct('<3sBBI')
+
+EMB_ENCODING = getattr(settings, 'CACHE_EMB_ENCODING', 'float32')
+
+# Cache L1 en proceso delante de Redis (embeddings y respuestas)
+# Guarda el valor codificado (bytes/JSON) y decodifica al leer, para que CACHE_L1_MAX_BYTES
+# corresponda a la memoria real y no a la de una tupla de floats (~8x mayor).
+L1_ENABLED = getattr(settings, 'CACHE_L1_ENABLED', True)
+L1_VERSION_CHECK_SECONDS = getattr(settings, 'CACHE_L1_VERSION_CHECK_SECONDS', 5)
+L1_GENERATION_KEY = 'vea:l1:gen'
+_l1_cache = L1Cache(
+    max_entries=getattr(settings, 'CACHE_L1_MAX_ENTRIES', 2048),
+    max_bytes=getattr(settings, 'CACHE_L1_MAX_BYTES', 64 * 1024 * 1024),
+    ttl=getattr(settings, 'CACHE_L1_TTL', 300),
+)
+_l1_generation: Optional[str] = None
+_l1_generation_checked_at = 0.0
+_l1_generation_lock = threading.Lock()
+_l2_counters = {'hits': 0, 'misses': 0}
+_l2_counters_lock = threading.Lock()
+# Respuestas RAG completas (get_rag_answer): contadores propios, no se mezclan con emb/ans
+_rag_answer_counters = {'hits': 0, 'misses': 0}
+
+# Generación del índice de búsqueda: se incrementa en cada escritura a Azure AI Search
+INDEX_GENERATION_KEY = 'vea:index:gen'
+INDEX_GENERATION_RETRY_SECONDS = 60
+_index_generation_client = None
+_index_generation_retry_at = 0.0
+
 # Redis client global
 _redis_client = None
+# Cliente sin decode_responses para valores binarios
+_redis_binary_client = None
 
 
 def _get_redis_client():
@@ -60,46 +134,9 @@ def _get_redis_client():
         return None
     
     try:
-        import redis
-        
-        # Obtener URL de Redis desde configuración
-        redis_url = getattr(settings, 'REDIS_URL', None)
-        if not redis_url:
-            redis_url = getattr(settings, 'AZURE_REDIS_URL', None)
-        if not redis_url:
-            redis_url = getattr(settings, 'AZURE_REDIS_CONNECTIONSTRING', None)
-        
-        if not redis_url:
-            logger.warning("Redis URL not configured, cache layer disabled")
-            return None
-        
-        # Parsear URL para configuración SSL
-        parsed_url = urlparse(redis_url)
-        
-        # Configurar SSL si es necesario
-        ssl_config = {}
-        if parsed_url.scheme == 'rediss':
-            ssl_config = {
-                'ssl': True,
-                'ssl_cert_reqs': None,
-                'ssl_ca_certs': None
-            }
-        
-        # Crear cliente Redis con configuración optimizada
-        _redis_client = redis.from_url(
-            redis_url,
-            decode_responses=True,
-            socket_connect_timeout=5,
-            socket_timeout=5,
-            retry_on_timeout=True,
-            health_check_interval=30,
-            **ssl_config
-        )
-        
-        # Probar conexión
-        _redis_client.ping()
-        logger.info("Redis cache layer initialized successfully")
-        
+        _redis_client = _create_redis_client(decode_responses=True)
+        if _redis_client is not None:
+            logger.info("Redis cache layer initialized successfully")
         return _redis_client
         
     except Exception as e:
@@ -108,27 +145,194 @@ def _get_redis_client():
         return None
 
 
-def _generate_key(namespace: str, identifier: str) -> str:
+def _get_redis_binary_client():
+    """
+    Obtiene el cliente Redis sin decodificación (para embeddings binarios)
+    
+    Returns:
+        Redis client o None si no está disponible
+    """
+    global _redis_binary_client
+    
+    if _redis_binary_client is not None:
+        return _redis_binary_client
+    
+    # Reutiliza el flag y la comprobación de disponibilidad del cliente principal
+    if _get_redis_client() is None:
+        return None
+    
+    try:
+        _redis_binary_client = _create_redis_client(decode_responses=False)
+        return _redis_binary_client
+    except Exception as e:
+        logger.warning(f"Redis binary client failed: {e}")
+        _redis_binary_client = None
+        return None
+
+
+def _create_redis_client(decode_responses: bool):
+    """
+    Crea un cliente Redis a partir de la configuración
+    
+    Args:
+        decode_responses: Si el cliente decodifica las respuestas a str
+    
+    Returns:
+        Redis client o None si no hay URL configurada
+    """
+    import redis
+    
+    # Obtener URL de Redis desde configuración
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if not redis_url:
+        redis_url = getattr(settings, 'AZURE_REDIS_URL', None)
+    if not redis_url:
+        redis_url = getattr(settings, 'AZURE_REDIS_CONNECTIONSTRING', None)
+    
+    if not redis_url:
+        logger.warning("Redis URL not configured, cache layer disabled")
+        return None
+    
+    # Parsear URL para configuración SSL
+    parsed_url = urlparse(redis_url)
+    
+    # Configurar SSL si es necesario
+    ssl_config = {}
+    if parsed_url.scheme == 'rediss':
+        ssl_config = {
+            'ssl': True,
+            'ssl_cert_reqs': None,
+            'ssl_ca_certs': None
+        }
+    
+    # Crear cliente Redis con configuración optimizada
+    client = redis.from_url(
+        redis_url,
+        decode_responses=decode_responses,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+        retry_on_timeout=True,
+        health_check_interval=30,
+        **ssl_config
+    )
+    
+    # Probar conexión
+    client.ping()
+    return client
+
+
+def _generate_key(namespace: str, identifier: str, scope: Optional[str] = None) -> str:
     """
-    Genera una clave con namespace
+    Genera una clave versionada con namespace
+    
+    El identificador siempre se reduce a SHA-256 completo, por lo que la longitud
+    de la clave está acotada y no hay colisiones por truncamiento.
     
     Args:
         namespace: Namespace (emb, ans, sas)
         identifier: Identificador único
+        scope: Segmento opcional que aísla el keyspace (p. ej. modelo y dimensión)
     
     Returns:
-        Clave formateada con namespace
+        Clave formateada con namespace y versión
     """
     if namespace not in NAMESPACES:
         raise ValueError(f"Invalid namespace: {namespace}")
     
-    # Generar hash del identificador si es muy largo
+    digest = hashlib.sha256(identifier.encode('utf-8')).hexdigest()
+    parts = [NAMESPACES[namespace], KEY_SCHEME_VERSION]
+    if scope:
+        parts.append(scope)
+    parts.append(digest)
+    return ':'.join(parts)
+
+
+def _legacy_key(namespace: str, identifier: str) -> str:
+    """
+    Genera la clave del esquema anterior (v1) para migración perezosa
+    
+    Args:
+        namespace: Namespace (emb, ans, sas)
+        identifier: Identificador único
+    
+    Returns:
+        Clave v1
+    """
     if len(identifier) > 50:
         identifier = hashlib.sha256(identifier.encode('utf-8')).hexdigest()[:16]
-    
     return f"{NAMESPACES[namespace]}:{identifier}"
 
 
+def get_embedding_scope() -> str:
+    """
+    Scope del keyspace de embeddings: deployment y dimensión configurados
+    
+    Returns:
+        Segmento de clave, p. ej. 'text-embedding-3-small:1536'
+    """
+    deployment = os.getenv('AZURE_OPENAI_EMBEDDINGS_DEPLOYMENT', '') or 'default'
+    deployment = re.sub(r'[^A-Za-z0-9_.-]', '_', deployment)[:64]
+    return f"{deployment}:{get_embedding_dimensions()}"
+
+
+def get_embedding_dimensions() -> int:
+    """Dimensión esperada de los embeddings (EMBEDDINGS_DIMENSIONS, por defecto 1536)."""
+    return int(getattr(settings, 'EMBEDDINGS_DIMENSIONS', 1536))
+
+
+def _legacy_migration_active() -> bool:
+    """
+    True mientras puede quedar alguna clave v1 viva
+    
+    Las claves v1 expiran como máximo el TTL más largo del namespace después del
+    despliegue; pasada la fecha de corte no se consultan y un miss cuesta un solo GET.
+    """
+    cutoff = (LEGACY_MIGRATION_UNTIL or '').strip() or LEGACY_MIGRATION_DEFAULT_UNTIL
+    if cutoff.lower() == 'off':
+        return False
+    try:
+        until = datetime.fromisoformat(cutoff)
+    except ValueError:
+        logger.warning(f"CACHE_LEGACY_MIGRATION_UNTIL inválido: {cutoff}")
+        return False
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) < until
+
+
+def _get_with_migration(client, key: str, legacy_key: str, ttl: int):
+    """
+    Lee una clave v2 y, si no existe, migra el valor de la clave v1
+    
+    El valor migrado se copia a la clave nueva conservando el TTL restante de la
+    clave antigua (o el del namespace si no tiene) y la clave antigua se elimina.
+    
+    Args:
+        client: Cliente Redis a usar
+        key: Clave v2
+        legacy_key: Clave v1
+        ttl: TTL por defecto para la clave nueva
+    
+    Returns:
+        Valor crudo o None
+    """
+    result = _safe_redis_operation(client.get, key)
+    if result or not _legacy_migration_active():
+        return result
+    
+    legacy = _safe_redis_operation(client.get, legacy_key)
+    if not legacy:
+        return None
+    
+    remaining = _safe_redis_operation(client.ttl, legacy_key)
+    if isinstance(remaining, int) and remaining > 0:
+        ttl = remaining
+    _safe_redis_operation(client.setex, key, ttl, legacy)
+    _safe_redis_operation(client.delete, legacy_key)
+    logger.debug(f"Migrated cache key {legacy_key} -> {key}")
+    return legacy
+
+
 def _safe_redis_operation(operation, *args, **kwargs):
     """
     Ejecuta una operación Redis con graceful degradation
@@ -155,13 +359,233 @@ def _safe_redis_operation(operation, *args, **kwargs):
         return None
 
 
+def _run_pipeline(client, build) -> Optional[list]:
+    """
+    Ejecuta comandos en un pipeline Redis (una sola ida y vuelta) con graceful degradation
+    
+    Args:
+        client: Cliente Redis a usar
+        build: Función que recibe el pipeline y encola los comandos
+    
+    Returns:
+        Lista de resultados o None si falla
+    """
+    def _execute():
+        pipe = client.pipeline(transaction=False)
+        build(pipe)
+        return pipe.execute()
+    
+    return _safe_redis_operation(_execute)
+
+
+def _mget_with_migration(client, keys: List[str], legacy_keys: List[str], ttl: int) -> List[Any]:
+    """
+    Lee varias claves v2 y sus claves v1 en un único pipeline, migrando las v1
+    
+    Args:
+        client: Cliente Redis a usar
+        keys: Claves v2
+        legacy_keys: Claves v1 alineadas con keys
+        ttl: TTL por defecto para las claves migradas
+    
+    Returns:
+        Valores crudos alineados con keys (None si no existen)
+    """
+    if not keys:
+        return []
+    
+    if not _legacy_migration_active():
+        results = _run_pipeline(client, lambda pipe: pipe.mget(keys))
+        return list(results[0]) if results else [None] * len(keys)
+    
+    results = _run_pipeline(client, lambda pipe: (pipe.mget(keys), pipe.mget(legacy_keys)))
+    if not results:
+        return [None] * len(keys)
+    
+    values, legacy_values = list(results[0]), results[1]
+    to_migrate = [
+        i for i, (value, legacy) in enumerate(zip(values, legacy_values))
+        if not value and legacy
+    ]
+    if not to_migrate:
+        return values
+    
+    remaining = _run_pipeline(client, lambda pipe: [pipe.ttl(legacy_keys[i]) for i in to_migrate]) or []
+    
+    def _migrate(pipe):
+        for pos, i in enumerate(to_migrate):
+            key_ttl = remaining[pos] if pos < len(remaining) and isinstance(remaining[pos], int) and remaining[pos] > 0 else ttl
+            pipe.setex(keys[i], key_ttl, legacy_values[i])
+            pipe.delete(legacy_keys[i])
+    
+    _run_pipeline(client, _migrate)
+    for i in to_migrate:
+        values[i] = legacy_values[i]
+    logger.debug(f"Migrated {len(to_migrate)} cache keys to {KEY_SCHEME_VERSION}")
+    return values
+
+
+def _mset(client, items: List[Tuple[str, Any]], ttl: int) -> int:
+    """
+    Guarda varias claves con TTL en un único pipeline
+    
+    Args:
+        client: Cliente Redis a usar
+        items: Pares (clave, valor)
+        ttl: TTL en segundos
+    
+    Returns:
+        Número de claves guardadas
+    """
+    if not items:
+        return 0
+    
+    results = _run_pipeline(client, lambda pipe: [pipe.setex(key, ttl, value) for key, value in items])
+    return sum(1 for r in results or [] if r)
+
+
+# =============================================================================
+# CACHE L1 EN PROCESO
+# =============================================================================
+
+def _l1_active() -> bool:
+    """Indica si el L1 está habilitado (requiere además el feature flag del cache)."""
+    return CACHE_LAYER_ENABLED and L1_ENABLED
+
+
+def _l1_sync_generation() -> None:
+    """
+    Comprueba la generación de invalidación en Redis (como máximo cada
+    CACHE_L1_VERSION_CHECK_SECONDS) y vacía el L1 si cambió en otro proceso.
+    """
+    global _l1_generation, _l1_generation_checked_at
+    
+    now = time.monotonic()
+    if now - _l1_generation_checked_at < L1_VERSION_CHECK_SECONDS:
+        return
+    
+    with _l1_generation_lock:
+        if now - _l1_generation_checked_at < L1_VERSION_CHECK_SECONDS:
+            return
+        _l1_generation_checked_at = now
+        client = _get_redis_client()
+        if client is None:
+            return
+        generation = _safe_redis_operation(client.get, L1_GENERATION_KEY) or '0'
+        if _l1_generation is not None and generation != _l1_generation:
+            _l1_cache.clear()
+            logger.info(f"L1 cache invalidated (generation {_l1_generation} -> {generation})")
+        _l1_generation = generation
+
+
+def _l1_get(key: str) -> Optional[Any]:
+    """Lee una clave del L1 (None si no está o el L1 está deshabilitado)."""
+    if not _l1_active():
+        return None
+    _l1_sync_generation()
+    return _l1_cache.get(key)
+
+
+def _l1_set(key: str, value: Any, size: int, ttl: int) -> None:
+    """Guarda una clave en el L1 si está habilitado."""
+    if _l1_active():
+        _l1_cache.set(key, value, size, ttl)
+
+
+def _count_l2(hits: int = 0, misses: int = 0) -> None:
+    """Actualiza los contadores de aciertos/fallos en Redis (L2)."""
+    with _l2_counters_lock:
+        _l2_counters['hits'] += hits
+        _l2_counters['misses'] += misses
+
+
+def _count_rag_answer(hits: int = 0, misses: int = 0) -> None:
+    """Actualiza los contadores de aciertos/fallos de la cache de respuestas RAG."""
+    with _l2_counters_lock:
+        _rag_answer_counters['hits'] += hits
+        _rag_answer_counters['misses'] += misses
+
+
+def invalidate_l1() -> bool:
+    """
+    Invalida el L1 en todos los procesos incrementando la generación en Redis
+    
+    Returns:
+        True si la generación se publicó en Redis, False si solo se limpió el L1 local
+    """
+    global _l1_generation
+    
+    _l1_cache.clear()
+    client = _get_redis_client()
+    if client is None:
+        return False
+    generation = _safe_redis_operation(client.incr, L1_GENERATION_KEY)
+    if generation is None:
+        return False
+    with _l1_generation_lock:
+        _l1_generation = str(generation)
+    return True
+
+
 # =============================================================================
 # FUNCIONES DE CACHE PARA EMBEDDINGS
 # =============================================================================
 
+def encode_embedding(embedding: list, encoding: Optional[str] = None) -> bytes:
+    """
+    Codifica un embedding en formato binario compacto
+    
+    Args:
+        embedding: Lista de floats
+        encoding: float32, float16 o json (usa CACHE_EMB_ENCODING si no se indica)
+    
+    Returns:
+        Bytes con cabecera de versión (o JSON UTF-8 si encoding es json)
+    """
+    encoding = encoding or EMB_ENCODING
+    if encoding == 'json':
+        return json.dumps(embedding).encode('utf-8')
+    if encoding not in EMB_DTYPES:
+        raise ValueError(f"Invalid embedding encoding: {encoding}")
+    
+    code, fmt = EMB_DTYPES[encoding]
+    dim = len(embedding)
+    header = _EMB_HEADER.pack(EMB_MAGIC, EMB_FORMAT_VERSION, code, dim)
+    return header + struct.pack(f'<{dim}{fmt}', *embedding)
+
+
+def decode_embedding(raw: Union[bytes, str]) -> Optional[list]:
+    """
+    Decodifica un embedding binario o JSON (entradas anteriores al formato binario)
+    
+    Args:
+        raw: Valor leído de Redis
+    
+    Returns:
+        Lista de floats o None si el valor no es válido
+    """
+    if isinstance(raw, (bytes, bytearray)) and raw[:len(EMB_MAGIC)] == EMB_MAGIC:
+        if len(raw) < _EMB_HEADER.size:
+            return None
+        _, version, code, dim = _EMB_HEADER.unpack_from(raw)
+        fmt = _EMB_DTYPE_BY_CODE.get(code)
+        if version != EMB_FORMAT_VERSION or fmt is None:
+            return None
+        try:
+            return list(struct.unpack_from(f'<{dim}{fmt}', raw, _EMB_HEADER.size))
+        except struct.error:
+            return None
+    
+    try:
+        value = json.loads(raw)
+    except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
+        return None
+    return value if isinstance(value, list) else None
+
+
 def get_emb(text: str) -> Optional[list]:
     """
-    Obtiene embedding desde cache
+    Obtiene embedding desde cache (L1 en proceso y luego Redis)
     
     Args:
         text: Texto para buscar en cache
@@ -169,16 +593,30 @@ def get_emb(text: str) -> Optional[list]:
     Returns:
         Lista de embeddings o None si no está en cache
     """
-    key = _generate_key('emb', text)
-    result = _safe_redis_operation(_get_redis_client().get, key)
+    key = _generate_key('emb', text, get_embedding_scope())
+    cached = _l1_get(key)
+    if cached is not None:
+        return decode_embedding(cached)
+    
+    client = _get_redis_binary_client()
+    if client is None:
+        return None
+    
+    dimensions = get_embedding_dimensions()
+    # Sin migración de claves v1: no registran el deployment (ver docstring del módulo)
+    result = _safe_redis_operation(client.get, key)
     
     if result:
-        try:
-            return json.loads(result)
-        except (json.JSONDecodeError, TypeError):
-            logger.warning(f"Invalid JSON in cache for key: {key}")
+        embedding = decode_embedding(result)
+        if embedding is None or len(embedding) != dimensions:
+            logger.warning(f"Invalid embedding in cache for key: {key}")
+            _count_l2(misses=1)
             return None
+        _count_l2(hits=1)
+        _l1_set(key, result, len(result), DEFAULT_TTLS['emb'])
+        return embedding
     
+    _count_l2(misses=1)
     return None
 
 
@@ -197,15 +635,99 @@ def set_emb(text: str, embedding: list, ttl: Optional[int] = None) -> bool:
     if not embedding:
         return False
     
-    key = _generate_key('emb', text)
+    key = _generate_key('emb', text, get_embedding_scope())
     ttl = ttl or DEFAULT_TTLS['emb']
     
     try:
-        value = json.dumps(embedding)
-        return _safe_redis_operation(_get_redis_client().setex, key, ttl, value) or False
-    except (TypeError, ValueError) as e:
+        value = encode_embedding(embedding)
+    except (TypeError, ValueError, struct.error) as e:
         logger.warning(f"Failed to serialize embedding for cache: {e}")
         return False
+    
+    _l1_set(key, value, len(value), ttl)
+    client = _get_redis_binary_client()
+    if client is None:
+        return False
+    return _safe_redis_operation(client.setex, key, ttl, value) or False
+
+
+def mget_emb(texts: List[str]) -> List[Optional[list]]:
+    """
+    Obtiene varios embeddings desde cache en una sola ida y vuelta
+    
+    Args:
+        texts: Textos a buscar
+    
+    Returns:
+        Lista alineada con texts (None donde no hay entrada válida)
+    """
+    if not texts:
+        return []
+    
+    scope = get_embedding_scope()
+    keys = [_generate_key('emb', t, scope) for t in texts]
+    embeddings: List[Optional[list]] = [None] * len(texts)
+    
+    missing = []
+    for i, key in enumerate(keys):
+        cached = _l1_get(key)
+        if cached is not None:
+            embeddings[i] = decode_embedding(cached)
+        else:
+            missing.append(i)
+    if not missing:
+        return embeddings
+    
+    client = _get_redis_binary_client()
+    if client is None:
+        return embeddings
+    
+    dimensions = get_embedding_dimensions()
+    # Sin migración de claves v1: no registran el deployment (ver docstring del módulo)
+    results = _run_pipeline(client, lambda pipe: pipe.mget([keys[i] for i in missing]))
+    raw_values = list(results[0]) if results else [None] * len(missing)
+    
+    hits = 0
+    for i, raw in zip(missing, raw_values):
+        embedding = decode_embedding(raw) if raw else None
+        if embedding and len(embedding) == dimensions:
+            embeddings[i] = embedding
+            _l1_set(keys[i], raw, len(raw), DEFAULT_TTLS['emb'])
+            hits += 1
+    _count_l2(hits=hits, misses=len(missing) - hits)
+    return embeddings
+
+
+def mset_emb(pairs: List[Tuple[str, list]], ttl: Optional[int] = None) -> int:
+    """
+    Guarda varios embeddings en cache en una sola ida y vuelta
+    
+    Args:
+        pairs: Pares (texto, embedding)
+        ttl: TTL en segundos (opcional, usa default si no se especifica)
+    
+    Returns:
+        Número de embeddings guardados
+    """
+    ttl = ttl or DEFAULT_TTLS['emb']
+    scope = get_embedding_scope()
+    items = []
+    for text, embedding in pairs:
+        if not embedding:
+            continue
+        try:
+            key = _generate_key('emb', text, scope)
+            value = encode_embedding(embedding)
+        except (TypeError, ValueError, struct.error) as e:
+            logger.warning(f"Failed to serialize embedding for cache: {e}")
+            continue
+        _l1_set(key, value, len(value), ttl)
+        items.append((key, value))
+    
+    client = _get_redis_binary_client()
+    if client is None:
+        return 0
+    return _mset(client, items, ttl)
 
 
 # =============================================================================
@@ -214,7 +736,7 @@ def set_emb(text: str, embedding: list, ttl: Optional[int] = None) -> bool:
 
 def get_ans(query: str) -> Optional[Dict[str, Any]]:
     """
-    Obtiene respuesta de AI Search desde cache
+    Obtiene respuesta de AI Search desde cache (L1 en proceso y luego Redis)
     
     Args:
         query: Query de búsqueda
@@ -223,15 +745,30 @@ def get_ans(query: str) -> Optional[Dict[str, Any]]:
         Respuesta de AI Search o None si no está en cache
     """
     key = _generate_key('ans', query)
-    result = _safe_redis_operation(_get_redis_client().get, key)
+    # El L1 guarda el JSON, no el dict: cada lectura decodifica una copia propia
+    # y mutarla (p. ej. al anotar resultados) no altera la entrada cacheada
+    cached = _l1_get(key)
+    if cached is not None:
+        return json.loads(cached)
+    
+    client = _get_redis_client()
+    if client is None:
+        return None
+    result = _get_with_migration(client, key, _legacy_key('ans', query), DEFAULT_TTLS['ans'])
     
     if result:
         try:
-            return json.loads(result)
+            response = json.loads(result)
         except (json.JSONDecodeError, TypeError):
             logger.warning(f"Invalid JSON in cache for key: {key}")
+            _count_l2(misses=1)
             return None
+        _count_l2(hits=1)
+        if isinstance(response, dict):
+            _l1_set(key, result, len(result), DEFAULT_TTLS['ans'])
+        return response
     
+    _count_l2(misses=1)
     return None
 
 
@@ -255,10 +792,282 @@ def set_ans(query: str, response: Dict[str, Any], ttl: Optional[int] = None) ->
     
     try:
         value = json.dumps(response)
-        return _safe_redis_operation(_get_redis_client().setex, key, ttl, value) or False
     except (TypeError, ValueError) as e:
         logger.warning(f"Failed to serialize AI Search response for cache: {e}")
         return False
+    
+    if isinstance(response, dict):
+        _l1_set(key, value, len(value), ttl)
+    client = _get_redis_client()
+    if client is None:
+        return False
+    return _safe_redis_operation(client.setex, key, ttl, value) or False
+
+
+def mget_ans(queries: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Obtiene varias respuestas de AI Search desde cache en una sola ida y vuelta
+    
+    Args:
+        queries: Queries de búsqueda
+    
+    Returns:
+        Lista alineada con queries (None donde no hay entrada válida)
+    """
+    if not queries:
+        return []
+    
+    keys = [_generate_key('ans', q) for q in queries]
+    responses: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+    
+    missing = []
+    for i, key in enumerate(keys):
+        cached = _l1_get(key)
+        if cached is not None:
+            responses[i] = json.loads(cached)
+        else:
+            missing.append(i)
+    if not missing:
+        return responses
+    
+    client = _get_redis_client()
+    if client is None:
+        return responses
+    
+    raw_values = _mget_with_migration(
+        client,
+        [keys[i] for i in missing],
+        [_legacy_key('ans', queries[i]) for i in missing],
+        DEFAULT_TTLS['ans'],
+    )
+    
+    hits = 0
+    for i, raw in zip(missing, raw_values):
+        try:
+            response = json.loads(raw) if raw else None
+        except (json.JSONDecodeError, TypeError):
+            response = None
+        if response is not None:
+            responses[i] = response
+            hits += 1
+            if isinstance(response, dict):
+                _l1_set(keys[i], raw, len(raw), DEFAULT_TTLS['ans'])
+    _count_l2(hits=hits, misses=len(missing) - hits)
+    return responses
+
+
+def mset_ans(pairs: List[Tuple[str, Dict[str, Any]]], ttl: Optional[int] = None) -> int:
+    """
+    Guarda varias respuestas de AI Search en cache en una sola ida y vuelta
+    
+    Args:
+        pairs: Pares (query, respuesta)
+        ttl: TTL en segundos (opcional, usa default si no se especifica)
+    
+    Returns:
+        Número de respuestas guardadas
+    """
+    ttl = ttl or DEFAULT_TTLS['ans']
+    items = []
+    for query, response in pairs:
+        if not response:
+            continue
+        try:
+            key = _generate_key('ans', query)
+            value = json.dumps(response)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Failed to serialize AI Search response for cache: {e}")
+            continue
+        if isinstance(response, dict):
+            _l1_set(key, value, len(value), ttl)
+        items.append((key, value))
+    
+    client = _get_redis_client()
+    if client is None:
+        return 0
+    return _mset(client, items, ttl)
+
+
+# =============================================================================
+# GENERACIÓN DEL ÍNDICE Y CACHE DE RESPUESTAS RAG
+# =============================================================================
+#
+# Solo se comparte la generación (vea:index:gen) con la función v2 de WhatsApp
+# (functions-v2/whatsapp_event_grid_trigger/answer_cache.py). Las respuestas van
+# en espacios de claves separados a propósito: la función no carga Django ni este
+# módulo, y sus respuestas salen de otro prompt (BOT_SYSTEM_PROMPT con fecha y
+# hora), así que una respuesta de un lado nunca es válida para el otro.
+
+def _get_index_generation_client():
+    """
+    Cliente Redis para la generación del índice
+    
+    No depende de CACHE_LAYER_ENABLED: las cachés de respuestas de otros procesos
+    (función v2 de WhatsApp) leen la generación aunque el cache web esté apagado.
+    Si Redis no está disponible se reintenta como máximo cada INDEX_GENERATION_RETRY_SECONDS.
+    
+    Returns:
+        Redis client o None si no está disponible
+    """
+    global _index_generation_client, _index_generation_retry_at
+    
+    if _index_generation_client is not None:
+        return _index_generation_client
+    
+    now = time.monotonic()
+    if now < _index_generation_retry_at:
+        return None
+    
+    try:
+        client = _create_redis_client(decode_responses=True)
+    except Exception as e:
+        logger.warning(f"Redis not available for index generation: {e}")
+        client = None
+    if client is None:
+        _index_generation_retry_at = now + INDEX_GENERATION_RETRY_SECONDS
+        return None
+    _index_generation_client = client
+    return client
+
+
+def get_index_generation() -> Optional[str]:
+    """
+    Generación actual del índice de búsqueda
+    
+    Returns:
+        Generación ('0' si nunca se incrementó) o None si Redis no está disponible
+    """
+    client = _get_index_generation_client()
+    if client is None:
+        return None
+    try:
+        return client.get(INDEX_GENERATION_KEY) or '0'
+    except Exception as e:
+        logger.warning(f"Failed to read index generation: {e}")
+        return None
+
+
+def bump_index_generation() -> Optional[int]:
+    """
+    Incrementa la generación del índice tras escribir en Azure AI Search
+    
+    Las respuestas RAG cacheadas llevan la generación en la clave, así que
+    cualquier escritura (pipeline, vistas, señales, outbox) las deja obsoletas en O(1).
+    
+    Returns:
+        Nueva generación o None si Redis no está disponible
+    """
+    client = _get_index_generation_client()
+    if client is None:
+        return None
+    try:
+        return client.incr(INDEX_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to bump index generation: {e}")
+        return None
+
+
+def normalize_question(text: str) -> str:
+    """
+    Normaliza una pregunta para las claves de cache
+    
+    Minúsculas, sin acentos, espacios simples y sin puntuación en los extremos,
+    así "¿Cómo donar?" y "como donar" comparten entrada.
+    """
+    folded = unicodedata.normalize('NFKD', (text or '').lower())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return re.sub(r'\s+', ' ', folded).strip('¿?¡!.,;:"\'()[] ')
+
+
+def _rag_retrieval_key(question: str, generation: str) -> str:
+    return _generate_key('ans', f"ret|{normalize_question(question)}", f"g{generation}")
+
+
+def _rag_answer_key(question: str, doc_ids: List[str], prompt_version: str, generation: str) -> str:
+    identifier = f"{normalize_question(question)}|{','.join(sorted(doc_ids))}"
+    return _generate_key('ans', identifier, f"g{generation}:{prompt_version}")
+
+
+def get_rag_answer(question: str, prompt_version: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Obtiene una respuesta RAG completa desde cache (sin búsqueda ni LLM)
+    
+    La clave combina pregunta normalizada, IDs de documentos recuperados y versión
+    del prompt, bajo la generación actual del índice. Los IDs salen de la entrada de
+    recuperación guardada con la respuesta.
+    
+    Args:
+        question: Pregunta del usuario
+        prompt_version: Versión del prompt/modelo con que se generó la respuesta
+    
+    Returns:
+        (respuesta o None, generación leída); con generación None no se debe cachear
+    """
+    generation = get_index_generation()
+    if generation is None:
+        return None, None
+    client = _get_redis_client()
+    if client is None:
+        return None, generation
+    
+    raw_ids = _safe_redis_operation(client.get, _rag_retrieval_key(question, generation))
+    if not raw_ids:
+        _count_rag_answer(misses=1)
+        return None, generation
+    try:
+        doc_ids = json.loads(raw_ids)
+    except (json.JSONDecodeError, TypeError):
+        _count_rag_answer(misses=1)
+        return None, generation
+    
+    raw = _safe_redis_operation(client.get, _rag_answer_key(question, doc_ids, prompt_version, generation))
+    if not raw:
+        _count_rag_answer(misses=1)
+        return None, generation
+    try:
+        response = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        logger.warning("Invalid JSON in RAG answer cache")
+        _count_rag_answer(misses=1)
+        return None, generation
+    _count_rag_answer(hits=1)
+    return response, generation
+
+
+def set_rag_answer(question: str, doc_ids: List[str], prompt_version: str, response: Dict[str, Any],
+                   generation: Optional[str], ttl: Optional[int] = None) -> bool:
+    """
+    Guarda una respuesta RAG completa y los IDs recuperados para la pregunta
+    
+    Args:
+        question: Pregunta del usuario
+        doc_ids: IDs de los documentos usados como contexto
+        prompt_version: Versión del prompt/modelo
+        response: Respuesta a guardar
+        generation: Generación leída ANTES de buscar (si hubo escrituras, la entrada nace obsoleta)
+        ttl: TTL en segundos (opcional, usa el de 'ans')
+    
+    Returns:
+        True si se guardó exitosamente, False en caso contrario
+    """
+    if not response or generation is None:
+        return False
+    client = _get_redis_client()
+    if client is None:
+        return False
+    
+    ttl = ttl or DEFAULT_TTLS['ans']
+    try:
+        value = json.dumps(response)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Failed to serialize RAG answer for cache: {e}")
+        return False
+    
+    items = [
+        (_rag_retrieval_key(question, generation), json.dumps(list(doc_ids))),
+        (_rag_answer_key(question, list(doc_ids), prompt_version, generation), value),
+    ]
+    return _mset(client, items, ttl) == len(items)
 
 
 # =============================================================================
@@ -278,7 +1087,10 @@ def get_sas(container: str, blob_name: str) -> Optional[str]:
     """
     identifier = f"{container}:{blob_name}"
     key = _generate_key('sas', identifier)
-    return _safe_redis_operation(_get_redis_client().get, key)
+    client = _get_redis_client()
+    if client is None:
+        return None
+    return _get_with_migration(client, key, _legacy_key('sas', identifier), DEFAULT_TTLS['sas'])
 
 
 def set_sas(container: str, blob_name: str, sas_token: str, ttl: Optional[int] = None) -> bool:
@@ -300,8 +1112,60 @@ def set_sas(container: str, blob_name: str, sas_token: str, ttl: Optional[int] =
     identifier = f"{container}:{blob_name}"
     key = _generate_key('sas', identifier)
     ttl = ttl or DEFAULT_TTLS['sas']
+    client = _get_redis_client()
+    if client is None:
+        return False
     
-    return _safe_redis_operation(_get_redis_client().setex, key, ttl, sas_token) or False
+    return _safe_redis_operation(client.setex, key, ttl, sas_token) or False
+
+
+def mget_sas(blobs: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """
+    Obtiene varios SAS tokens desde cache en una sola ida y vuelta
+    
+    Args:
+        blobs: Pares (contenedor, blob)
+    
+    Returns:
+        Lista alineada con blobs (None donde no hay token)
+    """
+    if not blobs:
+        return []
+    client = _get_redis_client()
+    if client is None:
+        return [None] * len(blobs)
+    
+    identifiers = [f"{container}:{blob_name}" for container, blob_name in blobs]
+    values = _mget_with_migration(
+        client,
+        [_generate_key('sas', i) for i in identifiers],
+        [_legacy_key('sas', i) for i in identifiers],
+        DEFAULT_TTLS['sas'],
+    )
+    return [v or None for v in values]
+
+
+def mset_sas(tokens: List[Tuple[str, str, str]], ttl: Optional[int] = None) -> int:
+    """
+    Guarda varios SAS tokens en cache en una sola ida y vuelta
+    
+    Args:
+        tokens: Tuplas (contenedor, blob, sas_token)
+        ttl: TTL en segundos (opcional, usa default si no se especifica)
+    
+    Returns:
+        Número de tokens guardados
+    """
+    client = _get_redis_client()
+    if client is None:
+        return 0
+    
+    items = [
+        (_generate_key('sas', f"{container}:{blob_name}"), sas_token)
+        for container, blob_name, sas_token in tokens
+        if sas_token
+    ]
+    return _mset(client, items, ttl or DEFAULT_TTLS['sas'])
 
 
 # =============================================================================
@@ -325,7 +1189,8 @@ def get_cache_stats() -> Dict[str, Any]:
     if not client:
         return {
             'enabled': False,
-            'reason': 'Redis not available'
+            'reason': 'Redis not available',
+            'tiers': get_tier_stats()
         }
     
     try:
@@ -338,6 +1203,7 @@ def get_cache_stats() -> Dict[str, Any]:
             'redis_version': info.get('redis_version', 'unknown'),
             'connected_clients': info.get('connected_clients', 0),
             'used_memory_human': info.get('used_memory_human', 'unknown'),
+            'tiers': get_tier_stats(),
             'keyspace': {}
         }
         
@@ -353,10 +1219,27 @@ def get_cache_stats() -> Dict[str, Any]:
         logger.warning(f"Failed to get cache stats: {e}")
         return {
             'enabled': True,
-            'error': str(e)
+            'error': str(e),
+            'tiers': get_tier_stats()
         }
 
 
+def get_tier_stats() -> Dict[str, Any]:
+    """
+    Obtiene los contadores de aciertos/fallos por nivel (L1 en proceso, L2 Redis)
+    
+    Returns:
+        Diccionario con estadísticas de L1, L2 (emb/ans) y de la cache de respuestas RAG
+    """
+    l1 = _l1_cache.stats()
+    l1['enabled'] = _l1_active()
+    l1['generation'] = _l1_generation
+    with _l2_counters_lock:
+        l2 = dict(_l2_counters)
+        rag_answers = dict(_rag_answer_counters)
+    return {'l1': l1, 'l2': l2, 'rag_answers': rag_answers}
+
+
 def clear_cache(namespace: Optional[str] = None) -> bool:
     """
     Limpia el cache
@@ -374,6 +1257,9 @@ def clear_cache(namespace: Optional[str] = None) -> bool:
     if not client:
         return False
     
+    # Las entradas L1 de cualquier proceso dejan de ser válidas
+    invalidate_l1()
+    
     try:
         if namespace:
             if namespace not in NAMESPACES:
@@ -0,0 +1,99 @@
+"""
+Cache L1 en proceso - VEA Connect
+
+LRU con TTL, acotado por número de entradas y por bytes, seguro entre hilos.
+Se usa delante de Redis (utils.cache_layer) para embeddings y respuestas.
+Las entradas no llevan versión: la invalidación entre procesos la hace
+utils.cache_layer, que consulta la generación vea:l1:gen (incrementada por
+invalidate_l1 desde clear_cache) y vacía el L1 completo cuando cambia.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class L1Cache:
+    """LRU/TTL en memoria con límite de entradas y de bytes."""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024, ttl: int = 300):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl = max(1, int(ttl))
+        self._data: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Obtiene un valor y lo marca como usado recientemente
+
+        Args:
+            key: Clave completa (la misma que en Redis)
+
+        Returns:
+            Valor o None si no existe o expiró
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[int] = None) -> None:
+        """
+        Guarda un valor, desalojando los menos usados si se superan los límites
+
+        Args:
+            key: Clave completa
+            value: Valor a guardar
+            size: Tamaño aproximado en bytes (p. ej. longitud serializada)
+            ttl: TTL en segundos (acotado por el TTL del L1)
+        """
+        size = max(1, int(size))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + min(ttl or self.ttl, self.ttl)
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Vacía el cache."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas del L1."""
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }